@@ -1,173 +1,459 @@
+import os
+import threading
+from functools import lru_cache
 import dash
-from dash import dcc, html
-from dash.dependencies import Input, Output
+from dash import dcc, html, Patch
+from dash.dependencies import Input, Output, State
 import dash_bootstrap_components as dbc
+from flask import jsonify, request
 import pandas as pd
-import geopandas as gpd
 import plotly.graph_objects as go
-import plotly.express as px
-from scipy.stats import pearsonr
-from sklearn.linear_model import LinearRegression
 import numpy as np
 
+from cache_datos import cargar_datos, DIRECTORIO_DATOS, TECNOLOGIAS
+from cache_figuras import CacheFiguras
+from carga_diferida import CargaDiferida
+from instrumentacion import Instrumentacion
+from proyecciones import proyectar_escenarios, proyeccion_a_dataframe, percentiles_kpi_monte_carlo
+from rangos_velocidad import TOTAL_PAIS
+
+# Los datos de cada pestaña (y las librerías pesadas: geopandas, shapely, plotly.express, scipy) se
+# cargan recién cuando se usan por primera vez y quedan memoizados. Con PRECARGA_DATOS=1 se
+# precargan en un hilo en segundo plano mientras el servidor ya acepta solicitudes.
+carga = CargaDiferida()
+
+tecnologias = TECNOLOGIAS
+
+# Generador sembrado para que las proyecciones sean reproducibles entre reinicios
+SEMILLA_PROYECCIONES = 2024
+
+# Cantidad de escenarios Monte Carlo para las bandas de confianza del KPI
+N_SIMULACIONES_KPI = 10_000
+
+
+@carga.cargador
+def datos():
+    from ingesta import bloqueo_datos
+
+    # Dataframes desde el cache columnar (se reconstruye solo si cambió algún archivo fuente); el lock
+    # compartido evita leer los CSV mientras otro worker escribe un trimestre
+    with bloqueo_datos(DIRECTORIO_DATOS, compartido=True):
+        return cargar_datos()
+
+
+@carga.cargador
+def datos_mapa():
+    from geometrias import ZOOM_INICIAL, construir_niveles, nivel_para_zoom
+
+    # GeoJSON cargado una sola vez: una geometría por provincia, sin duplicar por trimestre, en varios
+    # niveles de detalle (simplificado y cuantizado) que el mapa elige según el zoom
+    gdf = datos()["gdf"]
+    niveles_geometria = construir_niveles(gdf)
+
+    # Velocidad por periodo (filas) y provincia (columnas, en el orden de las geometrías), leída del panel
+    vel_media_mapa = datos()["panel"].serie("Mbps (Media de bajada)", fuente="velocidad")
+    vel_media_mapa = vel_media_mapa.set_axis(vel_media_mapa.columns.astype(str), axis=1).reindex(columns=gdf["Provincia"])
+    return {
+        "niveles_geometria": niveles_geometria,
+        "nivel_inicial": nivel_para_zoom(ZOOM_INICIAL, niveles_geometria),
+        "zoom_inicial": ZOOM_INICIAL,
+        "vel_media_mapa": vel_media_mapa,
+        "periodos_mapa": vel_media_mapa.index,
+        "vel_media_max": vel_media_mapa.max().max(),
+    }
+
+
+def construir_agregados_por_año(data, años=None):
+    """
+    Índice de agregados por año para el slider de "Relación con Tecnologías": velocidad media por
+    tecnología predominante y por provincia × tecnología. Con `años` solo se recalculan esos años,
+    de modo que al llegar datos nuevos basta con actualizar el diccionario con el año afectado.
+
+    Retorna:
+    dict año -> {"tecnologia": DataFrame, "provincia_tecnologia": DataFrame}
+    """
+    filtro = data if años is None else data[data["Año"].isin(años)]
+    por_tecnologia = (
+        filtro.groupby(["Año", "Tecnologia_Predominante"], observed=True)["Mbps (Media de bajada)"].mean()
+        .rename("Velocidad_Media_Mbps").reset_index()
+        .sort_values(["Año", "Velocidad_Media_Mbps"])
+    )
+    por_provincia = filtro.groupby(["Año", "Provincia", "Tecnologia_Predominante"], as_index=False, observed=True)["Mbps (Media de bajada)"].mean()
+
+    grupos_provincia = dict(tuple(por_provincia.groupby("Año")))
+    return {
+        int(año): {
+            "tecnologia": grupo.drop(columns="Año").reset_index(drop=True),
+            "provincia_tecnologia": grupos_provincia[año].drop(columns="Año").reset_index(drop=True),
+        }
+        for año, grupo in por_tecnologia.groupby("Año")
+    }
+
+
+def correlacion_velocidad_tecnologias(estadisticas):
+    # Pearson de la velocidad con la proporción de cada tecnología, desde los co-momentos de cada par
+    return pd.Series(
+        {columna: acumulador.correlacion("Mbps (Media de bajada)", columna) for columna, acumulador in estadisticas.items()},
+        name="Mbps (Media de bajada)",
+    ).sort_values()
+
+
+@carga.cargador
+def datos_tecnologias():
+    from estadisticas import EstadisticasIncrementales
+
+    # Agregados para "Relación con Tecnologías"
+    data = datos()["data"]
+    vel_media_tecnologia = data.groupby(["Tecnologia_Predominante", data["Fecha"].dt.year])["Mbps (Media de bajada)"].mean().reset_index()
+    # Un acumulador por par (velocidad, proporción) descarta los faltantes par a par, como DataFrame.corr,
+    # y al ingerir un trimestre se combina con las filas nuevas sin recorrer `data`
+    estadisticas_correlacion = {
+        f"prop_{tecnologia}": EstadisticasIncrementales.desde_dataframe(data, ["Mbps (Media de bajada)", f"prop_{tecnologia}"])
+        for tecnologia in tecnologias
+    }
+    return {
+        "vel_media_tecnologia": vel_media_tecnologia,
+        "estadisticas_correlacion": estadisticas_correlacion,
+        "correlacion_veloc_tecnologia": correlacion_velocidad_tecnologias(estadisticas_correlacion),
+        "agregados_por_año": construir_agregados_por_año(data),
+    }
+
+
+@carga.cargador
+def datos_analisis():
+    from correlaciones import MatrizCorrelaciones
+    from estadisticas import EstadisticasIncrementales
+
+    merged_data = datos()["merged_data"]
+    return {
+        # Estadísticas suficientes de la pestaña de análisis: al agregar un trimestre se actualizan con
+        # estadisticas_tab3.actualizar(filas_nuevas) sin reajustar nada
+        "estadisticas_tab3": EstadisticasIncrementales.desde_dataframe(
+            merged_data, ["Penetración_población", "Penetración_hogar", "Velocidad_media"]
+        ),
+        # Correlaciones móviles de todos los pares de métricas (provincia, fin de ventana, métrica, métrica),
+        # calculadas una vez: elegir otro par en el dashboard solo recorta el arreglo
+        "matriz_correlaciones": MatrizCorrelaciones.desde_datos(
+            datos()["data"], merged_data, datos()["acceso_rango_provincia"], tecnologias
+        ),
+    }
 
 
-# Cargar dataframes
-vel_media_provincia = pd.read_csv('./Datasets/vel_media_provincia.csv', parse_dates=['Fecha'])
-penetracion_hogar = pd.read_csv('./Datasets/penetracion_hogar.csv', parse_dates=['Fecha'])
-penetracion_poblac = pd.read_csv('./Datasets/penetracion_poblac.csv', parse_dates=['Fecha'])
-tecnologia_provincia = pd.read_csv('./Datasets/tecnologia_provincia.csv', parse_dates=['Fecha'])
+@carga.cargador
+def datos_crecimiento():
+    resumen_crecimiento = datos()["resumen_crecimiento"]
+    top_vel_media = resumen_crecimiento.nlargest(3, 'Tasa_de_crecimiento_vel_media')[['Provincia', 'Tasa_de_crecimiento_vel_media']]
+    top_penetracion_hogar = resumen_crecimiento.nlargest(3, 'Tasa_de_crecimiento_penetracion_hogar')[['Provincia', 'Tasa_de_crecimiento_penetracion_hogar']]
+    top_penetracion_poblac = resumen_crecimiento.nlargest(3, 'Tasa_de_crecimiento_penetracion_poblacion')[['Provincia', 'Tasa_de_crecimiento_penetracion_poblacion']]
 
-# Cargar GeoJSON y procesar datos
-geojson_path = './Mapas/map.geojson'
-gdf = gpd.read_file(geojson_path)
-gdf["Provincia"] = gdf["nombre"]
-gdf = gdf.merge(vel_media_provincia, on="Provincia", how="left")
+    return {
+        "Top_crecimeinto_velocidad (Mbps)": top_vel_media,
+        "Top_crecimiento_penetracion_hogar (%)": top_penetracion_hogar,
+        "Top_crecimiento_penetracion_poblacion (%)": top_penetracion_poblac
+    }
 
 
-# Integrar y procesar datos para "Relación con Tecnologías"
-data = pd.merge(tecnologia_provincia, vel_media_provincia, on=["Provincia", "Fecha"], how="inner")
-tecnologias = ["ADSL", "Cablemodem", "Fibra óptica", "Wireless", "Otros"]
-for tecnologia in tecnologias:
-    data[f"prop_{tecnologia}"] = data[tecnologia] / data["Total"]
-data["Tecnologia_Predominante"] = data[tecnologias].idxmax(axis=1)
+@carga.cargador
+def datos_kpi():
+    penetracion_hogar = datos()["penetracion_hogar"]
+    vel_media_provincia = datos()["vel_media_provincia"]
+    rng_proyecciones = np.random.default_rng(SEMILLA_PROYECCIONES)
 
+    # Tomar los datos de penetracion hogar del ultimo trimestre 2023 y primero 2024
+    penetracion_hogar_T4_2023 = penetracion_hogar[(penetracion_hogar['Fecha'].dt.year == 2023)&(penetracion_hogar['Fecha'].dt.month == 10)].copy()
+    penetracion_hogar_T1_2024 = penetracion_hogar[(penetracion_hogar['Fecha'].dt.year == 2024)&(penetracion_hogar['Fecha'].dt.month == 1)].copy()
 
-vel_media_tecnologia = data.groupby(["Tecnologia_Predominante", data["Fecha"].dt.year])["Mbps (Media de bajada)"].mean().reset_index()
-correlacion_tecnologias = data[["Mbps (Media de bajada)"] + [f"prop_{tecnologia}" for tecnologia in tecnologias]].corr()
-correlacion_veloc_tecnologia = correlacion_tecnologias.loc["Mbps (Media de bajada)", [f"prop_{tecnologia}" for tecnologia in tecnologias]].sort_values()
-tend_tecnol = data.groupby("Fecha")[tecnologias].sum()
-tendencia = tend_tecnol.div(tend_tecnol.sum(axis=1), axis=0).reset_index()
+    #Generacion de Data
+    Trimestres_2024 = ["2024-01-01", "2024-04-01", "2024-07-01", "2024-10-01"]
+    crecimiento_estimado = [2, 4, 6, 8]
 
-data['Año'] = data['Fecha'].dt.year
+    # Todas las provincias y trimestres se proyectan en una sola operación vectorizada (variación aleatoria de +/- 8%)
+    penetracion_estimada, penetracion_simulada = proyectar_escenarios(
+        penetracion_hogar_T4_2023['Accesos por cada 100 hogares'], crecimiento_estimado, 0.08, rng=rng_proyecciones
+    )
+    penetracion_hogar_proyectado = proyeccion_a_dataframe(
+        penetracion_hogar_T4_2023['Provincia'], Trimestres_2024, penetracion_estimada, penetracion_simulada[0]
+    )
 
-# Merge de datasets para análisis estadístico
-merged_data = pd.merge(penetracion_hogar, penetracion_poblac, on=["Provincia", "Fecha"], how="inner")
-merged_data = pd.merge(merged_data, tecnologia_provincia, on=["Provincia", "Fecha"], how="inner")
-merged_data = pd.merge(merged_data, vel_media_provincia, on=["Provincia", "Fecha"], how="inner")
-merged_data.rename(columns={
-    "Accesos por cada 100 hogares": "Penetración_hogar",
-    "Accesos por cada 100 hab": "Penetración_población",
-    "Mbps (Media de bajada)": "Velocidad_media"
-}, inplace=True)
+    # Bandas p5-p95 del KPI promedio nacional; el primer trimestre de 2024 usa el dato real en todos los escenarios
+    penetracion_fijos = np.full(penetracion_estimada.shape, np.nan)
+    penetracion_fijos[:, 0] = penetracion_hogar_T4_2023['Provincia'].map(
+        penetracion_hogar_T1_2024.set_index('Provincia')['Accesos por cada 100 hogares']).to_numpy()
+    bandas = percentiles_kpi_monte_carlo(
+        penetracion_hogar_T4_2023['Accesos por cada 100 hogares'], crecimiento_estimado, 0.08, N_SIMULACIONES_KPI,
+        reducir=lambda kpi: kpi.mean(axis=1), fijos=penetracion_fijos, rng=rng_proyecciones
+    )
+    kpi_bandas = pd.DataFrame({'Fecha': pd.to_datetime(Trimestres_2024), 'p5': bandas['p5'], 'p50': bandas['p50'], 'p95': bandas['p95']})
 
-vel_media_provincia = vel_media_provincia.sort_values(by=['Provincia', 'Fecha'])
-penetracion_hogar = penetracion_hogar.sort_values(by=['Provincia', 'Fecha'])
-penetracion_poblac = penetracion_poblac.sort_values(by=['Provincia', 'Fecha'])
+    penetracion_hogar_proyectado = penetracion_hogar_proyectado.sort_values(by=['Provincia', 'Fecha'], ascending=[True, False]).reset_index(drop=True)
 
+    penetracion_hogar_estimado = penetracion_hogar_proyectado[['Provincia', 'Fecha', 'Estimado']].copy()
+    penetracion_hogar_simulado = penetracion_hogar_proyectado[['Provincia', 'Fecha', 'Simulado']].copy()
 
-vel_media_provincia["Tasa_de_crecimiento_vel_media"] = vel_media_provincia.groupby("Provincia")["Mbps (Media de bajada)"].pct_change() * 100
-penetracion_hogar["Tasa_de_crecimiento_penetracion_hogar"] = penetracion_hogar.groupby("Provincia")["Accesos por cada 100 hogares"].pct_change() * 100
-penetracion_poblac["Tasa_de_crecimiento_penetracion_poblacion"] = penetracion_poblac.groupby("Provincia")["Accesos por cada 100 hab"].pct_change() * 100
+    correccion = penetracion_hogar_simulado.copy()
+    correccion.loc[correccion['Fecha'] == '2024-01-01', 'Simulado'] = correccion.loc[correccion['Fecha'] == '2024-01-01', 'Provincia'].map(penetracion_hogar_T1_2024.set_index('Provincia')['Accesos por cada 100 hogares'])
+    penetracion_hogar_simulado = correccion
 
 
-crecimiento_vel_media = vel_media_provincia.groupby("Provincia")["Tasa_de_crecimiento_vel_media"].mean().reset_index()
-crecimiento_penetracion_hogar = penetracion_hogar.groupby("Provincia")["Tasa_de_crecimiento_penetracion_hogar"].mean().reset_index()
-crecimiento_penetracion_poblac = penetracion_poblac.groupby("Provincia")["Tasa_de_crecimiento_penetracion_poblacion"].mean().reset_index()
+    penetracion_hogar_proyectado['KPI'] = pd.DataFrame({
+        'KPI': ((penetracion_hogar_simulado['Simulado'] - penetracion_hogar_estimado['Estimado']) / 
+                penetracion_hogar_estimado['Estimado']) * 100
+    })
 
-resumen_crecimiento = crecimiento_vel_media.merge(crecimiento_penetracion_hogar, on="Provincia").merge(crecimiento_penetracion_poblac, on="Provincia")
+    kpi_mean = penetracion_hogar_proyectado.groupby('Fecha')['KPI'].mean().reset_index()
 
+    penetracion_hogar_estimado_mean = penetracion_hogar_estimado.groupby('Fecha')['Estimado'].mean().reset_index()
+    penetracion_hogar_simulado_mean = penetracion_hogar_simulado.groupby('Fecha')['Simulado'].mean().reset_index()
 
-top_vel_media = resumen_crecimiento.nlargest(3, 'Tasa_de_crecimiento_vel_media')[['Provincia', 'Tasa_de_crecimiento_vel_media']]
-top_penetracion_hogar = resumen_crecimiento.nlargest(3, 'Tasa_de_crecimiento_penetracion_hogar')[['Provincia', 'Tasa_de_crecimiento_penetracion_hogar']]
-top_penetracion_poblac = resumen_crecimiento.nlargest(3, 'Tasa_de_crecimiento_penetracion_poblacion')[['Provincia', 'Tasa_de_crecimiento_penetracion_poblacion']]
 
-top_crecimiento = {
-    "Top_crecimeinto_velocidad (Mbps)": top_vel_media,
-    "Top_crecimiento_penetracion_hogar (%)": top_penetracion_hogar,
-    "Top_crecimiento_penetracion_poblacion (%)": top_penetracion_poblac
-}
+    penetracion_hogar_simulado_mean.rename(columns={'Simulado': 'Real'}, inplace=True)
 
-# Tomar los datos de penetracion hogar del ultimo trimestre 2023 y primero 2024
-penetracion_hogar_T4_2023 = penetracion_hogar[(penetracion_hogar['Fecha'].dt.year == 2023)&(penetracion_hogar['Fecha'].dt.month == 10)].copy()
-penetracion_hogar_T1_2024 = penetracion_hogar[(penetracion_hogar['Fecha'].dt.year == 2024)&(penetracion_hogar['Fecha'].dt.month == 1)].copy()
+    ultimo_trimestre_2023 = vel_media_provincia[(vel_media_provincia['Fecha'].dt.year == 2023) &
+                                                (vel_media_provincia['Fecha'].dt.month >= 10)]
 
-#Generacion de Data
-Trimestres_2024 = ["2024-01-01", "2024-04-01", "2024-07-01", "2024-10-01"]
-crecimiento_estimado = [2, 4, 6, 8]
+    # Ordenar por velocidad promedio en orden ascendente y tomar las dos provincias con menor velocidad
+    provincias_menor_velocidad = ultimo_trimestre_2023.nsmallest(2, 'Mbps (Media de bajada)')
 
-datos_proyectados = []
-for index, row in penetracion_hogar_T4_2023.iterrows():
-    penetracion_hogar_2023 = row['Accesos por cada 100 hogares']
-    for i, trimestre in enumerate(Trimestres_2024):
-        penetracion_hogar_estimada = penetracion_hogar_2023 * (1 + crecimiento_estimado[i] / 100)
-        penetracion_hogar_simulada = penetracion_hogar_estimada * (1 + np.random.uniform(-0.08, 0.08))  # Random variation of +/- 8%
-        datos_proyectados.append({
-            'Provincia': row['Provincia'],
-            'Fecha': pd.to_datetime(trimestre),
-            'Estimado': penetracion_hogar_estimada,
-            'Simulado': penetracion_hogar_simulada
-        })
 
-penetracion_hogar_proyectado = pd.DataFrame(datos_proyectados)
-penetracion_hogar_proyectado = penetracion_hogar_proyectado.sort_values(by=['Provincia', 'Fecha'], ascending=[True, False]).reset_index(drop=True)
+    #Generacion de Data
+    crecimiento_estimado = [10, 20 , 30, 40]
 
-penetracion_hogar_estimado = penetracion_hogar_proyectado[['Provincia', 'Fecha', 'Estimado']].copy()
-penetracion_hogar_simulado = penetracion_hogar_proyectado[['Provincia', 'Fecha', 'Simulado']].copy()
+    # Proyección vectorizada para las provincias con menor velocidad (variación aleatoria de +/- 10%)
+    velocidad_estimada, velocidad_simulada = proyectar_escenarios(
+        provincias_menor_velocidad['Mbps (Media de bajada)'], crecimiento_estimado, 0.10, rng=rng_proyecciones
+    )
+    velocidad_media_proyectado = proyeccion_a_dataframe(
+        provincias_menor_velocidad['Provincia'], Trimestres_2024, velocidad_estimada, velocidad_simulada[0]
+    )
 
-penetracion_hogar_T4_2023.rename(columns={'Accesos por cada 100 hogares': 'Estimado'}, inplace=True)
-penetracion_hogar_T4_2023 = penetracion_hogar_T4_2023.sort_values(by=['Provincia', 'Fecha'], ascending=[True, False]).reset_index(drop=True)
+    velocidad_media_proyectado['KPI'] = ((velocidad_media_proyectado['Simulado'] - velocidad_media_proyectado['Estimado']) /
+                                         velocidad_media_proyectado['Estimado']) * 100
 
-correccion = penetracion_hogar_simulado.copy()
-correccion.loc[correccion['Fecha'] == '2024-01-01', 'Simulado'] = correccion.loc[correccion['Fecha'] == '2024-01-01', 'Provincia'].map(penetracion_hogar_T1_2024.set_index('Provincia')['Accesos por cada 100 hogares'])
-penetracion_hogar_simulado = correccion
 
+    kpi_mean_provincia = velocidad_media_proyectado.groupby(['Provincia', 'Fecha'])['KPI'].mean().reset_index()
 
-penetracion_hogar_proyectado['KPI'] = pd.DataFrame({
-    'KPI': ((penetracion_hogar_simulado['Simulado'] - penetracion_hogar_estimado['Estimado']) / 
-            penetracion_hogar_estimado['Estimado']) * 100
-})
+    # Bandas p5-p95 del KPI de velocidad por provincia y trimestre
+    bandas = percentiles_kpi_monte_carlo(
+        provincias_menor_velocidad['Mbps (Media de bajada)'], crecimiento_estimado, 0.10, N_SIMULACIONES_KPI,
+        rng=rng_proyecciones
+    )
+    kpi_bandas_provincia = pd.DataFrame({
+        'Provincia': np.repeat(provincias_menor_velocidad['Provincia'].to_numpy(), len(Trimestres_2024)),
+        'Fecha': np.tile(pd.to_datetime(Trimestres_2024).to_numpy(), len(provincias_menor_velocidad)),
+        'p5': bandas['p5'].ravel(),
+        'p50': bandas['p50'].ravel(),
+        'p95': bandas['p95'].ravel(),
+    })
+
+    return {
+        "kpi_mean": kpi_mean,
+        "kpi_bandas": kpi_bandas,
+        "penetracion_hogar_estimado_mean": penetracion_hogar_estimado_mean,
+        "penetracion_hogar_simulado_mean": penetracion_hogar_simulado_mean,
+        "velocidad_media_proyectado": velocidad_media_proyectado,
+        "kpi_mean_provincia": kpi_mean_provincia,
+        "kpi_bandas_provincia": kpi_bandas_provincia,
+    }
+
+
+@carga.cargador
+def datos_rangos():
+    from rangos_velocidad import DistribucionRangos
+
+    # Distribuciones acumuladas, medianas y migraciones de todas las provincias y periodos, calculadas
+    # una vez: la pestaña solo recorta los arreglos
+    return DistribucionRangos.desde_datos(
+        datos()["acceso_rango_provincia"],
+        limite_superior=float(os.environ.get("LIMITE_SUPERIOR_RANGOS_MBPS", "100"))
+    )
 
-kpi_mean = penetracion_hogar_proyectado.groupby('Fecha')['KPI'].mean().reset_index()
 
-penetracion_hogar_estimado_mean = penetracion_hogar_estimado.groupby('Fecha')['Estimado'].mean().reset_index()
-penetracion_hogar_simulado_mean = penetracion_hogar_simulado.groupby('Fecha')['Simulado'].mean().reset_index()
+@carga.cargador
+def estado_ingesta():
+    from ingesta import EstadoIncremental
 
+    return EstadoIncremental(datos())
 
-penetracion_hogar_simulado_mean.rename(columns={'Simulado': 'Real'}, inplace=True)
 
-ultimo_trimestre_2023 = vel_media_provincia[(vel_media_provincia['Fecha'].dt.year == 2023) &
-                                            (vel_media_provincia['Fecha'].dt.month >= 10)]
+# Una ingesta a la vez: cada trimestre se calcula contra el último valor de cada provincia
+lock_ingesta = threading.Lock()
 
-# Ordenar por velocidad promedio en orden ascendente y tomar las dos provincias con menor velocidad
-provincias_menor_velocidad = ultimo_trimestre_2023.nsmallest(2, 'Mbps (Media de bajada)')
+# Marca del registro de ingestas cuyos trimestres ya tiene este proceso (ver sincronizar_ingestas)
+marca_ingestas = {"aplicada": None}
 
 
-#Generacion de Data
-Trimestres_2024 = ["2024-01-01", "2024-04-01", "2024-07-01", "2024-10-01"]
-crecimiento_estimado = [10, 20 , 30, 40]
+def aplicar_trimestre(fecha, filas):
+    """
+    Agrega un trimestre a los datos en memoria de este proceso sin recalcular todo: los agregados se
+    actualizan de forma incremental y se invalidan las figuras que dependen del periodo nuevo. Se
+    llama con lock_ingesta tomado.
 
-datos_proyectados = []
-for index, row in provincias_menor_velocidad.iterrows():
-    velocida_media_2023 = row['Mbps (Media de bajada)']
-    for i, trimestre in enumerate(Trimestres_2024):
-        velocidad_media_estimada = velocida_media_2023 * (1 + crecimiento_estimado[i] / 100)
-        velocidad_media_simulada = velocidad_media_estimada * (1 + np.random.uniform(-0.10, 0.10))  # Random variation of +/- 10%
-        datos_proyectados.append({
-            'Provincia': row['Provincia'],
-            'Fecha': pd.to_datetime(trimestre),
-            'Estimado': velocidad_media_estimada,
-            'Simulado': velocidad_media_simulada
-             })
-        
+    Parámetros:
+    fecha: primer día del trimestre nuevo.
+    filas (pd.DataFrame): una fila por provincia (ver ingesta.agregar_trimestre).
 
-velocidad_media_proyectado = pd.DataFrame(datos_proyectados)
+    Retorna:
+    dict con el año del trimestre y la cantidad de figuras invalidadas.
+    """
+    # Se espera a los cargadores que otra solicitud esté calculando y no empieza ninguno hasta
+    # reemplazar los resultados: así ninguno guarda después un resultado calculado con los datos sin
+    # el trimestre nuevo. Los que no están cargados no se ejecutan; leerán los datos nuevos
+    with carga.en_pausa():
+        return _aplicar_trimestre(fecha, filas)
 
-velocidad_media_estimado = penetracion_hogar_proyectado[['Provincia', 'Fecha', 'Estimado']].copy()
-velocidad_media_simulado = penetracion_hogar_proyectado[['Provincia', 'Fecha', 'Simulado']].copy()
 
+def _aplicar_trimestre(fecha, filas):
+    from ingesta import agregar_trimestre
 
-velocidad_media_proyectado['KPI'] = pd.DataFrame({
-    'KPI': ((velocidad_media_simulado['Simulado'] - velocidad_media_estimado['Estimado']) / 
-            velocidad_media_estimado['Estimado']) * 100
-})
+    resultado = agregar_trimestre(datos(), estado_ingesta(), fecha, filas)
+    año = resultado["año"]
+    nuevos_datos = resultado["datos"]
 
+    # Cada resultado ya cargado se reemplaza por un objeto nuevo en una sola asignación: las
+    # solicitudes en curso leen sin lock y ven el anterior completo o el nuevo, nunca uno a medias
+    carga.reemplazar("datos", nuevos_datos)
+    carga.reemplazar("estado_ingesta", resultado["estado"])
+    if carga.cargado("datos_tecnologias"):
+        anteriores = datos_tecnologias()
+        estadisticas_correlacion = {
+            columna: acumulador.con_lote(resultado["filas_data"].reindex(columns=acumulador.columnas))
+            for columna, acumulador in anteriores["estadisticas_correlacion"].items()
+        }
+        carga.reemplazar("datos_tecnologias", {
+            "vel_media_tecnologia": resultado["vel_media_tecnologia"],
+            "estadisticas_correlacion": estadisticas_correlacion,
+            "correlacion_veloc_tecnologia": correlacion_velocidad_tecnologias(estadisticas_correlacion),
+            "agregados_por_año": {
+                **anteriores["agregados_por_año"], **construir_agregados_por_año(nuevos_datos["data"], años=[año])
+            },
+        })
+    if carga.cargado("datos_crecimiento"):
+        carga.reemplazar("datos_crecimiento", {**datos_crecimiento(), **resultado["top_crecimiento"]})
+    if carga.cargado("datos_analisis"):
+        from correlaciones import tabla_metricas
+
+        analisis = datos_analisis()
+        estadisticas_tab3 = analisis["estadisticas_tab3"]
+        matriz_correlaciones = analisis["matriz_correlaciones"]
+        # Solo se calcula la ventana móvil que termina en el periodo nuevo; sin todas las fuentes
+        # el periodo no entra en la matriz
+        if len(resultado["filas_merged"]) and len(resultado["filas_rangos"]):
+            matriz_correlaciones = matriz_correlaciones.extender(tabla_metricas(
+                resultado["filas_data"], resultado["filas_merged"], resultado["filas_rangos"], tecnologias
+            ))
+        carga.reemplazar("datos_analisis", {
+            "estadisticas_tab3": estadisticas_tab3.con_lote(resultado["filas_merged"].reindex(columns=estadisticas_tab3.columnas)),
+            "matriz_correlaciones": matriz_correlaciones,
+        })
+    if carga.cargado("datos_mapa"):
+        mapa = datos_mapa()
+        velocidad = nuevos_datos["panel"].serie("Mbps (Media de bajada)", fuente="velocidad")
+        fila = velocidad.loc[velocidad.index == pd.Timestamp(fecha)]
+        fila = fila.set_axis(fila.columns.astype(str), axis=1).reindex(columns=mapa["vel_media_mapa"].columns)
+        vel_media_mapa = pd.concat([mapa["vel_media_mapa"], fila])
+        carga.reemplazar("datos_mapa", {
+            **mapa,
+            "vel_media_mapa": vel_media_mapa,
+            "periodos_mapa": vel_media_mapa.index,
+            "vel_media_max": max(mapa["vel_media_max"], fila.max().max()) if len(fila) else mapa["vel_media_max"],
+        })
+        crear_mapa_interactivo.cache_clear()
+    if len(resultado["filas_rangos"]):
+        # Las distribuciones por rango se vuelven a calcular al pedirlas
+        carga.invalidar("datos_rangos")
+
+    # La pestaña KPI usa periodos fijos (2023-2024) y no se invalida
+    invalidadas = (
+        cache_figuras.invalidar("update_content", ("tab1",))
+        + cache_figuras.invalidar("update_content", ("tab2",))
+        + cache_figuras.invalidar("update_graficos_velocidad_y_tecnologia", (año,))
+        + cache_figuras.invalidar("update_analisis_estadistico")
+        + cache_figuras.invalidar("update_heatmap_correlaciones")
+        + cache_figuras.invalidar("update_tab4_content")
+        + (cache_figuras.invalidar("update_content", ("tab6",)) + cache_figuras.invalidar("update_rangos_velocidad")
+           if len(resultado["filas_rangos"]) else 0)
+    )
+    return {"año": año, "figuras_invalidadas": invalidadas}
+
+
+def aplicar_registro(registro):
+    """
+    Aplica en memoria los trimestres del registro de ingestas posteriores al último periodo cargado
+    (los que ingirió otro worker). Se llama con lock_ingesta tomado.
+
+    Retorna:
+    cantidad de trimestres aplicados.
+    """
+    aplicados = 0
+    for trimestre in registro["trimestres"]:
+        if pd.Timestamp(trimestre["fecha"]) > datos()["panel"].fechas[-1]:
+            aplicar_trimestre(trimestre["fecha"], pd.DataFrame(trimestre["filas"]))
+            aplicados += 1
+    return aplicados
+
+
+def sincronizar_ingestas():
+    # Con varios workers, cada uno compara la marca del registro (un stat) antes de cada solicitud y
+    # aplica los trimestres que ingirió otro. Mientras los datos no se cargaron no hace falta: la
+    # carga lee los CSV, que ya traen todo lo ingerido
+    from ingesta import bloqueo_datos, leer_registro, marca_registro
+
+    if not carga.cargado("datos") or marca_registro(DIRECTORIO_DATOS) == marca_ingestas["aplicada"]:
+        return
+    with lock_ingesta:
+        with bloqueo_datos(DIRECTORIO_DATOS, compartido=True):
+            marca = marca_registro(DIRECTORIO_DATOS)
+            registro = leer_registro(DIRECTORIO_DATOS)
+        if marca != marca_ingestas["aplicada"]:
+            aplicar_registro(registro)
+            marca_ingestas["aplicada"] = marca
+
+
+def ingestar_trimestre(fecha, filas):
+    """
+    Ingiere un trimestre: lo valida y lo escribe en los CSV y en el registro de ingestas (los demás
+    workers lo aplican en su próxima solicitud y al reiniciar se lee de los CSV) y lo aplica en
+    memoria con aplicar_trimestre.
+
+    Retorna:
+    dict con el año del trimestre, la cantidad de figuras invalidadas y la versión del registro.
+    """
+    from ingesta import bloqueo_datos, leer_registro, persistir_trimestre
+
+    # Los datos se cargan antes del lock exclusivo: la carga toma el lock compartido sobre los CSV
+    datos()
+    with lock_ingesta, bloqueo_datos(DIRECTORIO_DATOS):
+        # Primero los trimestres que otro worker haya ingerido, para validar contra el último periodo
+        aplicar_registro(leer_registro(DIRECTORIO_DATOS))
+        version = persistir_trimestre(DIRECTORIO_DATOS, fecha, filas)
+        resultado = aplicar_trimestre(fecha, filas)
+    return dict(resultado, version=version)
+
+
+def agregar_banda(fig, bandas, nombre, color="#636efa", grupo=None):
+    # Banda p5-p95 sombreada y mediana punteada de las simulaciones Monte Carlo
+    from plotly.colors import hex_to_rgb
+
+    relleno = "rgba({}, {}, {}, 0.2)".format(*hex_to_rgb(color)) if color.startswith("#") else color
+    fig.add_trace(go.Scatter(
+        x=bandas["Fecha"], y=bandas["p95"], mode="lines", line=dict(width=0),
+        legendgroup=grupo, showlegend=False, hoverinfo="skip"
+    ))
+    fig.add_trace(go.Scatter(
+        x=bandas["Fecha"], y=bandas["p5"], mode="lines", line=dict(width=0),
+        fill="tonexty", fillcolor=relleno, legendgroup=grupo,
+        name=f"{nombre} p5-p95", hoverinfo="skip"
+    ))
+    fig.add_trace(go.Scatter(
+        x=bandas["Fecha"], y=bandas["p50"], mode="lines", line=dict(color=color, dash="dot"),
+        legendgroup=grupo, name=f"{nombre} mediana"
+    ))
 
-kpi_mean_provincia = velocidad_media_proyectado.groupby(['Provincia', 'Fecha'])['KPI'].mean().reset_index()
 
 
+def crear_grafico_kpi_penetracion(kpi_mean, kpi_bandas=None):
+    import plotly.express as px
 
-def crear_grafico_kpi_penetracion(kpi_mean):
     fig = px.line(
         kpi_mean, 
         x="Fecha", 
@@ -175,6 +461,8 @@ def crear_grafico_kpi_penetracion(kpi_mean):
         title="Comportamiento del KPI en el Tiempo", 
         labels={"KPI": "KPI (%)", "Fecha": "Fecha"}
     )
+    if kpi_bandas is not None:
+        agregar_banda(fig, kpi_bandas, f"{N_SIMULACIONES_KPI:,} simulaciones")
     fig.add_hline(
         y=2, 
         line_dash="dash", 
@@ -190,6 +478,8 @@ def crear_grafico_kpi_penetracion(kpi_mean):
     return fig
 
 def crear_grafico_tendencia_penetracion(penetracion_hogar_estimado_mean, penetracion_hogar_simulado_mean):
+    import plotly.express as px
+
     penetracion_hogar_estimado_mean = penetracion_hogar_estimado_mean.merge(penetracion_hogar_simulado_mean)
 
     fig = px.line(
@@ -222,7 +512,9 @@ def crear_grafico_tendencia_penetracion(penetracion_hogar_estimado_mean, penetra
 )
     return fig
 
-def crear_grafico_kpi_velocidad(kpi_mean_provincia):
+def crear_grafico_kpi_velocidad(kpi_mean_provincia, kpi_bandas_provincia=None):
+    import plotly.express as px
+
     fig = px.line(
         kpi_mean_provincia,
         x="Fecha",
@@ -231,6 +523,10 @@ def crear_grafico_kpi_velocidad(kpi_mean_provincia):
         title="Tendencia del KPI por Provincia",
         labels={"KPI": "KPI (%)", "Fecha": "Fecha"}
     )
+    if kpi_bandas_provincia is not None:
+        colores = {traza.name: traza.line.color for traza in fig.data}
+        for provincia, bandas_provincia in kpi_bandas_provincia.groupby("Provincia", sort=False):
+            agregar_banda(fig, bandas_provincia, provincia, colores.get(provincia, "#636efa"), grupo=provincia)
     fig.add_hline(
         y=0, 
         line_dash="dash", 
@@ -246,6 +542,8 @@ def crear_grafico_kpi_velocidad(kpi_mean_provincia):
     return fig
 
 def crear_grafico_tendencia_velocidad(provincia_data):
+    import plotly.express as px
+
     fig = px.line(
         provincia_data,
         x="Fecha",
@@ -261,27 +559,36 @@ def crear_grafico_tendencia_velocidad(provincia_data):
     return fig
 
 # Crear el mapa interactivo
-def crear_mapa_interactivo():
+@lru_cache(maxsize=None)
+def crear_mapa_interactivo(periodo=None):
+    mapa = datos_mapa()
+    vel_media_max = mapa["vel_media_max"]
+    # Por defecto se muestra el último trimestre disponible
+    periodo = mapa["periodos_mapa"][-1] if periodo is None else pd.Timestamp(periodo)
+    valores = mapa["vel_media_mapa"].loc[periodo]
+
     fig_mapa = go.Figure()
 
     fig_mapa.add_trace(go.Choroplethmapbox(
-        geojson=gdf.__geo_interface__,
-        locations=gdf.index,
-        z=gdf["Mbps (Media de bajada)"],
+        geojson=mapa["niveles_geometria"][mapa["nivel_inicial"]]["geojson"],
+        featureidkey="properties.Provincia",
+        locations=valores.index,
+        z=valores.round(2).values,
         colorscale='Blues',
         zmin=0,
-        zmax=gdf["Mbps (Media de bajada)"].max(),
+        zmax=vel_media_max,
         marker_opacity=0.7,
         marker_line_width=0.5,
         marker_line_color='black',
-        hoverinfo='text',
-        text=gdf['Provincia'] + ': ' + gdf["Mbps (Media de bajada)"].astype(str) + ' Mbps',
-        hovertemplate='<b>Provincia:</b> %{text}<extra></extra>'
+        # El texto del hover se arma en el navegador con la provincia y el valor, sin enviar una
+        # lista de textos por periodo
+        hovertemplate='<b>Provincia:</b> %{location}: %{z:.2f} Mbps<extra></extra>'
     ))
 
     fig_mapa.update_layout(
         mapbox_style="carto-positron",
-        mapbox_zoom=3,
+        mapbox_zoom=mapa["zoom_inicial"],
+        uirevision="mapa",  # Conserva el zoom y el encuadre del usuario al aplicar Patch
         mapbox_center={"lat": -38.4161, "lon": -63.6167},
         title_text='Velocidad Media de Internet por Provincia',
         margin={"r": 0, "t": 0, "l": 0, "b": 0},
@@ -294,13 +601,16 @@ def crear_mapa_interactivo():
         ),
         coloraxis_colorbar=dict(
             title="Mbps",  # Título de la barra de colores
-            tickvals=[0, gdf["Mbps (Media de bajada)"].max() / 2, gdf["Mbps (Media de bajada)"].max()],
+            tickvals=[0, vel_media_max / 2, vel_media_max],
             ticktext=["Bajo", "Medio", "Alto"]  # Etiquetas de los ticks
         )
     )
     return fig_mapa
 # Crear gráficos iniciales
 def crear_grafico_tendencia_inicial():
+    import plotly.express as px
+
+    vel_media_provincia = datos()["vel_media_provincia"]
     promedio_nacional = vel_media_provincia.groupby("Fecha")["Mbps (Media de bajada)"].mean().reset_index()
     fig = px.line(
         promedio_nacional,
@@ -311,8 +621,49 @@ def crear_grafico_tendencia_inicial():
     )
     return fig
 
+def ajustar_layout_tab1(fig, titulo=None, tamano_fuente=12):
+    titulo_layout = {
+        "x": 0.5,  # Centrado horizontalmente
+        "xanchor": "center",  # Anclaje horizontal centrado
+        "yanchor": "top"  # Anclaje vertical superior
+    }
+    if titulo is not None:
+        titulo_layout["text"] = titulo
+    fig.update_layout(
+        title=titulo_layout,
+        margin={
+        "l": 5,  # Margen izquierdo mínimo
+        "r": 5,  # Margen derecho mínimo
+        "t": 40,  # Espacio suficiente para el título
+        "b": 5   # Margen inferior mínimo
+        },
+        font=dict(size=tamano_fuente),  # Ajustar tamaño de fuente
+        legend=dict(yanchor="top", y=0.99, xanchor="left", x=0.01),  # Ajustar la posición de la leyenda
+        height=None,  # Dinámico según el contenedor
+        width=None    # Dinámico según el contenedor
+    )
+    return fig
+
+def series_provincias():
+    """
+    Series de velocidad media por provincia para el dcc.Store del hover: las fechas se envían una
+    sola vez y cada provincia (y el promedio nacional) es solo una lista de valores.
+    """
+    vel_media_mapa = datos_mapa()["vel_media_mapa"]
+
+    def valores(serie):
+        return [None if pd.isna(valor) else round(float(valor), 2) for valor in serie]
+
+    return {
+        "fechas": [fecha.strftime("%Y-%m-%d") for fecha in vel_media_mapa.index],
+        "nacional": valores(vel_media_mapa.mean(axis=1)),
+        "provincias": {provincia: valores(vel_media_mapa[provincia]) for provincia in vel_media_mapa.columns},
+    }
+
 def crear_grafico_crecimiento_inicial():
-    vel_media_provincial = vel_media_provincia.pivot(index="Fecha", columns="Provincia", values="Mbps (Media de bajada)")
+    import plotly.express as px
+
+    vel_media_provincial = datos()["panel"].serie("Mbps (Media de bajada)", fuente="velocidad")
     vel_media_crecimiento = vel_media_provincial.pct_change().mean() * 100
     vel_media_crecimiento_sorted = vel_media_crecimiento.sort_values(ascending=False)
     fig = px.bar(
@@ -325,13 +676,14 @@ def crear_grafico_crecimiento_inicial():
     return fig
 # Crear gráficos iniciales para "Relación con Tecnologías"
 def crear_grafico_velocidad_tecnologia(year):
+    import plotly.express as px
 
-    
-    filtro = data[data['Año'] == year]
+    agregados = datos_tecnologias()["agregados_por_año"].get(year)
+    # Un año sin datos da un gráfico vacío
     vel_media_tecnologia_año = (
-    filtro.groupby("Tecnologia_Predominante")["Mbps (Media de bajada)"].mean().sort_values(ascending=True).reset_index())
-    vel_media_tecnologia_año.columns = ["Tecnologia_Predominante", "Velocidad_Media_Mbps"]
-   
+        pd.DataFrame(columns=["Tecnologia_Predominante", "Velocidad_Media_Mbps"]) if agregados is None else agregados["tecnologia"]
+    )
+
 
     fig = px.bar(
         vel_media_tecnologia_año,
@@ -356,6 +708,9 @@ def crear_grafico_velocidad_tecnologia(year):
     return fig
 
 def crear_grafico_correlacion():
+    import plotly.express as px
+
+    correlacion_veloc_tecnologia = datos_tecnologias()["correlacion_veloc_tecnologia"]
     fig = px.bar(
         correlacion_veloc_tecnologia,
         x=correlacion_veloc_tecnologia.values,
@@ -375,8 +730,10 @@ def crear_grafico_correlacion():
     return fig
 
 def crear_grafico_tendencia_tecnologias():
+    import plotly.express as px
+
     fig = px.line(
-        tendencia,
+        datos()["tendencia"],
         x="Fecha",
         y=tecnologias,
         title="Evolución del Uso de Tecnologías",
@@ -392,9 +749,14 @@ def crear_grafico_tendencia_tecnologias():
     return fig
 
 def crear_mapa_tendencias_provincias(year):
-    filtro = data[data['Fecha'].dt.year == year]
-      # Calcular el promedio de Mbps (Media de bajada) por provincia y tecnología predominante
-    promedio_data = filtro.groupby(["Provincia", "Tecnologia_Predominante"], as_index=False)["Mbps (Media de bajada)"].mean()
+    import plotly.express as px
+
+    # Promedio de Mbps (Media de bajada) por provincia y tecnología predominante, ya agregado por año
+    agregados = datos_tecnologias()["agregados_por_año"].get(year)
+    promedio_data = (
+        pd.DataFrame(columns=["Provincia", "Tecnologia_Predominante", "Mbps (Media de bajada)"]) if agregados is None
+        else agregados["provincia_tecnologia"]
+    )
     
     # Crear el gráfico interactivo con Plotly
     fig = px.bar(
@@ -422,8 +784,57 @@ def crear_mapa_tendencias_provincias(year):
 
 
 # Inicializar la app
-app = dash.Dash(__name__, external_stylesheets=[dbc.themes.CYBORG], suppress_callback_exceptions=True)
+# compress=True comprime las respuestas con flask-compress (brotli si el navegador lo acepta, si no gzip)
+app = dash.Dash(__name__, external_stylesheets=[dbc.themes.CYBORG], suppress_callback_exceptions=True, compress=True)
 app.title = "Análisis de Acceso a Internet en Argentina"
+# Objeto WSGI para servidores de producción (gunicorn wsgi:server)
+server = app.server
+
+# Los datos son fijos una vez cargado el módulo: los resultados de los callbacks se memoizan
+# por (callback, entrada) y un cambio de pestaña cuesta una búsqueda en el cache
+cache_figuras = CacheFiguras(max_entradas=128)
+
+# Tiempos por etapa, bytes de respuesta y aciertos del cache de cada callback en /metrics (formato
+# Prometheus, solo desde localhost salvo METRICAS_PUBLICAS=1); PERFILADOR_MUESTREO=1 guarda las
+# pilas de las solicitudes lentas
+metricas = Instrumentacion(cache_figuras=cache_figuras)
+metricas.instalar(server, solo_local=os.environ.get("METRICAS_PUBLICAS", "0") != "1")
+
+@app.server.route("/estadisticas-cache")
+def estadisticas_cache():
+    return jsonify(cache_figuras.estadisticas())
+
+# Responde al instante aunque los datos no estén cargados; informa qué cargadores ya están listos
+@app.server.route("/salud")
+def salud():
+    return jsonify({"estado": "ok", "datos": carga.estado()})
+
+# Cada worker aplica antes de cada solicitud los trimestres que ingirió otro
+app.server.before_request(sincronizar_ingestas)
+
+# Ingesta de un trimestre nuevo: POST con {"fecha": "2024-07-01", "filas": [{"Provincia": ..., ...}]}.
+# Solo se habilita si INGESTA_TOKEN está definido, y exige ese valor en el encabezado X-Token-Ingesta.
+# El trimestre se escribe en los CSV: el directorio de datos debe admitir escritura.
+@app.server.route("/ingesta", methods=["POST"])
+def ingesta_trimestre():
+    token = os.environ.get("INGESTA_TOKEN")
+    if not token:
+        return jsonify({"error": "ingesta deshabilitada"}), 404
+    if request.headers.get("X-Token-Ingesta") != token:
+        return jsonify({"error": "token inválido"}), 403
+    cuerpo = request.get_json(silent=True) or {}
+    if "fecha" not in cuerpo or not cuerpo.get("filas"):
+        return jsonify({"error": "se esperan 'fecha' y 'filas'"}), 400
+    from etl.validacion import ErrorValidacion
+
+    try:
+        resultado = ingestar_trimestre(cuerpo["fecha"], pd.DataFrame(cuerpo["filas"]))
+    except (ValueError, KeyError, ErrorValidacion) as error:
+        return jsonify({"error": str(error)}), 400
+    return jsonify(resultado)
+
+if os.environ.get("PRECARGA_DATOS", "0") == "1":
+    carga.calentar(en_segundo_plano=True)
 
 # Layout de la app
 app.layout = html.Div([
@@ -433,6 +844,7 @@ app.layout = html.Div([
         dcc.Tab(label="Penetración y Tecnologías", value="tab3"),
         dcc.Tab(label="Análisis de Tendencias", value="tab4"),
         dcc.Tab(label="KPI", value="tab5"),
+        dcc.Tab(label="Rangos de Velocidad", value="tab6"),
     ]),
     html.Div(id="content")
 ])
@@ -442,12 +854,27 @@ app.layout = html.Div([
     Output("content", "children"),
     [Input("tabs", "value")]
 )
+@cache_figuras.memoizar("update_content")
 def update_content(tab):
     if tab == "tab1":
+        periodos_mapa = datos_mapa()["periodos_mapa"]
         return html.Div([
             html.Div([
                 html.Div([
-                    dcc.Graph(id="mapa-interactivo", figure=crear_mapa_interactivo())
+                    html.Label("Seleccione el Trimestre:"),
+                    dcc.Dropdown(
+                        id="selector-periodo",
+                        options=[
+                            {"label": f"{fecha.year} T{(fecha.month - 1) // 3 + 1}", "value": fecha.strftime("%Y-%m-%d")}
+                            for fecha in periodos_mapa
+                        ],
+                        value=periodos_mapa[-1].strftime("%Y-%m-%d"),
+                        clearable=False,
+                        style={"color": "black"}
+                    ),
+                    dcc.Graph(id="mapa-interactivo", figure=crear_mapa_interactivo()),
+                    dcc.Store(id="series-provincias", data=series_provincias()),
+                    dcc.Store(id="nivel-mapa", data=datos_mapa()["nivel_inicial"])
                 ], 
                 style={
                     "width": "30%", 
@@ -460,7 +887,7 @@ def update_content(tab):
                 }),
                 html.Div([
                     html.Div([
-                        dcc.Graph(id="grafico-tendencia", figure=crear_grafico_tendencia_inicial(), style={"width": "auto","height": "100%","padding": "1px" })
+                        dcc.Graph(id="grafico-tendencia", figure=ajustar_layout_tab1(crear_grafico_tendencia_inicial(), "Tendencia Nacional de la Velocidad Media de Internet"), style={"width": "auto","height": "100%","padding": "1px" })
                     ], style={
                         "display": "flex", 
                         "justify-content": "center", 
@@ -469,7 +896,7 @@ def update_content(tab):
                         "padding": "0px"  
                     }),
                     html.Div([
-                        dcc.Graph(id="grafico-crecimiento", figure=crear_grafico_crecimiento_inicial(), style={"height": "100%"})
+                        dcc.Graph(id="grafico-crecimiento", figure=ajustar_layout_tab1(crear_grafico_crecimiento_inicial(), tamano_fuente=8), style={"height": "100%"})
                     ], style={
                         "display": "flex", 
                         "justify-content": "center", 
@@ -505,6 +932,7 @@ def update_content(tab):
             })
         ])
     elif tab == "tab2":
+        vel_media_tecnologia = datos_tecnologias()["vel_media_tecnologia"]
         return html.Div([
 
             html.Div([
@@ -538,6 +966,7 @@ def update_content(tab):
                 ],style={"width": "50%", "display": "flex", "flex-direction": "column", "justify-content": "space-between", "align-items": "center"}),
          ], style={"width": "100%", "display": "flex", "flex-direction": "row", "height": "80vh"})
     elif tab == "tab3":
+        matriz_correlaciones = datos_analisis()["matriz_correlaciones"]
         return dbc.Container([
             dbc.Row([
                 dbc.Col(html.H4("Análisis Estadístico: Velocidad vs Penetración", className="text-center mb-4"), width=12)
@@ -551,6 +980,29 @@ def update_content(tab):
             dbc.Row([
                 # Tabla de métricas de correlación y regresión
                 dbc.Col(html.Div(id="tabla-metricas"), width=12)
+            ]),
+            dbc.Row([
+                dbc.Col(html.H4(f"Correlación móvil por provincia (ventanas de {matriz_correlaciones.ventana} trimestres)", className="text-center mt-4 mb-2"), width=12)
+            ]),
+            dbc.Row([
+                dbc.Col(dcc.Dropdown(
+                    id="metrica-correlacion-x",
+                    options=matriz_correlaciones.metricas,
+                    value="Velocidad_media",
+                    clearable=False,
+                    style={"color": "black"}
+                ), width=6),
+                dbc.Col(dcc.Dropdown(
+                    id="metrica-correlacion-y",
+                    options=matriz_correlaciones.metricas,
+                    value="% Fibra óptica",
+                    clearable=False,
+                    style={"color": "black"}
+                ), width=6),
+            ]),
+            dbc.Row([
+                # Heatmap provincia × fin de ventana para el par elegido
+                dbc.Col(dcc.Graph(id="heatmap-correlaciones"), width=12)
             ])
         ])
     elif tab == "tab4":
@@ -617,89 +1069,109 @@ def update_content(tab):
             dcc.Graph(id="grafico-kpi-velocidad",style={"width": "90%","height": "600px","overflow": "hidden","margin":"0 auto"}),  # Placeholder para gráfico de KPI de velocidad
             html.Div(id="graficas-tendencia-provincias",style={"width": "90%","height": "1200px","overflow": "hidden","margin":"0 auto"})  # Placeholder para gráficos por provincia
         ])
+    elif tab == "tab6":
+        distribucion = datos_rangos()
+        return dbc.Container([
+            dbc.Row([
+                dbc.Col(html.H4("Distribución de Accesos por Rango de Velocidad", className="text-center mb-4"), width=12)
+            ]),
+            dbc.Row([
+                dbc.Col(dcc.Dropdown(
+                    id="provincia-rangos",
+                    options=list(distribucion.provincias),
+                    value=TOTAL_PAIS,
+                    clearable=False,
+                    style={"color": "black"}
+                ), width=6),
+                dbc.Col(dcc.Dropdown(
+                    id="periodo-rangos",
+                    options=[
+                        {"label": f"{fecha.year} T{(fecha.month - 1) // 3 + 1}", "value": fecha.strftime("%Y-%m-%d")}
+                        for fecha in distribucion.fechas
+                    ],
+                    value=distribucion.fechas[-1].strftime("%Y-%m-%d"),
+                    clearable=False,
+                    style={"color": "black"}
+                ), width=6),
+            ]),
+            dbc.Row([
+                # Proporción acumulada de accesos hasta cada rango
+                dbc.Col(dcc.Graph(id="grafico-acumulada-rangos"), width=6),
+                # Migración estimada desde el trimestre anterior
+                dbc.Col(dcc.Graph(id="heatmap-migracion-rangos"), width=6),
+            ]),
+            dbc.Row([
+                # Velocidad mediana estimada a lo largo del tiempo
+                dbc.Col(dcc.Graph(id="grafico-mediana-rangos"), width=12)
+            ])
+        ])
 
-# Callbacks placeholders para todas las pestañas
+# Cambiar de trimestre solo reemplaza los valores del mapa; la geometría ya está en el navegador
 @app.callback(
-    [
-        Output("grafico-tendencia", "figure"),
-        Output("grafico-crecimiento", "figure"),
-    ],
-    [
-        Input("mapa-interactivo", "hoverData"),
-    ]
+    Output("mapa-interactivo", "figure"),
+    [Input("selector-periodo", "value")],
+    prevent_initial_call=True
 )
-def update_graficos(hoverData):
-    if hoverData:
-        provincia_hover = gdf.loc[hoverData["points"][0]["location"],"Provincia"]
-        provincia_data = vel_media_provincia[vel_media_provincia["Provincia"] == provincia_hover]
-        fig_tendencia = px.line(
-            provincia_data,
-            x="Fecha",
-            y="Mbps (Media de bajada)",
-            title=f"Tendencia de Velocidad Media en {provincia_hover}",
-            labels={"Mbps (Media de bajada)": "Velocidad Media (Mbps)", "Fecha": "Fecha"}
-            )
-        fig_tendencia.update_layout(
-            title={
-            "text": f"Tendencia de Velocidad Media en {provincia_hover}",
-            "x": 0.5,  # Centrado horizontalmente
-            "xanchor": "center",  # Anclaje horizontal centrado
-            "yanchor": "top"  # Anclaje vertical superior
-            },
-            margin={
-            "l": 5,  # Margen izquierdo mínimo
-            "r": 5,  # Margen derecho mínimo
-            "t": 40,  # Espacio suficiente para el título
-            "b": 5   # Margen inferior mínimo
-            },
-            font=dict(size=12),  # Ajustar tamaño de fuente
-            legend=dict(yanchor="top", y=0.99, xanchor="left", x=0.01),  # Ajustar la posición de la leyenda
-            height=None,  # Dinámico según el contenedor
-            width=None    # Dinámico según el contenedor
-)
-        
-    else:
-        fig_tendencia = crear_grafico_tendencia_inicial()
-        fig_tendencia.update_layout(
-            title={
-            "text": "Tendencia Nacional de la Velocidad Media de Internet",
-            "x": 0.5,  # Centrado horizontalmente
-            "xanchor": "center",  # Anclaje horizontal centrado
-            "yanchor": "top"  # Anclaje vertical superior
-            },
-            margin={
-            "l": 5,  # Margen izquierdo mínimo
-            "r": 5,  # Margen derecho mínimo
-            "t": 40,  # Espacio suficiente para el título
-            "b": 5   # Margen inferior mínimo
-            },
-            font=dict(size=12),  # Ajustar tamaño de fuente
-            legend=dict(yanchor="top", y=0.99, xanchor="left", x=0.01),  # Ajustar la posición de la leyenda
-            height=None,  # Dinámico según el contenedor
-            width=None    # Dinámico según el contenedor
-        )
-
-    fig_crecimiento = crear_grafico_crecimiento_inicial()
-    fig_crecimiento.update_layout(
-            title={
-            "x": 0.5,  # Centrado horizontalmente
-            "xanchor": "center",  # Anclaje horizontal centrado
-            "yanchor": "top"  # Anclaje vertical superior
-            },
-            margin={
-            "l": 5,  # Margen izquierdo mínimo
-            "r": 5,  # Margen derecho mínimo
-            "t": 40,  # Espacio suficiente para el título
-            "b": 5   # Margen inferior mínimo
-            },
-            font=dict(size=8),  # Ajustar tamaño de fuente
-            legend=dict(yanchor="top", y=0.99, xanchor="left", x=0.01),  # Ajustar la posición de la leyenda
-            height=None,  # Dinámico según el contenedor
-            width=None    # Dinámico según el contenedor
-    )
+def update_mapa_periodo(periodo):
+    valores = datos_mapa()["vel_media_mapa"].loc[pd.Timestamp(periodo)]
+    mapa = Patch()
+    mapa["data"][0]["z"] = valores.round(2).tolist()
+    return mapa
 
+# Al cambiar el zoom solo se envían geometrías nuevas si cambia el nivel de detalle
+@app.callback(
+    Output("mapa-interactivo", "figure", allow_duplicate=True),
+    Output("nivel-mapa", "data"),
+    Input("mapa-interactivo", "relayoutData"),
+    State("nivel-mapa", "data"),
+    prevent_initial_call=True
+)
+def update_nivel_detalle(relayoutData, nivel_actual):
+    zoom = (relayoutData or {}).get("mapbox.zoom")
+    if zoom is None:
+        raise dash.exceptions.PreventUpdate
+    from geometrias import nivel_para_zoom
 
-    return fig_tendencia, fig_crecimiento
+    niveles_geometria = datos_mapa()["niveles_geometria"]
+    nivel = nivel_para_zoom(zoom, niveles_geometria)
+    if nivel == nivel_actual:
+        raise dash.exceptions.PreventUpdate
+    mapa = Patch()
+    mapa["data"][0]["geojson"] = niveles_geometria[nivel]["geojson"]
+    return mapa, nivel
+
+# Hover sobre el mapa: se resuelve en el navegador con las series del dcc.Store "series-provincias",
+# sin ida y vuelta al servidor. Solo se reemplazan los valores y el título del gráfico de tendencia.
+app.clientside_callback(
+    """
+    function(hoverData, series, figura) {
+        if (!series || !figura) {
+            return window.dash_clientside.no_update;
+        }
+        var provincia = (hoverData && hoverData.points.length) ? hoverData.points[0].location : null;
+        var valores = provincia ? series.provincias[provincia] : series.nacional;
+        if (!valores) {
+            return window.dash_clientside.no_update;
+        }
+        var titulo = provincia
+            ? "Tendencia de Velocidad Media en " + provincia
+            : "Tendencia Nacional de la Velocidad Media de Internet";
+        if (figura.layout.title && figura.layout.title.text === titulo) {
+            return window.dash_clientside.no_update;
+        }
+        var traza = Object.assign({}, figura.data[0], {x: series.fechas, y: valores});
+        var layout = Object.assign({}, figura.layout, {
+            title: Object.assign({}, figura.layout.title, {text: titulo})
+        });
+        return {data: [traza], layout: layout};
+    }
+    """,
+    Output("grafico-tendencia", "figure"),
+    Input("mapa-interactivo", "hoverData"),
+    State("series-provincias", "data"),
+    State("grafico-tendencia", "figure"),
+    prevent_initial_call=True
+)
 
 
 @app.callback(
@@ -709,6 +1181,7 @@ def update_graficos(hoverData):
     ],
     [Input("slider-year", "value")]
 )
+@cache_figuras.memoizar("update_graficos_velocidad_y_tecnologia")
 def update_graficos_velocidad_y_tecnologia(year):
    
     fig_velocidad = crear_grafico_velocidad_tecnologia(year)
@@ -723,9 +1196,14 @@ def update_graficos_velocidad_y_tecnologia(year):
     Output("tabla-metricas", "children"),
     Input("tabs", "value")
 )
+@cache_figuras.memoizar("update_analisis_estadistico")
 def update_analisis_estadistico(tab):
     if tab != "tab3":
         raise dash.exceptions.PreventUpdate
+    import plotly.express as px
+
+    merged_data = datos()["merged_data"]
+    estadisticas_tab3 = datos_analisis()["estadisticas_tab3"]
 
     # Scatter plot: Velocidad Media vs. Penetración por Población
     fig_poblacion = px.scatter(
@@ -749,17 +1227,9 @@ def update_analisis_estadistico(tab):
     )
     fig_hogar.update_layout(title={"x": 0.5}, margin={"t": 50})
 
-    # Calcular métricas de correlación y regresión
-    correlation_poblacional, p_value_poblacional = pearsonr(merged_data["Penetración_población"], merged_data["Velocidad_media"])
-    correlation_hogar, p_value_hogar = pearsonr(merged_data["Penetración_hogar"], merged_data["Velocidad_media"])
-
-    X_poblacion = merged_data[["Penetración_población"]]
-    y_poblacion = merged_data["Velocidad_media"]
-    reg_poblacion = LinearRegression().fit(X_poblacion, y_poblacion)
-
-    X_hogar = merged_data[["Penetración_hogar"]]
-    y_hogar = merged_data["Velocidad_media"]
-    reg_hogar = LinearRegression().fit(X_hogar, y_hogar)
+    # Métricas de correlación y regresión a partir de las estadísticas suficientes
+    poblacion = estadisticas_tab3.resumen("Penetración_población", "Velocidad_media")
+    hogar = estadisticas_tab3.resumen("Penetración_hogar", "Velocidad_media")
 
     # Crear tabla de resultados
     tabla = dbc.Table(
@@ -770,28 +1240,28 @@ def update_analisis_estadistico(tab):
             html.Tbody([
                 html.Tr([
                     html.Td("Correlación de Pearson"),
-                    html.Td(round(correlation_poblacional, 2)),
-                    html.Td(round(correlation_hogar, 2))
+                    html.Td(round(poblacion["r"], 2)),
+                    html.Td(round(hogar["r"], 2))
                 ]),
                 html.Tr([
                     html.Td("P-valor"),
-                    html.Td(f"{p_value_poblacional:.2e}"),
-                    html.Td(f"{p_value_hogar:.2e}")
+                    html.Td(f"{poblacion['p_valor']:.2e}"),
+                    html.Td(f"{hogar['p_valor']:.2e}")
                 ]),
                 html.Tr([
                     html.Td("Pendiente (slope)"),
-                    html.Td(round(reg_poblacion.coef_[0], 2)),
-                    html.Td(round(reg_hogar.coef_[0], 2))
+                    html.Td(round(poblacion["pendiente"], 2)),
+                    html.Td(round(hogar["pendiente"], 2))
                 ]),
                 html.Tr([
                     html.Td("Intercepto"),
-                    html.Td(round(reg_poblacion.intercept_, 2)),
-                    html.Td(round(reg_hogar.intercept_, 2))
+                    html.Td(round(poblacion["intercepto"], 2)),
+                    html.Td(round(hogar["intercepto"], 2))
                 ]),
                 html.Tr([
                     html.Td("R²"),
-                    html.Td(round(reg_poblacion.score(X_poblacion, y_poblacion), 2)),
-                    html.Td(round(reg_hogar.score(X_hogar, y_hogar), 2))
+                    html.Td(round(poblacion["r2"], 2)),
+                    html.Td(round(hogar["r2"], 2))
                 ])
             ])
         ],
@@ -803,6 +1273,31 @@ def update_analisis_estadistico(tab):
 
     return fig_poblacion, fig_hogar, tabla
 
+@app.callback(
+    Output("heatmap-correlaciones", "figure"),
+    Input("metrica-correlacion-x", "value"),
+    Input("metrica-correlacion-y", "value")
+)
+@cache_figuras.memoizar("update_heatmap_correlaciones")
+def update_heatmap_correlaciones(metrica_x, metrica_y):
+    correlacion = datos_analisis()["matriz_correlaciones"].par(metrica_x, metrica_y)
+    fig = go.Figure(go.Heatmap(
+        z=correlacion.to_numpy().round(3),
+        x=correlacion.columns,
+        y=correlacion.index,
+        zmin=-1,
+        zmax=1,
+        colorscale="RdBu",
+        colorbar=dict(title="r"),
+        hovertemplate="%{y}<br>Ventana hasta %{x|%Y-%m}<br>r = %{z}<extra></extra>"
+    ))
+    fig.update_layout(
+        title=dict(text=f"{metrica_x} vs {metrica_y}", x=0.5, xanchor="center"),
+        margin={"l": 10, "r": 10, "t": 50, "b": 10},
+        height=700
+    )
+    return fig
+
 @app.callback(
     [
         Output("tabla-top-crecimiento-velocidad", "children"),
@@ -813,9 +1308,14 @@ def update_analisis_estadistico(tab):
     ],
     [Input("tabs", "value")]
 )
+@cache_figuras.memoizar("update_tab4_content")
 def update_tab4_content(tab):
     if tab != "tab4":
         raise dash.exceptions.PreventUpdate
+    import plotly.express as px
+
+    top_crecimiento = datos_crecimiento()
+    resumen_crecimiento = datos()["resumen_crecimiento"]
 
     # Tablas Top 10
     tabla_velocidad = dbc.Table.from_dataframe(
@@ -882,19 +1382,22 @@ def update_tab4_content(tab):
     ],
     [Input("tabs", "value")]
 )
+@cache_figuras.memoizar("update_tab5_content")
 def update_tab5_content(tab):
     if tab != "tab5":
         raise dash.exceptions.PreventUpdate
+    kpi = datos_kpi()
 
     # Crear gráficos para KPI de penetración
-    fig_kpi_penetracion = crear_grafico_kpi_penetracion(kpi_mean)
+    fig_kpi_penetracion = crear_grafico_kpi_penetracion(kpi["kpi_mean"], kpi["kpi_bandas"])
     fig_tendencia_penetracion = crear_grafico_tendencia_penetracion(
-        penetracion_hogar_estimado_mean, 
-        penetracion_hogar_simulado_mean
+        kpi["penetracion_hogar_estimado_mean"], 
+        kpi["penetracion_hogar_simulado_mean"]
     )
 
     # Crear gráficos para KPI de velocidad
-    fig_kpi_velocidad = crear_grafico_kpi_velocidad(kpi_mean_provincia)
+    fig_kpi_velocidad = crear_grafico_kpi_velocidad(kpi["kpi_mean_provincia"], kpi["kpi_bandas_provincia"])
+    velocidad_media_proyectado = kpi["velocidad_media_proyectado"]
 
     # Crear gráficos de tendencias para cada provincia
     provincias_graficas = []
@@ -910,6 +1413,86 @@ def update_tab5_content(tab):
     return fig_kpi_penetracion, fig_tendencia_penetracion, fig_kpi_velocidad, provincias_graficas
 
 
+@app.callback(
+    [
+        Output("grafico-acumulada-rangos", "figure"),
+        Output("grafico-mediana-rangos", "figure"),
+        Output("heatmap-migracion-rangos", "figure"),
+    ],
+    Input("provincia-rangos", "value"),
+    Input("periodo-rangos", "value")
+)
+@cache_figuras.memoizar("update_rangos_velocidad")
+def update_rangos_velocidad(provincia, periodo):
+    distribucion = datos_rangos()
+    fecha = pd.Timestamp(periodo)
+    posicion = distribucion.fechas.get_loc(fecha)
+    etiqueta = f"{fecha.year} T{(fecha.month - 1) // 3 + 1}"
+
+    # Acumulada del periodo elegido, con el país y el trimestre anterior como referencia
+    fig_acumulada = go.Figure()
+    referencias = [(provincia, fecha, etiqueta)]
+    if posicion > 0:
+        referencias.append((provincia, distribucion.fechas[posicion - 1], "Trimestre anterior"))
+    if provincia != TOTAL_PAIS:
+        referencias.append((TOTAL_PAIS, fecha, TOTAL_PAIS))
+    for nombre, fecha_referencia, leyenda in referencias:
+        acumulada = distribucion.acumulada_provincia(nombre, fecha_referencia)
+        fig_acumulada.add_trace(go.Scatter(
+            x=acumulada.index,
+            y=(acumulada * 100).round(2),
+            mode="lines+markers",
+            line_shape="hv",
+            name=leyenda,
+            hovertemplate="%{x}<br>%{y:.2f}% de los accesos<extra></extra>"
+        ))
+    fig_acumulada.update_layout(
+        title=dict(text=f"Accesos acumulados por rango: {provincia}", x=0.5, xanchor="center"),
+        yaxis=dict(title="% acumulado de accesos", range=[0, 100]),
+        legend=dict(orientation="h", y=-0.3),
+        margin={"l": 10, "r": 10, "t": 50, "b": 10},
+        height=500
+    )
+
+    medianas = distribucion.medianas_por_periodo(list(dict.fromkeys([provincia, TOTAL_PAIS])))
+    fig_mediana = go.Figure([
+        go.Scatter(x=medianas.index, y=medianas[nombre].round(2), mode="lines", name=nombre)
+        for nombre in medianas.columns
+    ])
+    fig_mediana.add_vline(x=fecha, line_dash="dot", line_color="gray")
+    fig_mediana.update_layout(
+        title=dict(text="Velocidad mediana estimada (interpolada dentro del rango)", x=0.5, xanchor="center"),
+        yaxis_title="Mbps",
+        margin={"l": 10, "r": 10, "t": 50, "b": 10},
+        height=450
+    )
+
+    fig_migracion = go.Figure()
+    if posicion > 0:
+        migracion = distribucion.migracion(provincia, fecha)
+        fig_migracion.add_trace(go.Heatmap(
+            z=(migracion.to_numpy() * 100).round(2),
+            x=migracion.columns,
+            y=migracion.index,
+            zmin=0,
+            zmax=100,
+            colorscale="Blues",
+            colorbar=dict(title="%"),
+            hovertemplate="De %{y}<br>a %{x}<br>%{z:.2f}%<extra></extra>"
+        ))
+        titulo = f"Migración estimada entre rangos hasta {etiqueta}"
+    else:
+        titulo = "Sin trimestre anterior para estimar la migración"
+    fig_migracion.update_layout(
+        title=dict(text=titulo, x=0.5, xanchor="center"),
+        xaxis_title="Rango en el trimestre",
+        yaxis_title="Rango en el trimestre anterior",
+        margin={"l": 10, "r": 10, "t": 50, "b": 10},
+        height=500
+    )
+    return fig_acumulada, fig_mediana, fig_migracion
+
 
 if __name__ == "__main__":
-    app.run_server(debug=True)
+    # Modo desarrollo (debug y recarga en caliente) solo si se pide explícitamente: DASH_DEBUG=1
+    app.run_server(debug=os.environ.get("DASH_DEBUG", "0") == "1")
@@ -0,0 +1,202 @@
+"""
+Benchmark de arranque, callbacks y serialización de figuras de app.py.
+
+Genera datasets sintéticos escalados (las 24 provincias replicadas con otro nombre) y, para cada
+escala, mide en un proceso nuevo:
+  - la preparación de datos (lectura, merges y groupbys de cache_datos.preparar_datos),
+  - la importación de app.py (carga + precálculo a nivel de módulo),
+  - cada callback sin el cache de figuras, y el tamaño en bytes del JSON que devuelve.
+
+Uso:
+    python benchmark.py --escalas 1 10 100 1000 --salida benchmark.json
+
+El resultado es un JSON con el commit, la versión de Python y los tiempos por escala, pensado para
+comparar entre commits.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+DIRECTORIO_REPO = os.path.dirname(os.path.abspath(__file__))
+
+
+def generar_datos_escalados(factor, directorio):
+    """
+    Escribe en `directorio` los CSV que lee la app y un GeoJSON con `factor` copias de cada
+    provincia. La copia 0 conserva el nombre original; las demás se llaman "<provincia> <i>".
+
+    Retorna:
+    (directorio_datos, ruta_geojson)
+    """
+    import pandas as pd
+    from cache_datos import ARCHIVOS_CSV, DIRECTORIO_DATOS, RUTA_GEOJSON
+
+    def nombre(provincia, copia):
+        return provincia if copia == 0 else f"{provincia} {copia}"
+
+    directorio_datos = os.path.join(directorio, "Datasets")
+    os.makedirs(directorio_datos, exist_ok=True)
+    for archivo in ARCHIVOS_CSV.values():
+        df = pd.read_csv(os.path.join(DIRECTORIO_DATOS, archivo))
+        copias = []
+        for copia in range(factor):
+            replica = df.copy()
+            replica["Provincia"] = [nombre(provincia, copia) for provincia in df["Provincia"]]
+            copias.append(replica)
+        pd.concat(copias, ignore_index=True).to_csv(os.path.join(directorio_datos, archivo), index=False)
+
+    with open(RUTA_GEOJSON, encoding="utf-8") as archivo:
+        geojson = json.load(archivo)
+    features = []
+    for copia in range(factor):
+        for feature in geojson["features"]:
+            propiedades = dict(feature["properties"], nombre=nombre(feature["properties"]["nombre"], copia))
+            features.append(dict(feature, properties=propiedades))
+    ruta_geojson = os.path.join(directorio, "map.geojson")
+    with open(ruta_geojson, "w", encoding="utf-8") as archivo:
+        json.dump(dict(geojson, features=features), archivo)
+    return directorio_datos, ruta_geojson
+
+
+def tamano_json(valor):
+    # Misma serialización que usa Dash para responder un callback
+    import plotly.utils
+    return len(json.dumps(valor, cls=plotly.utils.PlotlyJSONEncoder).encode("utf-8"))
+
+
+def medir(funcion, repeticiones):
+    """Ejecuta `funcion` `repeticiones` veces y retorna (tiempos en segundos, último resultado)."""
+    tiempos = []
+    resultado = None
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        resultado = funcion()
+        tiempos.append(time.perf_counter() - inicio)
+    return tiempos, resultado
+
+
+def resumen(tiempos, resultado=None):
+    datos = {"min_s": min(tiempos), "mediana_s": statistics.median(tiempos), "repeticiones": len(tiempos)}
+    if resultado is not None:
+        datos["bytes_json"] = tamano_json(resultado)
+    return datos
+
+
+def ejecutar_worker(repeticiones):
+    """Mide una escala dentro del proceso actual (las rutas de datos llegan por variables de entorno)."""
+    import importlib
+
+    resultados = {}
+
+    import cache_datos
+    tiempos, datos = medir(lambda: cache_datos.preparar_datos(cache_datos.DIRECTORIO_DATOS, cache_datos.RUTA_GEOJSON), repeticiones)
+    resultados["preparar_datos"] = resumen(tiempos)
+    resultados["filas"] = {nombre: len(df) for nombre, df in datos.items() if nombre != "panel"}
+    resultados["panel"] = {"forma": list(datos["panel"].valores.shape), "bytes": datos["panel"].memoria()}
+
+    inicio = time.perf_counter()
+    app = importlib.import_module("app")
+    resultados["importar_app"] = {"segundos": time.perf_counter() - inicio}
+
+    # Los datos de cada pestaña se cargan de forma diferida: se mide la precarga completa
+    inicio = time.perf_counter()
+    app.carga.calentar()
+    resultados["precarga_datos"] = {"segundos": time.perf_counter() - inicio, "cargadores": app.carga.estado()}
+
+    # __wrapped__ es la función original, sin el cache de figuras
+    callbacks = {}
+    for tab in ["tab1", "tab2", "tab3", "tab4", "tab5", "tab6"]:
+        callbacks[f"update_content[{tab}]"] = (app.update_content.__wrapped__, (tab,))
+    for year in sorted(app.datos_tecnologias()["agregados_por_año"]):
+        callbacks[f"update_graficos_velocidad_y_tecnologia[{year}]"] = (app.update_graficos_velocidad_y_tecnologia.__wrapped__, (year,))
+    callbacks["update_analisis_estadistico"] = (app.update_analisis_estadistico.__wrapped__, ("tab3",))
+    callbacks["update_heatmap_correlaciones"] = (app.update_heatmap_correlaciones.__wrapped__, ("Velocidad_media", "% Fibra óptica"))
+    callbacks["update_tab4_content"] = (app.update_tab4_content.__wrapped__, ("tab4",))
+    callbacks["update_tab5_content"] = (app.update_tab5_content.__wrapped__, ("tab5",))
+    ultimo_rango = app.datos_rangos().fechas[-1].strftime("%Y-%m-%d")
+    callbacks["update_rangos_velocidad"] = (app.update_rangos_velocidad.__wrapped__, (app.TOTAL_PAIS, ultimo_rango))
+    ultimo_periodo = app.datos_mapa()["periodos_mapa"][-1].strftime("%Y-%m-%d")
+    callbacks[f"update_mapa_periodo[{ultimo_periodo}]"] = (app.update_mapa_periodo, (ultimo_periodo,))
+    # El hover de tab1 se resuelve en el navegador: se mide el armado del Store que lo alimenta
+    callbacks["series_provincias"] = (app.series_provincias, ())
+
+    resultados["callbacks"] = {}
+    for nombre, (funcion, argumentos) in callbacks.items():
+        tiempos, resultado = medir(lambda: funcion(*argumentos), repeticiones)
+        resultados["callbacks"][nombre] = resumen(tiempos, resultado)
+
+    json.dump(resultados, sys.stdout)
+
+
+def medir_escala(factor, repeticiones, timeout):
+    with tempfile.TemporaryDirectory(prefix=f"benchmark_x{factor}_") as directorio:
+        inicio = time.perf_counter()
+        directorio_datos, ruta_geojson = generar_datos_escalados(factor, directorio)
+        segundos_generacion = time.perf_counter() - inicio
+
+        entorno = dict(
+            os.environ,
+            DIRECTORIO_DATOS=directorio_datos,
+            RUTA_GEOJSON=ruta_geojson,
+            DIRECTORIO_CACHE=os.path.join(directorio, ".cache"),
+        )
+        try:
+            proceso = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--worker", "--repeticiones", str(repeticiones)],
+                cwd=DIRECTORIO_REPO, env=entorno, capture_output=True, text=True, timeout=timeout,
+            )
+        except subprocess.TimeoutExpired:
+            return {"factor": factor, "error": f"timeout de {timeout} s"}
+
+        if proceso.returncode != 0:
+            return {"factor": factor, "error": proceso.stderr.strip().splitlines()[-1:]}
+        resultado = json.loads(proceso.stdout.strip().splitlines()[-1])
+        return dict(factor=factor, generacion_datos_s=segundos_generacion, **resultado)
+
+
+def commit_actual():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=DIRECTORIO_REPO, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark de arranque y callbacks de app.py")
+    parser.add_argument("--escalas", type=int, nargs="+", default=[1, 10, 100, 1000], help="factores de replicación de los datos")
+    parser.add_argument("--repeticiones", type=int, default=3, help="repeticiones por medición")
+    parser.add_argument("--timeout", type=int, default=1800, help="segundos máximos por escala")
+    parser.add_argument("--salida", default="benchmark.json", help="archivo JSON de resultados")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker:
+        ejecutar_worker(args.repeticiones)
+        return
+
+    resultados = {
+        "commit": commit_actual(),
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "fecha": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "escalas": [],
+    }
+    for factor in args.escalas:
+        print(f"Escala x{factor}...", file=sys.stderr)
+        resultados["escalas"].append(medir_escala(factor, args.repeticiones, args.timeout))
+
+    with open(args.salida, "w", encoding="utf-8") as archivo:
+        json.dump(resultados, archivo, indent=2, ensure_ascii=False)
+    print(f"Resultados en {args.salida}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,276 @@
+import hashlib
+import json
+import logging
+import os
+import time
+
+import pandas as pd
+
+from etl import validacion
+import panel as modulo_panel
+from panel import PanelProvincias
+
+try:
+    import pyarrow.feather as feather
+except ImportError:  # Sin pyarrow se trabaja directamente desde los CSV
+    feather = None
+
+
+# Rutas configurables por variables de entorno (p. ej. para el benchmark con datos sintéticos)
+DIRECTORIO_DATOS = os.environ.get('DIRECTORIO_DATOS', './Datasets')
+RUTA_GEOJSON = os.environ.get('RUTA_GEOJSON', './Mapas/map.geojson')
+DIRECTORIO_CACHE = os.environ.get('DIRECTORIO_CACHE', os.path.join(DIRECTORIO_DATOS, '.cache'))
+
+ARCHIVOS_CSV = {
+    "vel_media_provincia": "vel_media_provincia.csv",
+    "penetracion_hogar": "penetracion_hogar.csv",
+    "penetracion_poblac": "penetracion_poblac.csv",
+    "tecnologia_provincia": "tecnologia_provincia.csv",
+    "acceso_rango_provincia": "Acceso_rango_provincia.csv",
+}
+TECNOLOGIAS = ["ADSL", "Cablemodem", "Fibra óptica", "Wireless", "Otros"]
+
+# Fuentes del panel: nombre -> (tabla del CSV, columnas métricas)
+FUENTES_PANEL = {
+    "tecnologia": ("tecnologia_provincia", TECNOLOGIAS + ["Total"]),
+    "velocidad": ("vel_media_provincia", ["Mbps (Media de bajada)"]),
+    "hogar": ("penetracion_hogar", ["Accesos por cada 100 hogares"]),
+    "poblacion": ("penetracion_poblac", ["Accesos por cada 100 hab"]),
+}
+# Tablas con tasa de crecimiento trimestral: tabla -> (fuente del panel, columna de valor, columna de tasa)
+SERIES_CRECIMIENTO = {
+    "vel_media_provincia": ("velocidad", "Mbps (Media de bajada)", "Tasa_de_crecimiento_vel_media"),
+    "penetracion_hogar": ("hogar", "Accesos por cada 100 hogares", "Tasa_de_crecimiento_penetracion_hogar"),
+    "penetracion_poblac": ("poblacion", "Accesos por cada 100 hab", "Tasa_de_crecimiento_penetracion_poblacion"),
+}
+RENOMBRES_MERGED = {
+    "Accesos por cada 100 hogares": "Penetración_hogar",
+    "Accesos por cada 100 hab": "Penetración_población",
+    "Mbps (Media de bajada)": "Velocidad_media",
+}
+# Tablas en formato largo que no se guardan: se derivan del panel al pedirlas
+VISTAS_PANEL = ["data", "merged_data"] + [tabla for tabla, _ in FUENTES_PANEL.values()]
+
+logger = logging.getLogger(__name__)
+
+
+def leer_csv(ruta):
+    # Provincia como categoría: se guarda con codificación de diccionario en el cache
+    return pd.read_csv(ruta, parse_dates=['Fecha'], dtype={"Provincia": "category"})
+
+
+def derivar_vista(panel, nombre):
+    """
+    Calcula desde el panel una de las tablas de VISTAS_PANEL.
+
+    Retorna:
+    DataFrame en formato largo ordenado por Provincia y Fecha.
+    """
+    if nombre == "data":
+        # Integrar y procesar datos para "Relación con Tecnologías"
+        data = panel.vista(TECNOLOGIAS + ["Total", "Mbps (Media de bajada)"], fuentes=["tecnologia", "velocidad"])
+        # Un Total en cero deja la proporción en NaN en lugar de infinito
+        total = data["Total"].where(data["Total"] != 0)
+        for tecnologia in TECNOLOGIAS:
+            data[f"prop_{tecnologia}"] = data[tecnologia] / total
+        data["Tecnologia_Predominante"] = data[TECNOLOGIAS].idxmax(axis=1)
+        data['Año'] = data['Fecha'].dt.year
+        return data
+    if nombre == "merged_data":
+        # Vista combinada para análisis estadístico (presente en las cuatro fuentes)
+        return panel.vista(
+            ["Accesos por cada 100 hogares", "Accesos por cada 100 hab"] + TECNOLOGIAS + ["Total", "Mbps (Media de bajada)"],
+            renombrar=RENOMBRES_MERGED
+        )
+
+    fuente, columnas = next((fuente, columnas) for fuente, (tabla, columnas) in FUENTES_PANEL.items() if tabla == nombre)
+    vista = panel.vista(columnas, fuentes=[fuente])
+    if nombre in SERIES_CRECIMIENTO:
+        _, valor, tasa = SERIES_CRECIMIENTO[nombre]
+        vista[tasa] = vista[valor].astype(float).groupby(vista["Provincia"], observed=True).pct_change() * 100
+    return vista
+
+
+class DatosPanel(dict):
+    """
+    Tablas de la app. Las de VISTAS_PANEL (`data`, `merged_data` y las de cada CSV del panel) no se
+    guardan ni se cachean en disco: se derivan de `panel` la primera vez que se piden y quedan
+    memoizadas en el diccionario.
+    """
+
+    def __missing__(self, nombre):
+        if nombre not in VISTAS_PANEL:
+            raise KeyError(nombre)
+        vista = derivar_vista(self["panel"], nombre)
+        self[nombre] = vista
+        return vista
+
+    def con_tablas(self, **tablas):
+        """
+        DatosPanel nuevo con las tablas indicadas reemplazadas; este no se modifica. Si cambia el
+        panel, las vistas derivadas del anterior no se copian.
+        """
+        base = {nombre: tabla for nombre, tabla in self.items() if "panel" not in tablas or nombre not in VISTAS_PANEL}
+        return DatosPanel(base, **tablas)
+
+
+def preparar_datos(directorio_datos=DIRECTORIO_DATOS, ruta_geojson=RUTA_GEOJSON):
+    """
+    Carga los CSV y el GeoJSON y calcula los datos que usa la app.
+
+    Retorna:
+    DatosPanel con el `panel` (provincia × trimestre × métrica), `acceso_rango_provincia`,
+    `tendencia`, `resumen_crecimiento` y `gdf`; las tablas en formato largo se derivan del panel.
+    """
+    # geopandas es pesado de importar: solo se carga cuando hay que leer geometrías
+    import geopandas as gpd
+
+    tablas = {
+        nombre: leer_csv(os.path.join(directorio_datos, archivo)) for nombre, archivo in ARCHIVOS_CSV.items()
+    }
+
+    # Entre el ETL y la app: ante un error (claves duplicadas, sumas por tecnología que no dan Total,
+    # ...) se lanza ErrorValidacion antes de calcular nada; las advertencias solo se registran
+    advertencias = validacion.validar_datos(tablas)
+    if advertencias:
+        logger.warning("Validación de datos:\n%s", validacion.formatear_reporte(advertencias))
+
+    gdf = gpd.read_file(ruta_geojson)
+    gdf["Provincia"] = gdf["nombre"]
+
+    # Todas las métricas en un panel denso (provincia, trimestre, métrica): las tablas combinadas y
+    # las de cada fuente son vistas del panel en lugar de merges
+    panel = PanelProvincias.desde_frames({
+        fuente: (tablas[tabla], columnas) for fuente, (tabla, columnas) in FUENTES_PANEL.items()
+    })
+    datos = DatosPanel(panel=panel, acceso_rango_provincia=tablas["acceso_rango_provincia"], gdf=gdf)
+
+    tend_tecnol = datos["data"].groupby("Fecha")[TECNOLOGIAS].sum()
+    datos["tendencia"] = tend_tecnol.div(tend_tecnol.sum(axis=1), axis=0).reset_index()
+
+    crecimientos = [
+        datos[tabla].groupby("Provincia", observed=True)[tasa].mean().reset_index()
+        for tabla, (_, _, tasa) in SERIES_CRECIMIENTO.items()
+    ]
+    datos["resumen_crecimiento"] = crecimientos[0].merge(crecimientos[1], on="Provincia").merge(crecimientos[2], on="Provincia")
+
+    # Las vistas usadas en los cálculos se descartan: las tablas guardadas son solo las de base
+    for nombre in VISTAS_PANEL:
+        datos.pop(nombre, None)
+    return datos
+
+
+def huella_archivo(ruta, tamano_bloque=1 << 20):
+    sha = hashlib.sha256()
+    with open(ruta, 'rb') as archivo:
+        for bloque in iter(lambda: archivo.read(tamano_bloque), b''):
+            sha.update(bloque)
+    return sha.hexdigest()
+
+
+def huellas_fuentes(directorio_datos=DIRECTORIO_DATOS, ruta_geojson=RUTA_GEOJSON):
+    # El propio módulo forma parte de la huella: si cambia el pipeline, el cache se invalida
+    rutas = [os.path.join(directorio_datos, archivo) for archivo in ARCHIVOS_CSV.values()]
+    rutas += [ruta_geojson, os.path.abspath(__file__), os.path.abspath(validacion.__file__), os.path.abspath(modulo_panel.__file__)]
+    return {os.path.basename(ruta): huella_archivo(ruta) for ruta in rutas}
+
+
+def _ruta_manifiesto(directorio_cache):
+    return os.path.join(directorio_cache, 'manifiesto.json')
+
+
+def escribir_atomico(ruta, escribir):
+    # Se escribe en un temporal y se reemplaza, así un worker nunca lee un archivo a medio escribir
+    temporal = f"{ruta}.{os.getpid()}.tmp"
+    escribir(temporal)
+    os.replace(temporal, ruta)
+
+
+def construir_cache(directorio_datos=DIRECTORIO_DATOS, ruta_geojson=RUTA_GEOJSON, directorio_cache=DIRECTORIO_CACHE):
+    """
+    Calcula los datos y los guarda en formato Feather (Arrow) junto a un manifiesto con las huellas
+    SHA-256 de los archivos fuente. El panel se guarda como tabla densa; sus vistas no se guardan.
+
+    Retorna:
+    DatosPanel con los datos recién calculados.
+    """
+    if feather is None:
+        raise ImportError("Se necesita pyarrow para construir el cache columnar")
+
+    os.makedirs(directorio_cache, exist_ok=True)
+    huellas = huellas_fuentes(directorio_datos, ruta_geojson)
+    datos = preparar_datos(directorio_datos, ruta_geojson)
+
+    for nombre, df in datos.items():
+        ruta = os.path.join(directorio_cache, f"{nombre}.feather")
+        if nombre == "gdf":
+            escribir_atomico(ruta, df.to_feather)
+        elif nombre == "panel":
+            escribir_atomico(ruta, lambda temporal: feather.write_feather(df.a_tabla(), temporal, compression='uncompressed'))
+        else:
+            escribir_atomico(ruta, lambda temporal: feather.write_feather(df, temporal, compression='uncompressed'))
+
+    manifiesto = {"huellas": huellas, "tablas": sorted(datos), "creado": time.time()}
+
+    def escribir_manifiesto(temporal):
+        with open(temporal, 'w', encoding='utf-8') as archivo:
+            json.dump(manifiesto, archivo, indent=2)
+
+    escribir_atomico(_ruta_manifiesto(directorio_cache), escribir_manifiesto)
+    return datos
+
+
+def cache_vigente(directorio_datos=DIRECTORIO_DATOS, ruta_geojson=RUTA_GEOJSON, directorio_cache=DIRECTORIO_CACHE):
+    try:
+        with open(_ruta_manifiesto(directorio_cache), encoding='utf-8') as archivo:
+            manifiesto = json.load(archivo)
+    except (OSError, ValueError):
+        return False
+    tablas_presentes = all(
+        os.path.exists(os.path.join(directorio_cache, f"{nombre}.feather")) for nombre in manifiesto.get("tablas", [])
+    )
+    return tablas_presentes and manifiesto.get("huellas") == huellas_fuentes(directorio_datos, ruta_geojson)
+
+
+def leer_cache(directorio_cache=DIRECTORIO_CACHE):
+    with open(_ruta_manifiesto(directorio_cache), encoding='utf-8') as archivo:
+        tablas = json.load(archivo)["tablas"]
+    datos = DatosPanel()
+    for nombre in tablas:
+        ruta = os.path.join(directorio_cache, f"{nombre}.feather")
+        if nombre == "gdf":
+            import geopandas as gpd
+            datos[nombre] = gpd.read_feather(ruta)
+        elif nombre == "panel":
+            datos[nombre] = PanelProvincias.desde_tabla(feather.read_table(ruta, memory_map=True).to_pandas())
+        else:
+            # Sin compresión el archivo se mapea en memoria en lugar de copiarse a un buffer
+            datos[nombre] = feather.read_table(ruta, memory_map=True).to_pandas()
+    return datos
+
+
+def cargar_datos(directorio_datos=DIRECTORIO_DATOS, ruta_geojson=RUTA_GEOJSON, directorio_cache=DIRECTORIO_CACHE):
+    """
+    Devuelve los datos de la app (DatosPanel) desde el cache columnar, reconstruyéndolo si alguna fuente
+    cambió. Si pyarrow no está instalado, los calcula desde los CSV.
+    """
+    if feather is None:
+        return preparar_datos(directorio_datos, ruta_geojson)
+    if cache_vigente(directorio_datos, ruta_geojson, directorio_cache):
+        return leer_cache(directorio_cache)
+    return construir_cache(directorio_datos, ruta_geojson, directorio_cache)
+
+
+if __name__ == "__main__":
+    inicio = time.perf_counter()
+    datos = construir_cache()
+    print(f"Cache construido en {time.perf_counter() - inicio:.2f} s en {DIRECTORIO_CACHE}")
+    for nombre, df in datos.items():
+        if nombre == "panel":
+            print(f"  panel: {df.valores.shape} ({df.memoria() / 2**10:.0f} KiB)")
+        else:
+            print(f"  {nombre}: {len(df)} filas")
+
+    inicio = time.perf_counter()
+    leer_cache()
+    print(f"Lectura desde cache: {time.perf_counter() - inicio:.3f} s")
@@ -0,0 +1,220 @@
+import base64
+import json
+import threading
+from collections import OrderedDict
+from functools import wraps
+
+import numpy as np
+import plotly.graph_objects as go
+import plotly.io as pio
+from dash.development.base_component import Component
+
+from instrumentacion import etapa, resultado_cache
+
+# Arreglos numéricos de al menos este largo se envían como arreglos tipados en base64
+# ({"dtype", "bdata"}, soportado por plotly.js >= 2.28); los más cortos quedan en JSON redondeados
+MIN_ELEMENTOS_BINARIO = 16
+DECIMALES = 4
+# Propiedades de las trazas que no se tocan (geometrías del mapa, textos)
+CLAVES_EXCLUIDAS = {"geojson", "text", "hovertext", "ids", "locations", "customdata"}
+
+
+def _es_numero(valor):
+    return valor is None or (type(valor) in (int, float))
+
+
+def _arreglo_tipado(valores):
+    """
+    Codifica una lista numérica (o lista de listas de igual largo) como arreglo tipado de plotly.js.
+    Los enteros usan el tipo entero más chico que los contiene; los reales, float32. Los None pasan
+    a NaN, que plotly.js trata como dato faltante.
+    """
+    arreglo = np.array(valores, dtype=float)
+    finitos = arreglo[np.isfinite(arreglo)]
+    if finitos.size == arreglo.size and np.array_equal(finitos, np.round(finitos)):
+        minimo, maximo = finitos.min(), finitos.max()
+        for dtype in ("i1", "u1", "i2", "u2", "i4", "u4"):
+            limites = np.iinfo(dtype)
+            if limites.min <= minimo and maximo <= limites.max:
+                break
+        else:
+            dtype = "f8"
+    else:
+        dtype = "f4"
+    codificado = {"dtype": dtype, "bdata": base64.b64encode(arreglo.astype("<" + dtype).tobytes()).decode("ascii")}
+    if arreglo.ndim == 2:
+        codificado["shape"] = f"{arreglo.shape[0]}, {arreglo.shape[1]}"
+    return codificado
+
+
+def _compactar(valor):
+    if isinstance(valor, dict):
+        return {clave: valor[clave] if clave in CLAVES_EXCLUIDAS else _compactar(valor[clave]) for clave in valor}
+    if not isinstance(valor, list) or not valor:
+        return valor
+    if all(_es_numero(elemento) for elemento in valor):
+        if len(valor) >= MIN_ELEMENTOS_BINARIO and any(elemento is not None for elemento in valor):
+            return _arreglo_tipado(valor)
+        return [round(elemento, DECIMALES) if type(elemento) is float else elemento for elemento in valor]
+    # Matrices (z de los heatmaps): filas numéricas del mismo largo
+    if all(isinstance(fila, list) and fila and all(_es_numero(e) for e in fila) for fila in valor):
+        if len({len(fila) for fila in valor}) == 1 and len(valor) * len(valor[0]) >= MIN_ELEMENTOS_BINARIO:
+            return _arreglo_tipado(valor)
+    return [_compactar(elemento) for elemento in valor]
+
+
+def compactar_figura(figura):
+    """
+    Reduce el JSON de una figura ya serializada: los arreglos numéricos de las trazas pasan a
+    arreglos tipados en base64 (enteros del menor tamaño posible, reales en float32), los cortos
+    se redondean y en las cajas una categoría repetida en todos los puntos se envía una sola vez.
+    El layout no se modifica.
+
+    Parámetros:
+    figura (dict): figura como diccionario (salida de pio.to_json).
+
+    Retorna:
+    El mismo diccionario con las trazas compactadas.
+    """
+    trazas = []
+    for traza in figura.get("data", []):
+        if traza.get("type") in ("box", "violin"):
+            # Una categoría repetida en cada punto (px.box con x=columna) se envía una sola vez
+            for eje in ("x", "y"):
+                valores = traza.get(eje)
+                if isinstance(valores, list) and valores and isinstance(valores[0], str) and len(set(valores)) == 1:
+                    traza[f"{eje}0"] = valores[0]
+                    del traza[eje]
+        trazas.append(_compactar(traza))
+    figura["data"] = trazas
+    return figura
+
+
+def serializar(valor):
+    """
+    Convierte las figuras de Plotly contenidas en el resultado de un callback a su JSON ya
+    serializado (como diccionario de tipos nativos), para que Dash no tenga que volver a
+    recorrer los objetos de Plotly en cada respuesta.
+
+    Parámetros:
+    valor: go.Figure, componente de Dash, lista o tupla con cualquiera de ellos.
+
+    Retorna:
+    El mismo valor con las figuras reemplazadas por diccionarios.
+    """
+    if isinstance(valor, go.Figure):
+        return compactar_figura(json.loads(pio.to_json(valor, validate=False)))
+    if isinstance(valor, (list, tuple)):
+        return type(valor)(serializar(elemento) for elemento in valor)
+    if isinstance(valor, Component):
+        figura = getattr(valor, "figure", None)
+        if isinstance(figura, go.Figure):
+            valor.figure = serializar(figura)
+        hijos = getattr(valor, "children", None)
+        if isinstance(hijos, (list, tuple, Component)):
+            valor.children = serializar(hijos)
+    return valor
+
+
+class CacheFiguras:
+    """
+    Cache LRU acotado para los resultados de los callbacks.
+
+    Las claves son tuplas (nombre del callback, entradas) y los valores el resultado ya
+    serializado. Guarda contadores de aciertos y fallos por callback.
+    """
+
+    def __init__(self, max_entradas=256):
+        self.max_entradas = max_entradas
+        self._entradas = OrderedDict()
+        self._lock = threading.Lock()
+        self._aciertos = {}
+        self._fallos = {}
+        # Se incrementa en cada invalidación: un resultado construido antes no se guarda
+        self._generacion = 0
+
+    def obtener(self, clave, constructor):
+        nombre = clave[0]
+        with self._lock:
+            if clave in self._entradas:
+                self._entradas.move_to_end(clave)
+                self._aciertos[nombre] = self._aciertos.get(nombre, 0) + 1
+                resultado_cache(True)
+                return self._entradas[clave]
+            generacion = self._generacion
+
+        # La figura se construye fuera del lock para no bloquear a otros usuarios. Si el
+        # constructor lanza (por ejemplo PreventUpdate) no se registra nada.
+        with etapa("figura"):
+            valor = constructor()
+        with etapa("serializacion"):
+            valor = serializar(valor)
+
+        resultado_cache(False)
+        with self._lock:
+            self._fallos[nombre] = self._fallos.get(nombre, 0) + 1
+            if generacion != self._generacion:
+                # Los datos cambiaron mientras se construía: se responde pero no se guarda
+                return valor
+            self._entradas[clave] = valor
+            self._entradas.move_to_end(clave)
+            while len(self._entradas) > self.max_entradas:
+                self._entradas.popitem(last=False)
+        return valor
+
+    def memoizar(self, nombre, clave=None):
+        """
+        Decorador para callbacks de Dash. `clave` es una función opcional que transforma las
+        entradas del callback en una clave hasheable (por ejemplo, hoverData -> provincia).
+        """
+        def decorador(funcion):
+            @wraps(funcion)
+            def envoltura(*args):
+                entradas = clave(*args) if clave is not None else args
+                return self.obtener((nombre, entradas), lambda: funcion(*args))
+            return envoltura
+        return decorador
+
+    def invalidar(self, prefijo, entradas=None):
+        """
+        Elimina las entradas de los callbacks cuyo nombre empieza con `prefijo` y, si se indica,
+        solo las de esas `entradas` (la tupla de argumentos del callback).
+
+        Retorna:
+        cantidad de entradas eliminadas.
+        """
+        with self._lock:
+            claves = [
+                clave for clave in self._entradas
+                if clave[0].startswith(prefijo) and (entradas is None or clave[1] == tuple(entradas))
+            ]
+            for clave in claves:
+                del self._entradas[clave]
+            self._generacion += 1
+            return len(claves)
+
+    def limpiar(self):
+        with self._lock:
+            self._entradas.clear()
+            self._generacion += 1
+
+    def estadisticas(self):
+        with self._lock:
+            nombres = sorted(set(self._aciertos) | set(self._fallos))
+            por_callback = {
+                nombre: {
+                    "aciertos": self._aciertos.get(nombre, 0),
+                    "fallos": self._fallos.get(nombre, 0),
+                }
+                for nombre in nombres
+            }
+            aciertos = sum(self._aciertos.values())
+            fallos = sum(self._fallos.values())
+            return {
+                "entradas": len(self._entradas),
+                "max_entradas": self.max_entradas,
+                "aciertos": aciertos,
+                "fallos": fallos,
+                "tasa_aciertos": aciertos / (aciertos + fallos) if aciertos + fallos else 0.0,
+                "por_callback": por_callback,
+            }
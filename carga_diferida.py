@@ -0,0 +1,109 @@
+import logging
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+from functools import wraps
+
+from instrumentacion import etapa
+
+logger = logging.getLogger(__name__)
+
+
+class CargaDiferida:
+    """
+    Registro de cargadores perezosos: cada función decorada con `cargador` se ejecuta la primera
+    vez que se la pide y su resultado queda memoizado. Un lock por cargador evita que dos
+    solicitudes simultáneas calculen lo mismo, sin bloquear a los demás cargadores.
+    """
+
+    def __init__(self):
+        self._envolturas = {}
+        self._locks = {}
+        self._valores = {}
+        self._segundos = {}
+        self._errores = {}
+
+    def cargador(self, funcion):
+        nombre = funcion.__name__
+        # Reentrante: quien tiene todos los locks (ver en_pausa) puede ejecutar cargadores
+        lock = threading.RLock()
+
+        @wraps(funcion)
+        def envoltura():
+            if nombre in self._valores:
+                return self._valores[nombre]
+            with lock:
+                if nombre not in self._valores:
+                    inicio = time.perf_counter()
+                    try:
+                        with etapa("datos"):
+                            self._valores[nombre] = funcion()
+                    except Exception as error:
+                        self._errores[nombre] = repr(error)
+                        raise
+                    self._segundos[nombre] = time.perf_counter() - inicio
+                    self._errores.pop(nombre, None)
+            return self._valores[nombre]
+
+        self._envolturas[nombre] = envoltura
+        self._locks[nombre] = lock
+        return envoltura
+
+    def cargado(self, nombre):
+        return nombre in self._valores
+
+    def reemplazar(self, nombre, valor):
+        """
+        Cambia el valor memoizado de `nombre` por otro ya calculado. Es una sola asignación: quien
+        lo pida ve el valor anterior completo o el nuevo completo, nunca uno a medio modificar.
+        """
+        self._valores[nombre] = valor
+
+    @contextmanager
+    def en_pausa(self):
+        """
+        Espera a que terminen los cargadores en curso y no deja empezar otros hasta salir del
+        bloque, sin ejecutar los que no están cargados. Los locks se toman en orden inverso al de
+        registro: un cargador en curso solo pide cargadores registrados antes que él, cuyos locks
+        todavía están libres.
+        """
+        with ExitStack() as locks:
+            for nombre in reversed(list(self._locks)):
+                locks.enter_context(self._locks[nombre])
+            yield
+
+    def invalidar(self, nombre):
+        """Descarta el valor memoizado de `nombre`; se recalcula la próxima vez que se pida."""
+        self._valores.pop(nombre, None)
+        self._segundos.pop(nombre, None)
+
+    def calentar(self, nombres=None, en_segundo_plano=False):
+        """
+        Ejecuta los cargadores indicados (por defecto todos, en orden de registro). Con
+        `en_segundo_plano` lo hace en un hilo daemon y retorna el hilo.
+        """
+        nombres = list(self._envolturas) if nombres is None else list(nombres)
+
+        def ejecutar():
+            for nombre in nombres:
+                try:
+                    self._envolturas[nombre]()
+                except Exception:
+                    logger.exception("Falló la precarga de %s", nombre)
+
+        if not en_segundo_plano:
+            ejecutar()
+            return None
+        hilo = threading.Thread(target=ejecutar, name="precarga-datos", daemon=True)
+        hilo.start()
+        return hilo
+
+    def estado(self):
+        return {
+            nombre: {
+                "listo": nombre in self._valores,
+                "segundos": self._segundos.get(nombre),
+                "error": self._errores.get(nombre),
+            }
+            for nombre in self._envolturas
+        }
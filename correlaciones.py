@@ -0,0 +1,182 @@
+"""
+Matriz de correlaciones móviles métrica × métrica por provincia y periodo.
+
+Se arma un panel (provincia, periodo, métrica) con las proporciones de cada tecnología, las
+proporciones de accesos por rango de velocidad, la penetración en hogares y población y la
+velocidad media. Con sumas acumuladas a lo largo del tiempo se obtienen, en un solo cálculo de
+NumPy, las correlaciones de Pearson de todos los pares de métricas en todas las ventanas móviles
+de todas las provincias: un arreglo 4-D (provincia, fin de ventana, métrica, métrica) que el
+dashboard solo recorta. Al ingerir un trimestre, MatrizCorrelaciones.extender suma el periodo nuevo
+a las últimas sumas acumuladas y calcula solo la ventana que termina en él.
+"""
+import copy
+
+import numpy as np
+import pandas as pd
+
+RANGOS_VELOCIDAD = ['HASTA 512 kbps', '+ 512 Kbps - 1 Mbps', '+ 1 Mbps - 6 Mbps', '+ 6 Mbps - 10 Mbps',
+                    '+ 10 Mbps - 20 Mbps', '+ 20 Mbps - 30 Mbps', '+ 30 Mbps', 'OTROS']
+VENTANA_TRIMESTRES = 8
+
+
+def tabla_metricas(data, merged_data, acceso_rango, tecnologias):
+    """
+    Reúne todas las métricas en formato ancho (una columna por métrica) sobre los pares
+    (Provincia, Fecha) presentes en todas las fuentes.
+
+    Retorna:
+    DataFrame con índice (Provincia, Fecha) ordenado.
+    """
+    claves = ["Provincia", "Fecha"]
+    tecnologia = data[claves + [f"prop_{tecnologia}" for tecnologia in tecnologias]]
+    tecnologia = tecnologia.rename(columns={f"prop_{tecnologia}": f"% {tecnologia}" for tecnologia in tecnologias})
+
+    rangos = acceso_rango[claves].copy()
+    total = acceso_rango["Total"].where(acceso_rango["Total"] != 0)
+    for rango in RANGOS_VELOCIDAD:
+        rangos[f"% {rango}"] = acceso_rango[rango] / total
+
+    penetracion = merged_data[claves + ["Penetración_hogar", "Penetración_población", "Velocidad_media"]]
+
+    metricas = tecnologia.merge(rangos, on=claves, how="inner").merge(penetracion, on=claves, how="inner")
+    metricas["Provincia"] = metricas["Provincia"].astype(str)
+    return metricas.set_index(claves).sort_index()
+
+
+def construir_panel_metricas(data, merged_data, acceso_rango, tecnologias):
+    """
+    Pasa las métricas de tabla_metricas a un arreglo (provincia, periodo, métrica) sobre los
+    periodos comunes a todas las fuentes.
+
+    Retorna:
+    (panel, provincias, fechas, metricas)
+    """
+    metricas = tabla_metricas(data, merged_data, acceso_rango, tecnologias)
+    provincias = metricas.index.get_level_values("Provincia").unique()
+    fechas = metricas.index.get_level_values("Fecha").unique().sort_values()
+    completo = pd.MultiIndex.from_product([provincias, fechas], names=["Provincia", "Fecha"])
+    panel = metricas.reindex(completo).to_numpy(dtype=float).reshape(len(provincias), len(fechas), -1)
+    return panel, provincias, fechas, list(metricas.columns)
+
+
+def minimo_por_defecto(ventana):
+    # Observaciones mínimas (en pares completos) para informar una correlación
+    return max(3, ventana // 2)
+
+
+def sumandos_pares(centrado):
+    """
+    Términos de cada periodo para las sumas sobre pares completos: n_ij, Σx_i, Σx_i² y Σx_i·x_j.
+
+    Parámetros:
+    centrado (np.ndarray): (P, T, M) métricas centradas, NaN donde falta el dato.
+
+    Retorna:
+    np.ndarray (4, P, T, M, M).
+    """
+    valido = ~np.isnan(centrado)
+    x = np.where(valido, centrado, 0.0)
+    v = valido.astype(float)
+    return np.stack([
+        np.einsum("ptm,ptk->ptmk", v, v),
+        np.einsum("ptm,ptk->ptmk", x, v),
+        np.einsum("ptm,ptk->ptmk", x * x, v),
+        np.einsum("ptm,ptk->ptmk", x, x),
+    ])
+
+
+def correlacion_desde_sumas(sumas, minimo):
+    """Pearson de cada par a partir de las sumas de sumandos_pares sobre una o más ventanas."""
+    n, suma_x, suma_xx, suma_xy = sumas
+    suma_y = np.swapaxes(suma_x, -1, -2)
+    suma_yy = np.swapaxes(suma_xx, -1, -2)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        cov = suma_xy - suma_x * suma_y / n
+        var_x = suma_xx - suma_x ** 2 / n
+        var_y = suma_yy - suma_y ** 2 / n
+        correlacion = cov / np.sqrt(var_x * var_y)
+    correlacion[(n < minimo) | (var_x <= 1e-12) | (var_y <= 1e-12)] = np.nan
+    return np.clip(correlacion, -1.0, 1.0)
+
+
+def sumas_acumuladas(centrado):
+    """Sumas acumuladas de sumandos_pares sobre el tiempo, con una fila inicial en cero: (4, P, T + 1, M, M)."""
+    acumulado = np.cumsum(sumandos_pares(centrado), axis=2)
+    return np.concatenate([np.zeros_like(acumulado[:, :, :1]), acumulado], axis=2)
+
+
+class MatrizCorrelaciones:
+    """
+    Correlación de Pearson de todos los pares de métricas en cada ventana móvil de cada provincia,
+    precalculada con sus índices para recortar por par de métricas, provincia o periodo sin
+    recalcular. Guarda el centro de cada provincia y métrica y las últimas `ventana` sumas
+    acumuladas para poder extenderse un periodo a la vez.
+
+    Parámetros:
+    panel (np.ndarray): arreglo (P, T, M) con NaN donde falta el dato.
+    provincias, fechas, metricas: índices de los ejes del panel.
+    ventana (int): cantidad de periodos de cada ventana; `valores` tiene forma
+        (P, T - ventana + 1, M, M) y su posición t corresponde a la ventana que termina en el
+        periodo t + ventana - 1.
+    """
+
+    def __init__(self, panel, provincias, fechas, metricas, ventana=VENTANA_TRIMESTRES):
+        self.provincias = pd.Index(provincias, name="Provincia")
+        self.fechas_panel = pd.DatetimeIndex(fechas, name="Fecha")
+        self.fechas = self.fechas_panel[ventana - 1:]
+        self.metricas = list(metricas)
+        self.ventana = ventana
+        self.minimo = minimo_por_defecto(ventana)
+        # Centrar por provincia y métrica reduce la cancelación numérica de las sumas acumuladas; el
+        # centro queda fijo para los periodos que se agreguen después (la correlación no depende de él)
+        self._centro = np.nan_to_num(np.nanmean(panel, axis=1, keepdims=True))
+        acumulado = sumas_acumuladas(panel - self._centro)
+        self.valores = correlacion_desde_sumas(acumulado[:, :, ventana:] - acumulado[:, :, :-ventana], self.minimo)
+        self._acumulado = acumulado[:, :, -ventana:]
+        self._posicion = {metrica: i for i, metrica in enumerate(self.metricas)}
+
+    @classmethod
+    def desde_datos(cls, data, merged_data, acceso_rango, tecnologias, ventana=VENTANA_TRIMESTRES):
+        panel, provincias, fechas, metricas = construir_panel_metricas(data, merged_data, acceso_rango, tecnologias)
+        return cls(panel, provincias, fechas, metricas, ventana)
+
+    def extender(self, metricas_periodo):
+        """
+        Matriz nueva con un periodo más: su término se suma a la última suma acumulada y solo se
+        calcula la ventana que termina en él. Esta matriz no se modifica.
+
+        Parámetros:
+        metricas_periodo (pd.DataFrame): filas de tabla_metricas de un único periodo, posterior a
+            todos los de la matriz. Sin filas (el periodo no tiene todas las fuentes) la matriz no
+            cambia, igual que al reconstruirla; las provincias que no están en la matriz se ignoran.
+        """
+        if metricas_periodo.empty:
+            return self
+        fechas = metricas_periodo.index.get_level_values("Fecha").unique()
+        if len(fechas) != 1 or fechas[0] <= self.fechas_panel[-1]:
+            raise ValueError("Se espera un único periodo posterior a los de la matriz")
+
+        fila = metricas_periodo.droplevel("Fecha").reindex(index=self.provincias, columns=self.metricas)
+        acumulado = self._acumulado[:, :, -1:] + sumandos_pares(fila.to_numpy(dtype=float)[:, None, :] - self._centro)
+
+        extendida = copy.copy(self)
+        extendida.fechas_panel = self.fechas_panel.append(pd.DatetimeIndex(fechas, name="Fecha"))
+        if self._acumulado.shape[2] == self.ventana:
+            # La ventana nueva va de la suma acumulada más antigua guardada a la recién calculada
+            nueva = correlacion_desde_sumas(acumulado - self._acumulado[:, :, :1], self.minimo)
+            extendida.valores = np.concatenate([self.valores, nueva], axis=1)
+            extendida.fechas = self.fechas.append(pd.DatetimeIndex(fechas, name="Fecha"))
+        extendida._acumulado = np.concatenate([self._acumulado, acumulado], axis=2)[:, :, -self.ventana:]
+        return extendida
+
+    def par(self, metrica_x, metrica_y):
+        """Correlación del par en cada provincia (filas) y fin de ventana (columnas)."""
+        i, j = self._posicion[metrica_x], self._posicion[metrica_y]
+        return pd.DataFrame(self.valores[:, :, i, j], index=self.provincias, columns=self.fechas)
+
+    def matriz(self, provincia, fecha):
+        """Matriz métrica × métrica de una provincia en la ventana que termina en `fecha`."""
+        p = self.provincias.get_loc(provincia)
+        t = self.fechas.get_loc(pd.Timestamp(fecha))
+        return pd.DataFrame(self.valores[p, t], index=self.metricas, columns=self.metricas)
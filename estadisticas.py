@@ -0,0 +1,119 @@
+"""
+Estadísticas suficientes incrementales para correlación y regresión lineal simple.
+
+Se mantienen n, las medias y la matriz de co-momentos centrados (M2) de todas las métricas. Un
+lote nuevo (por ejemplo, un trimestre que se agrega) se combina en O(k²) con k métricas, sin
+recorrer los datos anteriores, y a partir de esos valores se obtienen Pearson r, su p-valor, la
+pendiente, el intercepto y el R² de cualquier par sin volver a ajustar nada.
+"""
+import copy
+import math
+
+import numpy as np
+
+
+class EstadisticasIncrementales:
+    """
+    Acumulador de co-momentos para un conjunto fijo de métricas (columnas).
+
+    Parámetros:
+    columnas (list): nombres de las métricas.
+    """
+
+    def __init__(self, columnas):
+        self.columnas = list(columnas)
+        self._posicion = {columna: i for i, columna in enumerate(self.columnas)}
+        k = len(self.columnas)
+        self.n = 0
+        self.media = np.zeros(k)
+        self.m2 = np.zeros((k, k))
+
+    @classmethod
+    def desde_dataframe(cls, df, columnas):
+        estadisticas = cls(columnas)
+        estadisticas.actualizar(df[list(columnas)])
+        return estadisticas
+
+    def actualizar(self, valores):
+        """
+        Agrega un lote de filas (DataFrame o array (filas, k)). Las filas con algún valor faltante
+        se descartan, igual que al calcular sobre el conjunto completo sin nulos.
+        """
+        valores = np.asarray(valores, dtype=float).reshape(-1, len(self.columnas))
+        valores = valores[~np.isnan(valores).any(axis=1)]
+        if len(valores) == 0:
+            return self
+        centrados = valores - valores.mean(axis=0)
+        self._combinar(len(valores), valores.mean(axis=0), centrados.T @ centrados)
+        return self
+
+    def con_lote(self, valores):
+        """
+        Acumulador nuevo con el lote agregado; este no se modifica, así quien lo esté leyendo
+        mientras se ingiere un trimestre no ve medias y co-momentos a medio actualizar.
+        """
+        # _combinar reemplaza media y m2 por arreglos nuevos: basta una copia superficial
+        return copy.copy(self).actualizar(valores)
+
+    def combinar(self, otro):
+        """Suma las estadísticas de otro acumulador con las mismas columnas (p. ej. otra partición)."""
+        if otro.columnas != self.columnas:
+            raise ValueError("Las columnas de ambos acumuladores deben coincidir")
+        if otro.n:
+            self._combinar(otro.n, otro.media, otro.m2)
+        return self
+
+    def _combinar(self, n_b, media_b, m2_b):
+        # Fórmula de Chan et al. para unir medias y co-momentos de dos particiones
+        n_a = self.n
+        n = n_a + n_b
+        delta = media_b - self.media
+        self.media = self.media + delta * (n_b / n)
+        self.m2 = self.m2 + m2_b + np.outer(delta, delta) * (n_a * n_b / n)
+        self.n = n
+
+    def _par(self, x, y):
+        i, j = self._posicion[x], self._posicion[y]
+        return self.m2[i, i], self.m2[j, j], self.m2[i, j], self.media[i], self.media[j]
+
+    def correlacion(self, x, y):
+        """Coeficiente de Pearson del par (NaN con menos de 3 filas o varianza nula), sin el p-valor."""
+        sxx, syy, sxy, _, _ = self._par(x, y)
+        if self.n < 3 or sxx == 0 or syy == 0:
+            return float("nan")
+        return max(-1.0, min(1.0, sxy / math.sqrt(sxx * syy)))
+
+    def pearson(self, x, y):
+        """
+        Retorna:
+        (r, p_valor): coeficiente de Pearson y p-valor bilateral (prueba t con n - 2 grados de libertad).
+        """
+        r = self.correlacion(x, y)
+        if math.isnan(r):
+            return r, float("nan")
+        if abs(r) == 1.0:
+            return r, 0.0
+        # scipy solo se necesita para la cola de la t de Student: se importa al usarla
+        from scipy.special import stdtr
+
+        gl = self.n - 2
+        t = r * math.sqrt(gl / (1 - r * r))
+        return r, float(2 * stdtr(gl, -abs(t)))
+
+    def regresion(self, x, y):
+        """
+        Regresión por mínimos cuadrados de `y` sobre `x`.
+
+        Retorna:
+        dict con pendiente, intercepto y r2.
+        """
+        sxx, syy, sxy, media_x, media_y = self._par(x, y)
+        if sxx == 0:
+            return {"pendiente": float("nan"), "intercepto": float("nan"), "r2": float("nan")}
+        pendiente = sxy / sxx
+        r2 = sxy * sxy / (sxx * syy) if syy else float("nan")
+        return {"pendiente": pendiente, "intercepto": media_y - pendiente * media_x, "r2": r2}
+
+    def resumen(self, x, y):
+        r, p_valor = self.pearson(x, y)
+        return dict(self.regresion(x, y), r=r, p_valor=p_valor, n=self.n)
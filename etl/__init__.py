@@ -0,0 +1,4 @@
+from etl.pipeline import HOJAS, ejecutar_pipeline
+from etl.outliers import corregir_outliers, corregir_outliers_paralelo, REGLAS_OUTLIERS
+from etl.transformaciones import detectar_outliers
+from etl.fechas import corregir_años_fuera_de_secuencia, fechas_trimestre, periodos_trimestre
@@ -0,0 +1,45 @@
+import argparse
+import sys
+import time
+
+from etl import validacion
+from etl.lectura import TAMANO_LOTE
+from etl.pipeline import DIRECTORIO_SALIDA, HOJAS, RUTA_EXCEL, ejecutar_pipeline
+
+
+def informar_progreso(hoja, terminadas, total, provincias, celdas):
+    print(f"{hoja!r}: limpieza {terminadas}/{total} ({len(provincias)} provincias, {celdas} celdas corregidas)", flush=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m etl',
+        description='ETL incremental de Internet.xlsx: solo reprocesa las hojas que cambiaron.'
+    )
+    parser.add_argument('--excel', default=RUTA_EXCEL, help='ruta al libro de ENACOM')
+    parser.add_argument('--salida', default=DIRECTORIO_SALIDA, help='carpeta de los CSV generados')
+    parser.add_argument('--hoja', action='append', choices=list(HOJAS), help='procesar solo esta hoja (repetible)')
+    parser.add_argument('--forzar', action='store_true', help='reprocesar todas las hojas')
+    parser.add_argument('--hilos', type=int, default=4, help='hojas procesadas en paralelo')
+    parser.add_argument('--lote', type=int, default=TAMANO_LOTE, help='filas leídas y escritas por lote (no acota la memoria de las hojas que se transforman completas)')
+    parser.add_argument('--procesos', type=int, default=None,
+                        help='procesos para la limpieza por provincia (por defecto, uno por núcleo); las hojas con menos '
+                             'de MIN_FILAS_PARALELO filas se limpian en el proceso actual')
+    args = parser.parse_args(argv)
+
+    inicio = time.perf_counter()
+    resultado = ejecutar_pipeline(args.excel, args.salida, hojas=args.hoja, forzar=args.forzar, hilos=args.hilos,
+                                  tamano_lote=args.lote, procesos=args.procesos, progreso=informar_progreso)
+    for hoja, info in resultado.items():
+        if info['estado'] == 'omitida':
+            print(f"{hoja!r}: sin cambios, omitida")
+        else:
+            print(f"{hoja!r}: {info['filas']} filas en {info['segundos']:.2f} s")
+    print(f"ETL completo en {time.perf_counter() - inicio:.2f} s")
+
+    # Los CSV generados se validan antes de que los use la app; con errores el código de salida es 1
+    return validacion.main([args.salida])
+
+
+if __name__ == '__main__':
+    sys.exit(main())
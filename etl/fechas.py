@@ -0,0 +1,85 @@
+"""
+Conversión de Año + Trimestre a fechas sin pasar por texto.
+
+Las hojas de ENACOM traen el periodo como dos columnas enteras. En lugar de armar un string por
+fila y parsearlo, se codifica cada par como un entero (año * 4 + trimestre - 1), se calculan con
+np.unique los pares distintos (unas decenas aunque haya millones de filas) y solo para ellos se
+construye la fecha con aritmética de datetime64; las filas la toman por índice.
+"""
+import numpy as np
+import pandas as pd
+
+
+def _codificar(años, trimestres):
+    años = np.asarray(años, dtype=np.int64)
+    trimestres = np.asarray(trimestres, dtype=np.int64)
+    if trimestres.size and (trimestres.min() < 1 or trimestres.max() > 4):
+        invalidos = np.unique(trimestres[(trimestres < 1) | (trimestres > 4)])
+        raise ValueError(f"Trimestres fuera de rango (1-4): {invalidos.tolist()}")
+    return años * 4 + trimestres - 1
+
+
+def fechas_trimestre(años, trimestres):
+    """
+    Primer día de cada trimestre como datetime64[ns] (p. ej. 2023, 4 -> 2023-10-01).
+
+    Parámetros:
+    años, trimestres: arreglos o Series de enteros del mismo largo.
+
+    Retorna:
+    np.ndarray datetime64[ns]
+    """
+    distintos, posiciones = np.unique(_codificar(años, trimestres), return_inverse=True)
+    # Meses desde 1970 de cada par distinto: (año - 1970) * 12 + (trimestre - 1) * 3
+    meses = (distintos // 4 - 1970) * 12 + (distintos % 4) * 3
+    return meses.astype('datetime64[M]').astype('datetime64[ns]')[posiciones]
+
+
+def periodos_trimestre(años, trimestres):
+    """
+    Periodos trimestrales (pd.PeriodDtype 'Q-DEC') a partir de los ordinales, sin fechas intermedias.
+
+    Retorna:
+    pd.arrays.PeriodArray
+    """
+    ordinales = _codificar(años, trimestres) - 1970 * 4
+    return pd.arrays.PeriodArray(ordinales, dtype=pd.PeriodDtype('Q-DEC'))
+
+
+def corregir_años_fuera_de_secuencia(fechas):
+    """
+    Corrige los bloques de filas con el año mal cargado.
+
+    Las hojas listan los trimestres en bloques contiguos y ordenados (decrecientes en las de
+    ENACOM). Un bloque que rompe ese orden pero que, con un año de diferencia, encaja justo entre
+    sus vecinos y no aparece en otro lugar de la hoja tiene el año mal cargado (p. ej. 2023 T4
+    cargado como 2024 T4 entre 2024 T1 y 2023 T3).
+
+    Parámetros:
+    fechas: fechas de inicio de trimestre, en el orden de la hoja.
+
+    Retorna:
+    (np.ndarray datetime64[ns] con las fechas corregidas, cantidad de filas corregidas)
+    """
+    meses = np.asarray(fechas, dtype='datetime64[ns]').astype('datetime64[M]').astype(np.int64)
+    trimestres = meses // 3
+    inicios = np.flatnonzero(np.r_[True, trimestres[1:] != trimestres[:-1]])
+    fines = np.r_[inicios[1:], len(trimestres)]
+    bloques = trimestres[inicios]
+    presentes = set(bloques.tolist())
+
+    corregidas = meses.copy()
+    filas = 0
+    for i in range(1, len(bloques) - 1):
+        anterior, actual, siguiente = bloques[i - 1], bloques[i], bloques[i + 1]
+        # 1 si la hoja va de los trimestres más nuevos a los más viejos, -1 si al revés
+        paso = np.sign(anterior - siguiente)
+        if paso == 0 or actual == anterior - paso:
+            continue
+        for desfase in (-4, 4):
+            candidato = actual + desfase
+            if candidato == anterior - paso == siguiente + paso and candidato not in presentes:
+                corregidas[inicios[i]:fines[i]] += desfase * 3
+                filas += fines[i] - inicios[i]
+                break
+    return corregidas.astype('datetime64[M]').astype('datetime64[ns]'), int(filas)
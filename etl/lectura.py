@@ -0,0 +1,85 @@
+"""
+Lectura por lotes de las hojas de Internet.xlsx.
+
+openpyxl en modo read_only recorre el XML de la hoja fila por fila sin cargarla entera; las filas
+se agrupan en DataFrames de a lotes, de modo que la memoria máxima depende del tamaño del lote y
+no del de la hoja. Las filas de notas al pie se descartan reteniendo las últimas filas leídas
+hasta saber que no son las finales.
+"""
+from collections import deque
+
+import pandas as pd
+
+
+TAMANO_LOTE = 5_000
+
+
+def nombres_columnas(encabezado):
+    # Mismos nombres que pd.read_excel: 'Unnamed: i' para celdas vacías y sufijos .1, .2 en repetidos
+    nombres = []
+    vistos = {}
+    for i, nombre in enumerate(encabezado):
+        nombre = f'Unnamed: {i}' if nombre is None else nombre
+        if nombre in vistos:
+            vistos[nombre] += 1
+            nombre = f'{nombre}.{vistos[nombre]}'
+        else:
+            vistos[nombre] = 0
+        nombres.append(nombre)
+    return nombres
+
+
+def leer_lotes(ruta, hoja, tamano_lote=TAMANO_LOTE, filas_pie=0):
+    """
+    Lee una hoja del libro en DataFrames de hasta `tamano_lote` filas. La primera fila es el
+    encabezado; las filas vacías al final de la hoja y las columnas vacías a la derecha del
+    encabezado se ignoran, como en pd.read_excel.
+
+    Parámetros:
+    ruta (str): ruta al libro .xlsx.
+    hoja (str): nombre de la hoja.
+    tamano_lote (int): filas por DataFrame.
+    filas_pie (int): filas finales a descartar (notas al pie de la hoja).
+
+    Retorna:
+    generador de DataFrames con los tipos que openpyxl asigna a cada celda.
+    """
+    from openpyxl import load_workbook
+
+    libro = load_workbook(ruta, read_only=True, data_only=True)
+    try:
+        filas = libro[hoja].iter_rows(values_only=True)
+        encabezado = next(filas, None)
+        if encabezado is None:
+            return
+        # Las celdas con formato pero vacías a la derecha del encabezado no son columnas; los datos
+        # que hubiera más allá de la última columna con nombre se descartan
+        ancho = len(encabezado)
+        while ancho and encabezado[ancho - 1] is None:
+            ancho -= 1
+        columnas = nombres_columnas(encabezado[:ancho])
+
+        retenidas = deque()
+        vacias = []
+        lote = []
+        leidos = 0
+        for fila in filas:
+            fila = tuple(fila[:ancho]) + (None,) * (ancho - len(fila))
+            if all(valor is None for valor in fila):
+                # Se confirman recién si aparece otra fila con datos después
+                vacias.append(fila)
+                continue
+            retenidas.extend(vacias)
+            retenidas.append(fila)
+            vacias = []
+            while len(retenidas) > filas_pie:
+                lote.append(retenidas.popleft())
+            if len(lote) >= tamano_lote:
+                yield pd.DataFrame.from_records(lote, columns=columnas)
+                leidos += 1
+                lote = []
+        if lote or not leidos:
+            # Una hoja sin datos produce un único lote vacío con las columnas del encabezado
+            yield pd.DataFrame.from_records(lote, columns=columnas)
+    finally:
+        libro.close()
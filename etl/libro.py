@@ -0,0 +1,98 @@
+import hashlib
+import posixpath
+import re
+import threading
+import zipfile
+import xml.etree.ElementTree as ET
+
+import pandas as pd
+
+from etl.lectura import TAMANO_LOTE, leer_lotes
+
+NS_PRINCIPAL = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+NS_RELACIONES = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+NS_PAQUETE = '{http://schemas.openxmlformats.org/package/2006/relationships}'
+
+PATRON_TEXTO_COMPARTIDO = re.compile(rb'<c\b[^>]*\bt="s"[^>]*>\s*<v>(\d+)</v>')
+TAMANO_BLOQUE_HUELLA = 1 << 20
+
+
+class LibroExcel:
+    """
+    Libro .xlsx abierto una sola vez. Permite leer hojas por lotes (cada lectura abre su propio
+    lector de openpyxl en modo read_only, así que varias hojas se leen en paralelo sin lock) y
+    calcular la huella de cada hoja directamente desde el XML comprimido, sin parsearla con pandas.
+    """
+
+    def __init__(self, ruta):
+        self.ruta = ruta
+        self._zip = zipfile.ZipFile(ruta)
+        self._lock = threading.Lock()
+        self._rutas_hojas = self._mapear_hojas()
+        self._textos = None
+
+    @property
+    def hojas(self):
+        return list(self._rutas_hojas)
+
+    def _mapear_hojas(self):
+        # workbook.xml asocia cada nombre de hoja a un id de relación; el .rels asocia el id al XML
+        relaciones = ET.fromstring(self._zip.read('xl/_rels/workbook.xml.rels'))
+        destinos = {rel.get('Id'): rel.get('Target') for rel in relaciones.iter(f'{NS_PAQUETE}Relationship')}
+        libro = ET.fromstring(self._zip.read('xl/workbook.xml'))
+        rutas = {}
+        for hoja in libro.iter(f'{NS_PRINCIPAL}sheet'):
+            destino = destinos[hoja.get(f'{NS_RELACIONES}id')]
+            rutas[hoja.get('name')] = destino.lstrip('/') if destino.startswith('/') else posixpath.join('xl', destino)
+        return rutas
+
+    def _textos_compartidos(self):
+        if self._textos is None:
+            try:
+                raiz = ET.fromstring(self._zip.read('xl/sharedStrings.xml'))
+            except KeyError:
+                raiz = None
+            self._textos = [] if raiz is None else [
+                ''.join(nodo.text or '' for nodo in item.iter(f'{NS_PRINCIPAL}t'))
+                for item in raiz.iter(f'{NS_PRINCIPAL}si')
+            ]
+        return self._textos
+
+    def huella(self, hoja, extra=b''):
+        """
+        SHA-256 del XML de la hoja y de los textos compartidos que referencia. Agregar datos
+        a otra hoja no cambia la huella de esta.
+        """
+        sha = hashlib.sha256(extra)
+        indices = set()
+        with self._lock:
+            textos = self._textos_compartidos()
+            # El XML se descomprime por bloques: la memoria no depende del tamaño de la hoja
+            with self._zip.open(self._rutas_hojas[hoja]) as xml:
+                cola = b''
+                for bloque in iter(lambda: xml.read(TAMANO_BLOQUE_HUELLA), b''):
+                    sha.update(bloque)
+                    buscado = cola + bloque
+                    indices.update(PATRON_TEXTO_COMPARTIDO.findall(buscado))
+                    # Una celda cortada entre bloques empieza en el último '<c' (o en un '<' final);
+                    # se vuelve a buscar con el bloque siguiente. Repetir celdas ya vistas no cambia el conjunto
+                    corte = buscado.rfind(b'<c')
+                    cola = buscado[corte if corte != -1 else len(buscado) - 1:]
+        for indice in sorted({int(i) for i in indices}):
+            sha.update(textos[indice].encode('utf-8') + b'\x00')
+        return sha.hexdigest()
+
+    def leer_lotes(self, hoja, tamano_lote=TAMANO_LOTE, filas_pie=0):
+        return leer_lotes(self.ruta, hoja, tamano_lote=tamano_lote, filas_pie=filas_pie)
+
+    def leer(self, hoja, filas_pie=0):
+        return pd.concat(self.leer_lotes(hoja, filas_pie=filas_pie), ignore_index=True)
+
+    def cerrar(self):
+        self._zip.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
@@ -0,0 +1,223 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+
+# Correcciones de outliers decididas en la revisión visual por provincia de ETL.ipynb.
+# Métodos: 'mediana' / 'media' de los valores que no son outliers (redondeadas hacia abajo),
+# 'media_total' (media de todos los valores) e 'interpolacion' lineal dentro de la provincia.
+# Las provincias y columnas que no figuran se dejan sin corregir.
+REGLAS_OUTLIERS = [
+    ('Buenos Aires', 'HASTA 512 kbps', 'mediana'),
+    ('Buenos Aires', '+ 6 Mbps - 10 Mbps', 'media'),
+    ('Buenos Aires', '+ 10 Mbps - 20 Mbps', 'mediana'),
+    ('Buenos Aires', '+ 20 Mbps - 30 Mbps', 'mediana'),
+    ('Capital Federal', 'HASTA 512 kbps', 'mediana'),
+    ('Capital Federal', '+ 512 Kbps - 1 Mbps', 'media'),
+    ('Capital Federal', '+ 6 Mbps - 10 Mbps', 'mediana'),
+    ('Capital Federal', '+ 20 Mbps - 30 Mbps', 'mediana'),
+    ('Capital Federal', 'OTROS', 'mediana'),
+    ('Catamarca', '+ 20 Mbps - 30 Mbps', 'mediana'),
+    ('Catamarca', 'OTROS', 'mediana'),
+    ('Córdoba', 'OTROS', 'mediana'),
+    ('Entre Ríos', 'HASTA 512 kbps', 'interpolacion'),
+    ('Entre Ríos', '+ 512 Kbps - 1 Mbps', 'interpolacion'),
+    ('Formosa', '+ 6 Mbps - 10 Mbps', 'mediana'),
+    ('Formosa', 'OTROS', 'mediana'),
+    ('Jujuy', 'OTROS', 'mediana'),
+    ('La Pampa', 'OTROS', 'mediana'),
+    ('La Rioja', 'OTROS', 'mediana'),
+    ('Mendoza', 'HASTA 512 kbps', 'mediana'),
+    ('Salta', 'HASTA 512 kbps', 'interpolacion'),
+    ('San Juan', 'HASTA 512 kbps', 'media_total'),
+    ('San Luis', '+ 1 Mbps - 6 Mbps', 'media_total'),
+    ('San Luis', '+ 6 Mbps - 10 Mbps', 'media_total'),
+    ('Santiago Del Estero', '+ 1 Mbps - 6 Mbps', 'interpolacion'),
+    ('Santiago Del Estero', '+ 10 Mbps - 20 Mbps', 'interpolacion'),
+]
+
+METODOS = ('mediana', 'media', 'media_total', 'interpolacion')
+
+# Por debajo de esta cantidad de filas el costo de levantar procesos supera al de corregir. La hoja
+# 'Accesos por velocidad' de Internet.xlsx tiene menos de mil filas: hoy se corrige en el proceso actual
+# y el reparto en procesos queda para hojas más grandes (p. ej. por departamento)
+MIN_FILAS_PARALELO = 20_000
+
+# El pipeline llama a la limpieza desde hilos que tienen abiertos lectores de openpyxl y del zip:
+# hacer fork de un proceso con varios hilos puede dejar locks tomados en el hijo. Los procesos se
+# crean desde un servidor de forks limpio (o con spawn donde no existe, como en Windows)
+METODO_INICIO_PROCESOS = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+
+
+def matriz_metodos(claves, columnas, reglas, metodo_por_defecto=None, grupo='Provincia'):
+    """
+    Expande la tabla de reglas a una matriz (filas, columnas) con el método de corrección de cada
+    celda (None donde no se corrige).
+    """
+    tabla = pd.DataFrame(list(reglas), columns=[grupo, 'columna', 'metodo'])
+    desconocidos = set(tabla['metodo']) - set(METODOS)
+    if metodo_por_defecto is not None:
+        desconocidos |= {metodo_por_defecto} - set(METODOS)
+    if desconocidos:
+        raise ValueError(f"Métodos de corrección desconocidos: {sorted(desconocidos)}")
+
+    metodos = (
+        tabla.drop_duplicates([grupo, 'columna'], keep='last')
+        .pivot(index=grupo, columns='columna', values='metodo')
+        .reindex(columns=columnas)
+        .reindex(pd.Index(claves).astype(object))
+    )
+    metodos = metodos.to_numpy(dtype=object)
+    metodos[pd.isna(metodos)] = metodo_por_defecto
+    return metodos
+
+
+def corregir_outliers(df, columnas=None, reglas=REGLAS_OUTLIERS, metodo_por_defecto=None, grupo='Provincia', factor=1.5):
+    """
+    Detecta outliers por IQR para todos los pares (grupo, columna) a la vez y los corrige con
+    escrituras vectorizadas enmascaradas.
+
+    Parámetros:
+    df (pd.DataFrame): datos en formato largo con la columna `grupo`.
+    columnas (list): columnas a revisar (por defecto, las que aparecen en `reglas`).
+    reglas (list): tuplas (grupo, columna, método) con la corrección de cada par.
+    metodo_por_defecto (str): método para los pares sin regla (None: no se corrigen).
+    grupo (str): columna que define los grupos (provincia, departamento, ...).
+    factor (float): multiplicador del IQR para los límites.
+
+    Retorna:
+    df_corregido: copia de `df` con las celdas corregidas.
+    auditoria: pd.DataFrame con una fila por celda modificada (índice, grupo, columna, valor
+        original, valor corregido, método y límites).
+    """
+    if columnas is None:
+        columnas = list(dict.fromkeys(columna for _, columna, _ in reglas))
+    claves = df[grupo]
+    valores = df[columnas].to_numpy(dtype=float)
+
+    # Cuartiles de todos los pares (grupo, columna) en una sola pasada agrupada
+    agrupado = df[columnas].astype(float).groupby(claves, sort=False, observed=True)
+    q1 = agrupado.transform('quantile', 0.25).to_numpy()
+    q3 = agrupado.transform('quantile', 0.75).to_numpy()
+    iqr = q3 - q1
+    limite_inf = q1 - factor * iqr
+    limite_sup = q3 + factor * iqr
+    es_outlier = (valores < limite_inf) | (valores > limite_sup)
+
+    metodos = matriz_metodos(claves, columnas, reglas, metodo_por_defecto, grupo)
+    corregir = es_outlier & pd.notna(metodos)
+
+    corregido = valores.copy()
+    aplicado = np.zeros_like(corregir)
+    if corregir.any():
+        limpio = pd.DataFrame(np.where(es_outlier, np.nan, valores), index=df.index, columns=columnas)
+        limpio_agrupado = limpio.groupby(claves.to_numpy(), sort=False)
+        usados = set(metodos[corregir])
+        reemplazos = {}
+        if 'mediana' in usados:
+            reemplazos['mediana'] = np.floor(limpio_agrupado.transform('median').to_numpy())
+        if 'media' in usados:
+            reemplazos['media'] = np.floor(limpio_agrupado.transform('mean').to_numpy())
+        if 'media_total' in usados:
+            reemplazos['media_total'] = agrupado.transform('mean').to_numpy()
+        if 'interpolacion' in usados:
+            reemplazos['interpolacion'] = limpio_agrupado.transform(lambda serie: serie.interpolate()).to_numpy()
+
+        for metodo, reemplazo in reemplazos.items():
+            # Si no hay valor de reemplazo (p. ej. un outlier al inicio de la serie al interpolar) se conserva el original
+            mascara = corregir & (metodos == metodo) & ~np.isnan(reemplazo)
+            corregido[mascara] = reemplazo[mascara]
+            aplicado |= mascara
+
+    filas, cols = np.nonzero(aplicado)
+    auditoria = pd.DataFrame({
+        'indice': df.index.to_numpy()[filas],
+        grupo: claves.to_numpy()[filas],
+        'columna': np.asarray(columnas, dtype=object)[cols],
+        'valor_original': valores[filas, cols],
+        'valor_corregido': corregido[filas, cols],
+        'metodo': metodos[filas, cols],
+        'limite_inferior': limite_inf[filas, cols],
+        'limite_superior': limite_sup[filas, cols],
+    })
+
+    df_corregido = df.copy()
+    df_corregido[columnas] = corregido
+    return df_corregido, auditoria
+
+
+def _corregir_particion(numero, df, columnas, reglas, metodo_por_defecto, grupo, factor):
+    df_corregido, auditoria = corregir_outliers(df, columnas, reglas, metodo_por_defecto, grupo, factor)
+    return numero, df_corregido, auditoria
+
+
+def corregir_outliers_paralelo(df, columnas=None, reglas=REGLAS_OUTLIERS, metodo_por_defecto=None, grupo='Provincia',
+                               factor=1.5, procesos=None, progreso=None, min_filas=MIN_FILAS_PARALELO):
+    """
+    Igual que corregir_outliers, pero particionando por `grupo` y corrigiendo las particiones en un
+    ProcessPoolExecutor. Cada grupo es independiente (cuartiles, medias e interpolación se calculan
+    dentro del grupo), así que el resultado es idéntico al secuencial: las filas vuelven a su orden
+    original y la auditoría queda ordenada por fila y columna.
+
+    Parámetros:
+    procesos (int): procesos a usar (por defecto, os.cpu_count()). Con 1, o con menos de
+        `min_filas` filas, se corrige en el proceso actual.
+    progreso (callable): opcional; se llama con (terminadas, total, grupos, celdas corregidas) al
+        terminar cada tarea.
+    (el resto, como en corregir_outliers)
+
+    Retorna:
+    (df_corregido, auditoria)
+    """
+    if columnas is None:
+        columnas = list(dict.fromkeys(columna for _, columna, _ in reglas))
+    procesos = (os.cpu_count() or 1) if procesos is None else procesos
+    reglas = list(reglas)
+
+    # Posiciones de las filas de cada grupo
+    posiciones = pd.Series(np.arange(len(df))).groupby(df[grupo].to_numpy(), sort=False).indices
+    particiones = list(posiciones.items())
+    # La unión por etiquetas requiere un índice único, y las filas sin grupo no caen en ninguna partición
+    secuencial = not df.index.is_unique or df[grupo].isna().any()
+    if secuencial or procesos <= 1 or len(particiones) < 2 or len(df) < min_filas:
+        df_corregido, auditoria = corregir_outliers(df, columnas, reglas, metodo_por_defecto, grupo, factor)
+        if progreso is not None:
+            progreso(1, 1, [clave for clave, _ in particiones], len(auditoria))
+        return df_corregido, auditoria
+
+    # De mayor a menor, repartidas en ronda: las tareas quedan con cantidades de filas parecidas
+    particiones.sort(key=lambda particion: -len(particion[1]))
+    n_tareas = min(len(particiones), procesos * 4)
+    tareas = [particiones[i::n_tareas] for i in range(n_tareas)]
+
+    resultados = [None] * n_tareas
+    contexto = multiprocessing.get_context(METODO_INICIO_PROCESOS)
+    with ProcessPoolExecutor(max_workers=min(procesos, n_tareas), mp_context=contexto) as ejecutor:
+        futuros = {}
+        for numero, tarea in enumerate(tareas):
+            claves = {clave for clave, _ in tarea}
+            filas = np.sort(np.concatenate([indices for _, indices in tarea]))
+            reglas_tarea = [regla for regla in reglas if regla[0] in claves]
+            futuro = ejecutor.submit(_corregir_particion, numero, df.iloc[filas], columnas, reglas_tarea,
+                                     metodo_por_defecto, grupo, factor)
+            futuros[futuro] = [clave for clave, _ in tarea]
+        for terminadas, futuro in enumerate(as_completed(futuros), start=1):
+            numero, df_tarea, auditoria_tarea = futuro.result()
+            resultados[numero] = (df_tarea, auditoria_tarea)
+            if progreso is not None:
+                progreso(terminadas, n_tareas, futuros[futuro], len(auditoria_tarea))
+
+    # Unión determinística: filas en el orden original, auditoría por (fila, columna) como en la secuencial
+    df_corregido = pd.concat([df_tarea for df_tarea, _ in resultados])
+    df_corregido = df_corregido.iloc[np.argsort(df.index.get_indexer(df_corregido.index))]
+    auditoria = pd.concat([auditoria_tarea for _, auditoria_tarea in resultados], ignore_index=True)
+    orden = np.lexsort((
+        pd.Index(columnas).get_indexer(auditoria['columna']),
+        df.index.get_indexer(auditoria['indice']),
+    ))
+    auditoria = auditoria.iloc[orden].reset_index(drop=True)
+    df_corregido.attrs = df.attrs
+    return df_corregido, auditoria
@@ -0,0 +1,132 @@
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import pandas as pd
+
+from etl import fechas, lectura, outliers, transformaciones
+from etl.libro import LibroExcel
+
+
+RUTA_EXCEL = './Datasets/Internet.xlsx'
+DIRECTORIO_SALIDA = './Datasets'
+ARCHIVO_MANIFIESTO = '.etl_manifiesto.json'
+
+# Hoja del libro -> (CSV de salida, transformación por lote, transformación de la hoja completa, filas al pie)
+# Las hojas sin transformación completa se procesan y escriben lote a lote, con memoria constante.
+# 'Accesos por velocidad' no: la media de 'OTROS', la corrección de trimestres y los cuartiles por
+# provincia necesitan todas sus filas, así que sus lotes ya transformados se juntan en memoria y
+# el tamaño del lote no acota la memoria de esa hoja (solo la de la lectura del XML)
+HOJAS = {
+    'Velocidad % por prov': ('vel_media_provincia.csv', transformaciones.transformar_velocidad_provincia, None, 0),
+    'Accesos Por Tecnología': ('tecnologia_provincia.csv', transformaciones.transformar_tecnologia_provincia, None,
+                               transformaciones.FILAS_PIE_TECNOLOGIA),
+    'Penetración-poblacion': ('penetracion_poblac.csv', transformaciones.transformar_penetracion, None, 0),
+    'Penetracion-hogares': ('penetracion_hogar.csv', transformaciones.transformar_penetracion, None, 0),
+    'Accesos por velocidad': ('Acceso_rango_provincia.csv', transformaciones.transformar_acceso_rango,
+                              transformaciones.completar_acceso_rango, 0),
+    'Ingresos ': ('ingresos_total.csv', transformaciones.transformar_ingresos, None, 0),
+}
+
+
+def version_transformaciones():
+    # Cambiar el código de las transformaciones (o las reglas de outliers) invalida todas las salidas
+    hasher = hashlib.sha256()
+    for modulo in (transformaciones, outliers, lectura, fechas):
+        with open(modulo.__file__, 'rb') as archivo:
+            hasher.update(archivo.read())
+    return hasher.hexdigest().encode()
+
+
+def leer_manifiesto(directorio_salida):
+    try:
+        with open(os.path.join(directorio_salida, ARCHIVO_MANIFIESTO), encoding='utf-8') as archivo:
+            return json.load(archivo)
+    except (OSError, ValueError):
+        return {}
+
+
+def escribir_manifiesto(directorio_salida, manifiesto):
+    ruta = os.path.join(directorio_salida, ARCHIVO_MANIFIESTO)
+    with open(f"{ruta}.tmp", 'w', encoding='utf-8') as archivo:
+        json.dump(manifiesto, archivo, indent=2, ensure_ascii=False)
+    os.replace(f"{ruta}.tmp", ruta)
+
+
+def procesar_hoja(libro, hoja, directorio_salida, tamano_lote=lectura.TAMANO_LOTE, procesos=None, progreso=None):
+    inicio = time.perf_counter()
+    archivo_salida, transformar, completar, filas_pie = HOJAS[hoja]
+    ruta_salida = os.path.join(directorio_salida, archivo_salida)
+    # Generador: cada lote se lee, se transforma y se escribe antes de leer el siguiente
+    lotes = (transformar(lote) for lote in libro.leer_lotes(hoja, tamano_lote=tamano_lote, filas_pie=filas_pie))
+
+    if completar is not None:
+        # La hoja entera en memoria: la lectura es por lotes, pero la transformación no
+        avance = None if progreso is None else (lambda *estado: progreso(hoja, *estado))
+        df = completar(pd.concat(lotes, ignore_index=True), procesos=procesos, progreso=avance)
+        auditoria = df.attrs.pop('auditoria_outliers', None)
+        df.to_csv(ruta_salida, index=False)
+        if auditoria is not None:
+            nombre_auditoria = f"auditoria_{os.path.splitext(archivo_salida)[0]}.csv"
+            auditoria.to_csv(os.path.join(directorio_salida, nombre_auditoria), index=False)
+        return len(df), time.perf_counter() - inicio
+
+    filas = 0
+    with open(f"{ruta_salida}.tmp", 'w', encoding='utf-8', newline='') as archivo:
+        for numero, lote in enumerate(lotes):
+            lote.to_csv(archivo, index=False, header=numero == 0)
+            filas += len(lote)
+    os.replace(f"{ruta_salida}.tmp", ruta_salida)
+    return filas, time.perf_counter() - inicio
+
+
+def ejecutar_pipeline(ruta_excel=RUTA_EXCEL, directorio_salida=DIRECTORIO_SALIDA, hojas=None, forzar=False, hilos=4,
+                      tamano_lote=lectura.TAMANO_LOTE, procesos=None, progreso=None):
+    """
+    Ejecuta el ETL de forma incremental: abre el libro una vez, calcula la huella de cada hoja y
+    solo vuelve a procesar las hojas cuya huella cambió o cuyo CSV de salida no existe. Las hojas
+    pendientes se procesan en paralelo.
+
+    Parámetros:
+    ruta_excel (str): ruta al libro de ENACOM.
+    directorio_salida (str): carpeta donde se escriben los CSV y el manifiesto.
+    hojas (list): subconjunto de hojas a considerar (por defecto todas las de HOJAS).
+    forzar (bool): reprocesar aunque la huella no haya cambiado.
+    hilos (int): cantidad de hojas procesadas en paralelo.
+    tamano_lote (int): filas leídas y escritas por lote.
+    procesos (int): procesos para la limpieza por provincia (por defecto, uno por núcleo).
+    progreso (callable): opcional; recibe (hoja, terminadas, total, provincias, celdas corregidas)
+        a medida que termina cada partición de la limpieza.
+
+    Retorna:
+    dict hoja -> estado ('procesada' u 'omitida'), filas y segundos.
+    """
+    hojas = list(HOJAS) if hojas is None else hojas
+    manifiesto = leer_manifiesto(directorio_salida)
+    version = version_transformaciones()
+    resultado = {}
+
+    with LibroExcel(ruta_excel) as libro:
+        huellas = {hoja: libro.huella(hoja, extra=version) for hoja in hojas}
+        pendientes = [
+            hoja for hoja in hojas
+            if forzar
+            or manifiesto.get(hoja) != huellas[hoja]
+            or not os.path.exists(os.path.join(directorio_salida, HOJAS[hoja][0]))
+        ]
+        for hoja in hojas:
+            if hoja not in pendientes:
+                resultado[hoja] = {'estado': 'omitida', 'filas': None, 'segundos': 0.0}
+
+        with ThreadPoolExecutor(max_workers=max(1, hilos)) as ejecutor:
+            futuros = {ejecutor.submit(procesar_hoja, libro, hoja, directorio_salida, tamano_lote, procesos, progreso): hoja for hoja in pendientes}
+            for futuro in as_completed(futuros):
+                hoja = futuros[futuro]
+                filas, segundos = futuro.result()
+                manifiesto[hoja] = huellas[hoja]
+                resultado[hoja] = {'estado': 'procesada', 'filas': filas, 'segundos': segundos}
+
+    escribir_manifiesto(directorio_salida, manifiesto)
+    return resultado
@@ -0,0 +1,86 @@
+import numpy as np
+import pandas as pd
+
+from etl.fechas import corregir_años_fuera_de_secuencia, fechas_trimestre
+from etl.outliers import corregir_outliers_paralelo
+
+
+COLUMNAS_VELOCIDAD = ['HASTA 512 kbps', '+ 512 Kbps - 1 Mbps', '+ 1 Mbps - 6 Mbps', '+ 6 Mbps - 10 Mbps',
+                      '+ 10 Mbps - 20 Mbps', '+ 20 Mbps - 30 Mbps', '+ 30 Mbps', 'OTROS', 'Total']
+
+def detectar_outliers(df, columna):
+    """
+    Función para detectar outliers en una columna de un DataFrame usando el método del rango intercuartílico (IQR).
+
+    Parámetros:
+    df (pd.DataFrame): DataFrame que contiene los datos.
+    columna (str): El nombre de la columna en la que se buscan outliers.
+
+    Retorna:
+    outliers: una lista con los indices donde se encuentran los outliers
+    """
+    Q1 = df[columna].quantile(0.25)
+    Q3 = df[columna].quantile(0.75)
+    IQR = Q3 - Q1
+    limite_inf = Q1 - 1.5 * IQR
+    limite_sup = Q3 + 1.5 * IQR
+    return df[(df[columna] < limite_inf) | (df[columna] > limite_sup)].index.tolist()
+
+
+# Filas de notas al pie al final de la hoja 'Accesos Por Tecnología'
+FILAS_PIE_TECNOLOGIA = 2
+
+
+def agregar_fecha(df):
+    ## Combinar Columnas Año y Trimestre a columna Fecha tipo datetime (sin pasar por texto)
+    df['Fecha'] = fechas_trimestre(df['Año'], df['Trimestre'])
+    return df.drop(columns=['Año', 'Trimestre'])
+
+
+def transformar_velocidad_provincia(df):
+    df = agregar_fecha(df)
+    #redondeo a dos cifras decimales de la velocidad media
+    df['Mbps (Media de bajada)'] = df['Mbps (Media de bajada)'].round(2)
+    return df
+
+
+def transformar_tecnologia_provincia(df):
+    #Las dos ultimas filas de la hoja (notas al pie) las descarta el lector (FILAS_PIE_TECNOLOGIA)
+
+    #se observan en el dataset valores con asteriscos
+    for columna in ['Año', 'Trimestre']:
+        df[columna] = pd.to_numeric(df[columna].replace({r'\*': ''}, regex=True), errors='coerce').astype(int)
+    return agregar_fecha(df)
+
+
+def transformar_penetracion(df):
+    return agregar_fecha(df)
+
+
+def transformar_acceso_rango(df):
+    return agregar_fecha(df)
+
+
+def completar_acceso_rango(df, procesos=None, progreso=None):
+    # Necesita la hoja completa: los bloques de trimestres vecinos, la media de 'OTROS' y las correcciones por provincia
+    # Se observa un bloque de trimestres con el año mal cargado (2023 T4 figura como 2024 T4)
+    df['Fecha'], _ = corregir_años_fuera_de_secuencia(df['Fecha'])
+    # Se observan accesos negativos en 'OTROS': son errores de carga y se tratan como faltantes
+    df['OTROS'] = df['OTROS'].mask(df['OTROS'] < 0)
+    # Se tratan los valores faltantes de la columna 'OTROS' con la media
+    df['OTROS'] = df['OTROS'].fillna(round(df['OTROS'].mean(), 2))
+    # Cada provincia se corrige por separado, en paralelo si la hoja es grande
+    df, auditoria = corregir_outliers_paralelo(df, procesos=procesos, progreso=progreso)
+    # La auditoría de celdas corregidas viaja en attrs para que el pipeline la guarde junto al CSV
+    df.attrs['auditoria_outliers'] = auditoria
+    return df
+
+
+def transformar_ingresos(df):
+    #Se observan registros con el año mal cargado: se toma el año del texto del periodo (p. ej. 'Ene-Mar 2023')
+    año_periodo = pd.to_numeric(df['Periodo'].astype(str).str.extract(r'(\d{4})\s*$')[0], errors='coerce')
+    df['Año'] = np.where(año_periodo.notna(), año_periodo, df['Año']).astype(int)
+    df = agregar_fecha(df)
+    # Redondear la columna 'Ingresos (miles de pesos)' a dos cifras decimales
+    df['Ingresos (miles de pesos)'] = df['Ingresos (miles de pesos)'].round(2)
+    return df
@@ -0,0 +1,168 @@
+"""
+Validación de los CSV generados por el ETL antes de que los cargue la app.
+
+Cada archivo se revisa con operaciones vectorizadas sobre arreglos de NumPy, en una pasada por
+chequeo: columnas esperadas, nulos, claves (Provincia, Fecha) duplicadas, fechas monótonas dentro
+de cada provincia, valores negativos, totales en cero y sumas de componentes contra `Total`.
+Los hallazgos tienen severidad 'error' (la carga se detiene con ErrorValidacion) o 'advertencia'
+(solo se informan).
+
+    python -m etl.validacion [directorio]
+"""
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+from etl.transformaciones import COLUMNAS_VELOCIDAD
+
+
+TECNOLOGIAS = ['ADSL', 'Cablemodem', 'Fibra óptica', 'Wireless', 'Otros']
+RANGOS_VELOCIDAD = [columna for columna in COLUMNAS_VELOCIDAD if columna != 'Total']
+CLAVES = ['Provincia', 'Fecha']
+MAX_EJEMPLOS = 5
+
+# Nombre de la tabla -> métricas y sumas a verificar: (componentes, total, tolerancia relativa, severidad)
+# Los rangos de velocidad no suman exactamente Total después de la corrección de outliers del ETL
+REGLAS = {
+    'vel_media_provincia': {'metricas': ['Mbps (Media de bajada)'], 'sumas': []},
+    'penetracion_hogar': {'metricas': ['Accesos por cada 100 hogares'], 'sumas': []},
+    'penetracion_poblac': {'metricas': ['Accesos por cada 100 hab'], 'sumas': []},
+    'tecnologia_provincia': {
+        'metricas': TECNOLOGIAS + ['Total'],
+        'sumas': [(TECNOLOGIAS, 'Total', 1e-3, 'error')],
+    },
+    'acceso_rango_provincia': {
+        'metricas': RANGOS_VELOCIDAD + ['Total'],
+        'sumas': [(RANGOS_VELOCIDAD, 'Total', 1e-3, 'advertencia')],
+    },
+}
+
+
+class ErrorValidacion(Exception):
+    """Algún archivo no cumple una verificación de severidad 'error'; `hallazgos` trae el detalle."""
+
+    def __init__(self, hallazgos):
+        self.hallazgos = hallazgos
+        super().__init__("Datos inválidos:\n" + formatear_reporte(hallazgos))
+
+
+def _hallazgo(tabla, chequeo, severidad, mascara, df):
+    filas = np.flatnonzero(mascara)
+    if len(filas) == 0:
+        return None
+    return {
+        'tabla': tabla,
+        'chequeo': chequeo,
+        'severidad': severidad,
+        'filas': int(len(filas)),
+        'ejemplos': df.index[filas[:MAX_EJEMPLOS]].tolist(),
+    }
+
+
+def fechas_no_monotonas(provincias, fechas):
+    """
+    Máscara de las filas cuya fecha rompe el orden de su provincia: en cada provincia las fechas
+    deben ser estrictamente crecientes o estrictamente decrecientes en el orden del archivo.
+    """
+    # Código 0 para las provincias nulas (ya informadas como claves nulas)
+    codigos = pd.Categorical(provincias).codes.astype(np.int64) + 1
+    if len(codigos) == 0:
+        return np.zeros(0, dtype=bool)
+    fechas = np.asarray(fechas, dtype='datetime64[ns]').astype(np.int64)
+    orden = np.argsort(codigos, kind='stable')
+    codigos_orden = codigos[orden]
+    misma = codigos_orden[1:] == codigos_orden[:-1]
+    signo = np.sign(np.diff(fechas[orden]))
+
+    # Dirección de cada provincia: la de la mayoría de sus pasos
+    n_grupos = codigos.max() + 1
+    crecientes = np.bincount(codigos_orden[1:][misma], weights=(signo[misma] > 0), minlength=n_grupos)
+    pasos = np.bincount(codigos_orden[1:][misma], minlength=n_grupos)
+    direccion = np.where(crecientes * 2 >= pasos, 1, -1)
+
+    rompe = np.zeros(len(codigos), dtype=bool)
+    rompe[orden[1:]] = misma & (signo != direccion[codigos_orden[1:]])
+    return rompe
+
+
+def validar_tabla(df, tabla, reglas=None):
+    """
+    Aplica las verificaciones de `tabla` a `df`.
+
+    Retorna:
+    lista de hallazgos (dict con tabla, chequeo, severidad, filas afectadas y ejemplos de índice).
+    """
+    reglas = REGLAS[tabla] if reglas is None else reglas
+    metricas = reglas['metricas']
+    faltantes = [columna for columna in CLAVES + metricas if columna not in df.columns]
+    if faltantes:
+        # Sin las columnas no tiene sentido seguir revisando la tabla
+        return [{'tabla': tabla, 'chequeo': f"columnas faltantes: {faltantes}", 'severidad': 'error',
+                 'filas': int(len(df)), 'ejemplos': []}]
+
+    valores = df[metricas].to_numpy(dtype=float)
+    nulos_metricas = np.isnan(valores)
+    hallazgos = [
+        _hallazgo(tabla, 'claves nulas', 'error', df[CLAVES].isna().to_numpy().any(axis=1), df),
+        _hallazgo(tabla, 'clave (Provincia, Fecha) duplicada', 'error', df.duplicated(CLAVES, keep='first').to_numpy(), df),
+        _hallazgo(tabla, 'fechas no monótonas dentro de la provincia', 'error',
+                  fechas_no_monotonas(df['Provincia'], df['Fecha']), df),
+        _hallazgo(tabla, 'métricas nulas', 'advertencia', nulos_metricas.any(axis=1), df),
+        _hallazgo(tabla, 'valores negativos', 'error', (valores < 0).any(axis=1), df),
+    ]
+    if 'Total' in metricas:
+        hallazgos.append(_hallazgo(tabla, 'Total en cero', 'advertencia', df['Total'].to_numpy(dtype=float) == 0, df))
+    for componentes, total, tolerancia, severidad in reglas['sumas']:
+        suma = df[componentes].to_numpy(dtype=float).sum(axis=1)
+        esperado = df[total].to_numpy(dtype=float)
+        diferencia = np.abs(suma - esperado) > tolerancia * np.maximum(np.abs(esperado), 1.0)
+        hallazgos.append(_hallazgo(tabla, f"suma de {len(componentes)} columnas distinta de {total}", severidad, diferencia, df))
+    return [hallazgo for hallazgo in hallazgos if hallazgo is not None]
+
+
+def validar_datos(tablas, detener_en_error=True):
+    """
+    Valida cada tabla con reglas definidas en REGLAS (las demás se ignoran).
+
+    Parámetros:
+    tablas (dict): nombre -> DataFrame.
+    detener_en_error (bool): lanzar ErrorValidacion apenas una tabla tenga errores.
+
+    Retorna:
+    lista de hallazgos (advertencias, o también errores si no se detiene).
+    """
+    hallazgos = []
+    for tabla, df in tablas.items():
+        if tabla not in REGLAS:
+            continue
+        hallazgos += validar_tabla(df, tabla)
+        if detener_en_error and any(hallazgo['severidad'] == 'error' for hallazgo in hallazgos):
+            raise ErrorValidacion(hallazgos)
+    return hallazgos
+
+
+def formatear_reporte(hallazgos):
+    if not hallazgos:
+        return "Sin hallazgos"
+    return "\n".join(
+        f"[{hallazgo['severidad']}] {hallazgo['tabla']}: {hallazgo['chequeo']} "
+        f"({hallazgo['filas']} filas; p. ej. {hallazgo['ejemplos']})"
+        for hallazgo in hallazgos
+    )
+
+
+def main(argv=None):
+    from cache_datos import ARCHIVOS_CSV, DIRECTORIO_DATOS, leer_csv
+
+    argv = sys.argv[1:] if argv is None else argv
+    directorio = argv[0] if argv else DIRECTORIO_DATOS
+    tablas = {nombre: leer_csv(os.path.join(directorio, archivo)) for nombre, archivo in ARCHIVOS_CSV.items()}
+    hallazgos = validar_datos(tablas, detener_en_error=False)
+    print(formatear_reporte(hallazgos))
+    return 1 if any(hallazgo['severidad'] == 'error' for hallazgo in hallazgos) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,218 @@
+"""
+Generador de datos sintéticos con el mismo esquema que los CSV de Datasets/.
+
+Produce versiones de vel_media_provincia.csv, tecnologia_provincia.csv, penetracion_hogar.csv,
+penetracion_poblac.csv y Acceso_rango_provincia.csv para miles de regiones (departamentos,
+municipios) con periodos mensuales, más un GeoJSON de polígonos en grilla con la propiedad
+"nombre" como Mapas/map.geojson. Todo se escribe a disco por bloques de regiones, así que el
+uso de memoria depende del tamaño del bloque y no de la cantidad total de filas.
+
+Uso:
+    python generar_datos.py --regiones 5000 --periodos 120 --salida ./Datasets_sinteticos
+"""
+import argparse
+import json
+import math
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+TECNOLOGIAS = ["ADSL", "Cablemodem", "Fibra óptica", "Wireless", "Otros"]
+RANGOS_VELOCIDAD = ['HASTA 512 kbps', '+ 512 Kbps - 1 Mbps', '+ 1 Mbps - 6 Mbps', '+ 6 Mbps - 10 Mbps',
+                    '+ 10 Mbps - 20 Mbps', '+ 20 Mbps - 30 Mbps', '+ 30 Mbps', 'OTROS']
+# Límite superior (Mbps) de cada rango, sin contar OTROS
+LIMITES_RANGOS = [0.5, 1, 6, 10, 20, 30, 100]
+
+# Tendencia anual de cada tecnología en la escala logit: el ADSL cae, la fibra crece
+TENDENCIA_TECNOLOGIAS = np.array([-0.45, 0.0, 0.55, 0.05, -0.1])
+
+# Caja aproximada de Argentina (lon_min, lat_min, lon_max, lat_max) para la grilla de polígonos
+CAJA_GEOJSON = (-73.6, -55.1, -53.6, -21.8)
+
+ARCHIVOS = {
+    "velocidad": "vel_media_provincia.csv",
+    "tecnologia": "tecnologia_provincia.csv",
+    "hogar": "penetracion_hogar.csv",
+    "poblacion": "penetracion_poblac.csv",
+    "rangos": "Acceso_rango_provincia.csv",
+}
+
+
+def nombres_regiones(inicio, fin, total):
+    ancho = len(str(total))
+    return [f"Región {i:0{ancho}d}" for i in range(inicio + 1, fin + 1)]
+
+
+def repartir(total, proporciones):
+    """
+    Reparte `total` (R, T) en enteros según `proporciones` (R, T, K) de modo que la suma sea
+    exactamente el total: se redondea hacia abajo y el resto va a la categoría más grande.
+    """
+    cantidades = np.floor(total[..., None] * proporciones)
+    resto = total - cantidades.sum(axis=-1)
+    mayor = proporciones.argmax(axis=-1)
+    np.put_along_axis(cantidades, mayor[..., None], np.take_along_axis(cantidades, mayor[..., None], -1) + resto[..., None], -1)
+    return cantidades
+
+
+def softmax(logits):
+    exp = np.exp(logits - logits.max(axis=-1, keepdims=True))
+    return exp / exp.sum(axis=-1, keepdims=True)
+
+
+def generar_bloque(rng, regiones, fechas):
+    """
+    Genera los cinco datasets para un bloque de regiones y todos los periodos.
+
+    Parámetros:
+    rng (np.random.Generator): generador aleatorio del bloque.
+    regiones (list): nombres de las regiones del bloque.
+    fechas (pd.DatetimeIndex): periodos mensuales.
+
+    Retorna:
+    dict con un DataFrame por archivo de ARCHIVOS.
+    """
+    n_regiones, n_periodos = len(regiones), len(fechas)
+    años = (np.arange(n_periodos) / 12.0)[None, :]
+
+    # Hogares y habitantes fijos por región
+    hogares = np.round(rng.lognormal(9.0, 1.3, n_regiones))[:, None] + 50
+    habitantes = hogares * rng.uniform(2.8, 3.6, (n_regiones, 1))
+
+    # Penetración en hogares con crecimiento saturado y ruido trimestral
+    inicial = rng.uniform(20, 70, (n_regiones, 1))
+    maximo = inicial + rng.uniform(20, 60, (n_regiones, 1))
+    ritmo = rng.uniform(0.1, 0.4, (n_regiones, 1))
+    penetracion = maximo - (maximo - inicial) * np.exp(-ritmo * años)
+    penetracion = penetracion * rng.normal(1, 0.01, (n_regiones, n_periodos))
+    total = np.maximum(np.round(penetracion / 100 * hogares), 1)
+
+    # Mezcla de tecnologías que migra hacia la fibra
+    base_tecnologias = rng.normal(0, 0.8, (n_regiones, 1, len(TECNOLOGIAS))) + np.array([1.0, 1.0, -1.5, -0.5, -1.0])
+    proporciones_tecnologias = softmax(base_tecnologias + TENDENCIA_TECNOLOGIAS * años[..., None])
+    tecnologias = repartir(total, proporciones_tecnologias)
+
+    # La velocidad media sube con el tiempo y con la proporción de fibra
+    velocidad = rng.lognormal(1.3, 0.5, (n_regiones, 1)) * np.exp(rng.uniform(0.2, 0.45, (n_regiones, 1)) * años)
+    velocidad = velocidad * (1 + 2 * proporciones_tecnologias[..., 2]) * rng.normal(1, 0.03, (n_regiones, n_periodos))
+    velocidad = np.maximum(velocidad, 0.3)
+
+    # Accesos por rango: se concentran alrededor del rango de la velocidad media
+    posicion = np.interp(np.log(velocidad), np.log(LIMITES_RANGOS), np.arange(len(LIMITES_RANGOS)))
+    logits_rangos = -0.5 * (np.arange(len(LIMITES_RANGOS)) - posicion[..., None]) ** 2
+    proporciones_rangos = softmax(logits_rangos) * 0.99
+    proporciones_rangos = np.concatenate([proporciones_rangos, np.full((n_regiones, n_periodos, 1), 0.01)], axis=-1)
+    rangos = repartir(total, proporciones_rangos)
+
+    # Formato largo: una fila por (región, periodo), igual que los CSV de Datasets/
+    provincia = np.repeat(np.asarray(regiones, dtype=object), n_periodos)
+    fecha = np.tile(fechas.strftime("%Y-%m-%d").to_numpy(dtype=object), n_regiones)
+    total_largo = total.reshape(-1)
+
+    def largo(matriz, columnas):
+        return pd.DataFrame(matriz.reshape(-1, len(columnas)), columns=columnas)
+
+    tecnologia_df = largo(tecnologias, TECNOLOGIAS)
+    tecnologia_df.insert(0, "Provincia", provincia)
+    tecnologia_df["Total"] = total_largo
+    tecnologia_df["Fecha"] = fecha
+
+    rangos_df = largo(rangos, RANGOS_VELOCIDAD)
+    rangos_df.insert(0, "Provincia", provincia)
+    rangos_df["Total"] = total_largo
+    rangos_df["Fecha"] = fecha
+
+    return {
+        "velocidad": pd.DataFrame({"Provincia": provincia, "Mbps (Media de bajada)": velocidad.reshape(-1).round(2), "Fecha": fecha}),
+        "tecnologia": tecnologia_df,
+        "hogar": pd.DataFrame({"Provincia": provincia, "Accesos por cada 100 hogares": (total / hogares * 100).reshape(-1).round(2), "Fecha": fecha}),
+        "poblacion": pd.DataFrame({"Provincia": provincia, "Accesos por cada 100 hab": (total / habitantes * 100).reshape(-1).round(2), "Fecha": fecha}),
+        "rangos": rangos_df,
+    }
+
+
+def features_grilla(inicio, fin, total, nombres):
+    """Polígonos rectangulares de una grilla sobre CAJA_GEOJSON para las regiones [inicio, fin)."""
+    lon_min, lat_min, lon_max, lat_max = CAJA_GEOJSON
+    columnas = math.ceil(math.sqrt(total))
+    filas = math.ceil(total / columnas)
+    ancho = (lon_max - lon_min) / columnas
+    alto = (lat_max - lat_min) / filas
+    for indice, nombre in zip(range(inicio, fin), nombres):
+        fila, columna = divmod(indice, columnas)
+        x0, y0 = lon_min + columna * ancho, lat_max - (fila + 1) * alto
+        x1, y1 = x0 + ancho, y0 + alto
+        anillo = [[round(x, 5), round(y, 5)] for x, y in [(x0, y0), (x1, y0), (x1, y1), (x0, y1), (x0, y0)]]
+        yield {"type": "Feature", "properties": {"nombre": nombre}, "geometry": {"type": "Polygon", "coordinates": [anillo]}}
+
+
+def generar_datos(directorio_salida, n_regiones=5000, n_periodos=120, inicio="2014-01-01",
+                  filas_por_bloque=500_000, semilla=0, geojson=True):
+    """
+    Escribe los cinco CSV (y el GeoJSON) por bloques de regiones.
+
+    Parámetros:
+    directorio_salida (str): carpeta de salida (los CSV con los nombres de Datasets/ y map.geojson).
+    n_regiones (int): cantidad de regiones.
+    n_periodos (int): cantidad de meses a partir de `inicio`.
+    filas_por_bloque (int): filas aproximadas por archivo en cada bloque escrito.
+    semilla (int): semilla del generador; cada bloque usa un flujo derivado, así que con la misma
+        semilla y el mismo tamaño de bloque el resultado es reproducible.
+    geojson (bool): generar también map.geojson.
+
+    Retorna:
+    cantidad de filas escritas por archivo.
+    """
+    os.makedirs(directorio_salida, exist_ok=True)
+    fechas = pd.date_range(inicio, periods=n_periodos, freq="MS")
+    regiones_por_bloque = max(1, filas_por_bloque // n_periodos)
+    semillas = np.random.SeedSequence(semilla)
+
+    salidas = {clave: open(os.path.join(directorio_salida, archivo), "w", encoding="utf-8", newline="")
+               for clave, archivo in ARCHIVOS.items()}
+    salida_geojson = open(os.path.join(directorio_salida, "map.geojson"), "w", encoding="utf-8") if geojson else None
+    try:
+        if salida_geojson is not None:
+            salida_geojson.write('{"type":"FeatureCollection","features":[')
+        for numero, desde in enumerate(range(0, n_regiones, regiones_por_bloque)):
+            hasta = min(desde + regiones_por_bloque, n_regiones)
+            regiones = nombres_regiones(desde, hasta, n_regiones)
+            rng = np.random.default_rng(semillas.spawn(1)[0])
+            for clave, df in generar_bloque(rng, regiones, fechas).items():
+                df.to_csv(salidas[clave], header=numero == 0, index=False)
+            if salida_geojson is not None:
+                separador = "," if numero > 0 else ""
+                salida_geojson.write(separador + ",".join(
+                    json.dumps(feature, ensure_ascii=False) for feature in features_grilla(desde, hasta, n_regiones, regiones)
+                ))
+        if salida_geojson is not None:
+            salida_geojson.write("]}")
+    finally:
+        for salida in salidas.values():
+            salida.close()
+        if salida_geojson is not None:
+            salida_geojson.close()
+    return n_regiones * n_periodos
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Genera datasets sintéticos con el esquema de Datasets/")
+    parser.add_argument("--salida", default="./Datasets_sinteticos", help="carpeta de salida")
+    parser.add_argument("--regiones", type=int, default=5000, help="cantidad de regiones")
+    parser.add_argument("--periodos", type=int, default=120, help="cantidad de meses")
+    parser.add_argument("--inicio", default="2014-01-01", help="primer mes (AAAA-MM-DD)")
+    parser.add_argument("--filas-por-bloque", type=int, default=500_000, help="filas por archivo en cada escritura")
+    parser.add_argument("--semilla", type=int, default=0)
+    parser.add_argument("--sin-geojson", action="store_true", help="no generar map.geojson")
+    args = parser.parse_args(argv)
+
+    inicio = time.perf_counter()
+    filas = generar_datos(args.salida, args.regiones, args.periodos, args.inicio,
+                          args.filas_por_bloque, args.semilla, geojson=not args.sin_geojson)
+    print(f"{filas} filas por archivo en {time.perf_counter() - inicio:.1f} s en {args.salida}")
+
+
+if __name__ == "__main__":
+    main()
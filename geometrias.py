@@ -0,0 +1,109 @@
+"""
+Niveles de detalle (LOD) de las geometrías del mapa.
+
+Cada nivel simplifica los polígonos con una tolerancia acorde a la resolución del mapa en ese
+zoom (preservando la topología de cada geometría) y cuantiza las coordenadas a una cantidad fija
+de decimales, lo que reduce tanto los vértices como los bytes del JSON. El mapa elige el nivel a
+partir del zoom actual, así el tamaño del payload y el tiempo de render se mantienen acotados
+aunque se pase a límites departamentales.
+"""
+import json
+import math
+
+import geopandas as gpd
+import numpy as np
+import shapely
+
+# Latitud más austral de los datos (Tierra del Fuego). En Mercator un grado de latitud ocupa
+# 1 / cos(latitud) veces más píxeles que uno de longitud, así que el peor caso es el más austral
+LATITUD_REFERENCIA = 55.0
+
+
+def grados_por_pixel(zoom, latitud=LATITUD_REFERENCIA):
+    """
+    Grados que mide un píxel a `zoom` en un mapa web (teselas de 256 px: el mundo mide
+    256 * 2**zoom píxeles de ancho), en el eje más exigente a esa latitud.
+    """
+    return 360 / (256 * 2 ** zoom) * math.cos(math.radians(latitud))
+
+
+def niveles_medio_pixel(zooms_decimales):
+    """
+    Arma los niveles (zoom mínimo, tolerancia, decimales) a partir de pares (zoom mínimo,
+    decimales). Cada nivel se usa hasta el zoom mínimo del siguiente, y su tolerancia es medio
+    píxel en ese zoom: la simplificación nunca mueve un borde más de medio píxel en pantalla.
+    El último nivel no se simplifica.
+    """
+    zooms_decimales = sorted(zooms_decimales)
+    siguientes = [zoom for zoom, _ in zooms_decimales[1:]] + [None]
+    return [
+        (zoom_min, 0.0 if siguiente is None else 0.5 * grados_por_pixel(siguiente), decimales)
+        for (zoom_min, decimales), siguiente in zip(zooms_decimales, siguientes)
+    ]
+
+
+# (zoom mínimo, tolerancia de simplificación en grados, decimales de las coordenadas). Los
+# decimales redondean a menos de un décimo de la tolerancia de cada nivel
+NIVELES_DETALLE = niveles_medio_pixel([(0, 3), (3, 3), (5, 4), (7, 4), (9, 5)])
+ZOOM_INICIAL = 3
+
+
+def simplificar(gdf, tolerancia, decimales, columnas=("Provincia",)):
+    """
+    Retorna el GeoJSON (dict) de `gdf` simplificado y cuantizado.
+
+    Parámetros:
+    gdf (gpd.GeoDataFrame): geometrías originales.
+    tolerancia (float): tolerancia de simplificación en grados (0: sin simplificar).
+    decimales (int): decimales que se conservan en cada coordenada.
+    columnas (tuple): propiedades que se conservan en cada feature.
+    """
+    geometrias = gdf.geometry.to_numpy()
+    if tolerancia > 0:
+        geometrias = shapely.simplify(geometrias, tolerancia, preserve_topology=True)
+    geometrias = shapely.transform(geometrias, lambda coordenadas: np.round(coordenadas, decimales))
+    simplificado = gpd.GeoDataFrame(gdf[list(columnas)], geometry=geometrias, crs=gdf.crs)
+    return simplificado.__geo_interface__
+
+
+def construir_niveles(gdf, niveles=NIVELES_DETALLE, columnas=("Provincia",)):
+    """
+    Precalcula el GeoJSON de cada nivel de detalle.
+
+    Retorna:
+    lista de dicts con zoom_min, tolerancia, decimales, geojson, vertices y bytes (tamaño del JSON).
+    """
+    resultado = []
+    for zoom_min, tolerancia, decimales in sorted(niveles):
+        geojson = simplificar(gdf, tolerancia, decimales, columnas)
+        vertices = sum(
+            len(anillo)
+            for feature in geojson["features"]
+            for anillo in _anillos(feature["geometry"])
+        )
+        resultado.append({
+            "zoom_min": zoom_min,
+            "tolerancia": tolerancia,
+            "decimales": decimales,
+            "geojson": geojson,
+            "vertices": vertices,
+            "bytes": len(json.dumps(geojson, separators=(",", ":"))),
+        })
+    return resultado
+
+
+def _anillos(geometria):
+    if geometria["type"] == "Polygon":
+        return geometria["coordinates"]
+    if geometria["type"] == "MultiPolygon":
+        return [anillo for poligono in geometria["coordinates"] for anillo in poligono]
+    return []
+
+
+def nivel_para_zoom(zoom, niveles):
+    """Índice del nivel más detallado cuyo zoom mínimo no supera `zoom`."""
+    indice = 0
+    for posicion, nivel in enumerate(niveles):
+        if zoom >= nivel["zoom_min"]:
+            indice = posicion
+    return indice
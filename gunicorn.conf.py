@@ -0,0 +1,62 @@
+# Configuración de gunicorn para servir el dashboard en producción:
+#     gunicorn -c gunicorn.conf.py wsgi:server
+import gc
+import os
+import resource
+import time
+
+bind = os.environ.get("GUNICORN_BIND", "0.0.0.0:8050")
+# Cada worker tiene su copia de los datos: un trimestre ingerido por POST /ingesta se escribe en los
+# CSV y los demás workers lo aplican antes de su siguiente solicitud (ver ingesta.py)
+workers = int(os.environ.get("GUNICORN_WORKERS", "4"))
+threads = int(os.environ.get("GUNICORN_THREADS", "2"))
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", "120"))
+
+# La app (y los datos) se cargan una vez en el maestro y se comparten con los workers por fork
+preload_app = True
+reload = False
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+inicio_maestro = time.perf_counter()
+estado_worker = {}
+
+
+def rss_mb():
+    """RSS actual del proceso en MB (pico de RSS si psutil no está instalado)."""
+    if psutil is not None:
+        return psutil.Process().memory_info().rss / 2**20
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def when_ready(server):
+    import wsgi
+
+    # Los objetos creados durante la carga pasan a la generación permanente: el recolector de los
+    # workers no los recorre y no toca sus cabeceras, con lo que las páginas siguen compartidas
+    gc.freeze()
+    server.log.info(
+        "Datos precargados en %.2f s; RSS del maestro %.1f MB", wsgi.segundos_carga, rss_mb()
+    )
+
+
+def post_fork(server, worker):
+    estado_worker["inicio"] = time.perf_counter()
+    estado_worker["primera_solicitud"] = True
+    server.log.info("Worker %s iniciado; RSS %.1f MB", worker.pid, rss_mb())
+
+
+def post_request(worker, req, environ, resp):
+    if estado_worker.pop("primera_solicitud", False):
+        worker.log.info(
+            "Worker %s: primera solicitud %s respondida %.2f s después del fork "
+            "(%.2f s desde el arranque del maestro); RSS %.1f MB",
+            worker.pid,
+            req.path,
+            time.perf_counter() - estado_worker["inicio"],
+            time.perf_counter() - inicio_maestro,
+            rss_mb(),
+        )
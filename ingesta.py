@@ -0,0 +1,353 @@
+"""
+Ingesta incremental de un trimestre nuevo.
+
+En lugar de volver a correr el ETL y reiniciar la app, `agregar_trimestre` arma un panel nuevo con
+el periodo agregado (las tablas en formato largo se derivan de él) y actualiza los agregados
+derivados sin recalcularlos desde cero: las tasas de crecimiento del trimestre nuevo se calculan
+contra el último valor de cada provincia, las medias de crecimiento se actualizan como medias
+móviles, el top N se obtiene con un heap y `tendencia` y la velocidad por tecnología suman una fila
+o un grupo.
+
+Con varios workers cada proceso tiene su copia de los datos. `persistir_trimestre` escribe el
+trimestre en los CSV y lo anota en un registro versionado (`.ingestas.json` junto a los CSV); cada
+worker compara la marca del registro antes de atender una solicitud y aplica los trimestres que
+todavía no tiene, y al reiniciar se leen desde los CSV.
+"""
+import copy
+import heapq
+import json
+import os
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+from cache_datos import ARCHIVOS_CSV, RENOMBRES_MERGED, SERIES_CRECIMIENTO, TECNOLOGIAS, escribir_atomico, leer_csv
+from correlaciones import RANGOS_VELOCIDAD
+from etl import validacion
+
+try:
+    import fcntl
+except ImportError:  # Windows: solo el servidor de desarrollo, con un único proceso
+    fcntl = None
+
+ARCHIVO_REGISTRO = ".ingestas.json"
+ARCHIVO_BLOQUEO = ".ingestas.lock"
+
+# Claves de top_crecimiento -> columna de resumen_crecimiento
+TOP_CRECIMIENTO = {
+    "Top_crecimeinto_velocidad (Mbps)": "Tasa_de_crecimiento_vel_media",
+    "Top_crecimiento_penetracion_hogar (%)": "Tasa_de_crecimiento_penetracion_hogar",
+    "Top_crecimiento_penetracion_poblacion (%)": "Tasa_de_crecimiento_penetracion_poblacion",
+}
+
+
+class EstadoIncremental:
+    """
+    Estado auxiliar para la ingesta, calculado una sola vez a partir de los datos cargados: último
+    valor de cada serie por provincia, cantidad de tasas de crecimiento que promedia cada media, y
+    sumas y conteos de la velocidad por tecnología predominante y año.
+    """
+
+    def __init__(self, datos):
+        self.ultimos = {}
+        self.conteos = {}
+        for nombre, (_, valor, tasa) in SERIES_CRECIMIENTO.items():
+            df = datos[nombre].dropna(subset=[valor])
+            ultimo = df.loc[df.groupby("Provincia", observed=True)["Fecha"].idxmax()]
+            self.ultimos[nombre] = dict(zip(ultimo["Provincia"].astype(str), zip(ultimo["Fecha"], ultimo[valor])))
+            conteo = datos[nombre].groupby("Provincia", observed=True)[tasa].count()
+            self.conteos[tasa] = {str(provincia): int(cantidad) for provincia, cantidad in conteo.items()}
+
+        data = datos["data"]
+        agrupado = data.groupby(["Tecnologia_Predominante", "Año"], observed=True)["Mbps (Media de bajada)"]
+        self.suma_tecnologia = agrupado.sum().to_dict()
+        self.conteo_tecnologia = agrupado.count().to_dict()
+        self.fechas = set(pd.to_datetime(datos["vel_media_provincia"]["Fecha"].unique()))
+
+    def copia(self):
+        """Copia con sus propios diccionarios, para actualizarla sin tocar este estado."""
+        nuevo = copy.copy(self)
+        nuevo.ultimos = {nombre: dict(ultimos) for nombre, ultimos in self.ultimos.items()}
+        nuevo.conteos = {tasa: dict(conteos) for tasa, conteos in self.conteos.items()}
+        nuevo.suma_tecnologia = dict(self.suma_tecnologia)
+        nuevo.conteo_tecnologia = dict(self.conteo_tecnologia)
+        nuevo.fechas = set(self.fechas)
+        return nuevo
+
+
+def top_n(resumen, columna, n=3):
+    """Las `n` provincias con mayor valor de `columna`, con un heap en O(P log n)."""
+    mayores = heapq.nlargest(
+        n,
+        ((valor, provincia) for provincia, valor in zip(resumen["Provincia"], resumen[columna]) if pd.notna(valor)),
+    )
+    return pd.DataFrame([(provincia, valor) for valor, provincia in mayores], columns=["Provincia", columna])
+
+
+def _concatenar(df, nuevas):
+    # Mantiene Provincia como categoría agregando solo las categorías nuevas
+    if isinstance(df["Provincia"].dtype, pd.CategoricalDtype):
+        faltantes = pd.Index(nuevas["Provincia"].astype(str).unique()).difference(df["Provincia"].cat.categories)
+        categorias = df["Provincia"].cat.categories.append(faltantes)
+        if len(faltantes):
+            df = df.assign(Provincia=df["Provincia"].cat.add_categories(faltantes))
+        nuevas = nuevas.assign(Provincia=pd.Categorical(nuevas["Provincia"].astype(str), categories=categorias))
+    return pd.concat([df, nuevas[df.columns.intersection(nuevas.columns)]], ignore_index=True)
+
+
+def agregar_trimestre(datos, estado, fecha, filas):
+    """
+    Agrega un periodo a los datos y actualiza los agregados derivados de forma incremental. `datos`,
+    `estado` y sus tablas no se modifican: se arman un DatosPanel y un EstadoIncremental nuevos para
+    reemplazar a los anteriores de una vez, mientras otras solicitudes siguen leyendo los actuales.
+    Si algo falla a mitad de camino los anteriores quedan intactos y el trimestre se puede reintentar.
+
+    Parámetros:
+    datos (DatosPanel): datos cargados por cache_datos.cargar_datos.
+    estado (EstadoIncremental): estado auxiliar de la ingesta que corresponde a `datos`.
+    fecha: primer día del periodo nuevo; debe ser posterior a todos los periodos cargados.
+    filas (pd.DataFrame): una fila por provincia con Provincia y las columnas de los CSV del ETL
+        (velocidad, tecnologías y Total, penetración por hogares y por habitantes, y los accesos
+        por rango de velocidad). Las columnas ausentes dejan a esa fuente sin datos para el periodo.
+
+    Retorna:
+    dict con los `datos` y el `estado` nuevos, el año del periodo, las filas nuevas de `data`,
+    `merged_data` y `acceso_rango_provincia`, y los agregados actualizados `vel_media_tecnologia` y
+    `top_crecimiento`.
+    """
+    fecha = pd.Timestamp(fecha)
+    if fecha in estado.fechas:
+        raise ValueError(f"El periodo {fecha:%Y-%m-%d} ya está cargado")
+    if len(datos["panel"].fechas) and fecha <= datos["panel"].fechas[-1]:
+        raise ValueError(f"El periodo {fecha:%Y-%m-%d} no es posterior al último cargado")
+    filas = filas.assign(Provincia=filas["Provincia"].astype(str), Fecha=fecha).reset_index(drop=True)
+    estado = estado.copia()
+
+    # Filas del periodo por fuente del panel
+    fuentes = {}
+
+    # Series con tasa de crecimiento: la tasa se calcula contra el último valor de cada provincia
+    tasas_nuevas = {}
+    for nombre, (fuente, valor, tasa) in SERIES_CRECIMIENTO.items():
+        if valor not in filas:
+            continue
+        nuevas = filas[["Provincia", valor, "Fecha"]].dropna(subset=[valor])
+        anteriores = np.array([estado.ultimos[nombre].get(provincia, (None, np.nan))[1] for provincia in nuevas["Provincia"]], dtype=float)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            nuevas[tasa] = (nuevas[valor].to_numpy() / anteriores - 1) * 100
+        fuentes[fuente] = (nuevas, [valor])
+        estado.ultimos[nombre].update(zip(nuevas["Provincia"], ((fecha, valor_nuevo) for valor_nuevo in nuevas[valor])))
+        tasas = nuevas.set_index("Provincia")[tasa]
+        tasas_nuevas[tasa] = tasas[np.isfinite(tasas)]
+
+    # Media móvil de la tasa por provincia, una columna a la vez: media_nueva = (media * n + tasa) / (n + 1)
+    resumen = datos["resumen_crecimiento"]
+    faltantes = pd.Index([provincia for tasas in tasas_nuevas.values() for provincia in tasas.index]).unique()
+    faltantes = faltantes.difference(resumen["Provincia"].astype(str))
+    resumen = _concatenar(resumen, pd.DataFrame({"Provincia": faltantes})) if len(faltantes) else resumen.copy()
+    posiciones = pd.Index(resumen["Provincia"].astype(str))
+    for tasa, tasas in tasas_nuevas.items():
+        n = pd.Series(estado.conteos[tasa], dtype=float).reindex(tasas.index, fill_value=0)
+        fila = posiciones.get_indexer(tasas.index)
+        medias = resumen[tasa].to_numpy(dtype=float, copy=True)
+        previas = pd.Series(medias[fila], index=tasas.index)
+        medias[fila] = ((previas * n + tasas) / (n + 1)).where((n > 0) & previas.notna(), tasas)
+        resumen[tasa] = medias
+        estado.conteos[tasa].update((n + 1).astype(int).to_dict())
+
+    # Tecnologías, `data`, `tendencia` y `merged_data`
+    columnas_tecnologia = TECNOLOGIAS + ["Total"]
+    nuevas_data = filas.iloc[:0]
+    nuevas_merged = filas.iloc[:0]
+    tendencia = datos["tendencia"]
+    if set(columnas_tecnologia) <= set(filas.columns):
+        tecnologia = filas[["Provincia"] + columnas_tecnologia + ["Fecha"]].dropna(subset=["Total"])
+        fuentes["tecnologia"] = (tecnologia, columnas_tecnologia)
+
+        sumas = tecnologia[TECNOLOGIAS].sum()
+        fila_tendencia = pd.DataFrame([(sumas / sumas.sum()).to_dict()])
+        fila_tendencia.insert(0, "Fecha", fecha)
+        tendencia = pd.concat([tendencia, fila_tendencia[tendencia.columns]], ignore_index=True)
+
+        if "Mbps (Media de bajada)" in filas:
+            nuevas_data = tecnologia.merge(filas[["Provincia", "Mbps (Media de bajada)"]].dropna(), on="Provincia")
+            total = nuevas_data["Total"].where(nuevas_data["Total"] != 0)
+            for tecnologia_nombre in TECNOLOGIAS:
+                nuevas_data[f"prop_{tecnologia_nombre}"] = nuevas_data[tecnologia_nombre] / total
+            nuevas_data["Tecnologia_Predominante"] = nuevas_data[TECNOLOGIAS].idxmax(axis=1)
+            nuevas_data["Año"] = fecha.year
+
+            for tecnologia_nombre, velocidad in zip(nuevas_data["Tecnologia_Predominante"], nuevas_data["Mbps (Media de bajada)"]):
+                clave = (tecnologia_nombre, fecha.year)
+                estado.suma_tecnologia[clave] = estado.suma_tecnologia.get(clave, 0.0) + velocidad
+                estado.conteo_tecnologia[clave] = estado.conteo_tecnologia.get(clave, 0) + 1
+
+            penetracion = ["Accesos por cada 100 hogares", "Accesos por cada 100 hab"]
+            if set(penetracion) <= set(filas.columns):
+                nuevas_merged = nuevas_data.merge(filas[["Provincia"] + penetracion].dropna(), on="Provincia").rename(columns=RENOMBRES_MERGED)
+
+    # Accesos por rango de velocidad; el 'Total' de las filas es el de tecnologías, así que el de
+    # esta tabla es la suma de los rangos
+    acceso_rango = datos["acceso_rango_provincia"]
+    nuevas_rangos = filas.iloc[:0]
+    if set(RANGOS_VELOCIDAD) <= set(filas.columns):
+        nuevas_rangos = filas[["Provincia"] + RANGOS_VELOCIDAD + ["Fecha"]].dropna(subset=RANGOS_VELOCIDAD, how="all")
+        nuevas_rangos = nuevas_rangos.assign(Total=nuevas_rangos[RANGOS_VELOCIDAD].sum(axis=1))
+        acceso_rango = _concatenar(acceso_rango, nuevas_rangos)
+
+    # `data`, `merged_data` y las tablas de cada fuente se derivan del panel nuevo
+    nuevos_datos = datos.con_tablas(
+        panel=datos["panel"].agregar_periodo(fecha, fuentes),
+        resumen_crecimiento=resumen,
+        tendencia=tendencia,
+        acceso_rango_provincia=acceso_rango,
+    )
+    estado.fechas.add(fecha)
+
+    vel_media_tecnologia = pd.DataFrame(
+        [(tecnologia_nombre, año, suma / estado.conteo_tecnologia[(tecnologia_nombre, año)])
+         for (tecnologia_nombre, año), suma in sorted(estado.suma_tecnologia.items())],
+        columns=["Tecnologia_Predominante", "Fecha", "Mbps (Media de bajada)"],
+    )
+    top_crecimiento = {clave: top_n(resumen, columna) for clave, columna in TOP_CRECIMIENTO.items()}
+
+    return {
+        "datos": nuevos_datos,
+        "estado": estado,
+        "año": fecha.year,
+        "filas_data": nuevas_data,
+        "filas_merged": nuevas_merged,
+        "filas_rangos": nuevas_rangos,
+        "vel_media_tecnologia": vel_media_tecnologia,
+        "top_crecimiento": top_crecimiento,
+    }
+
+
+@contextmanager
+def bloqueo_datos(directorio_datos, compartido=False):
+    """
+    Lock entre procesos (flock) sobre los CSV: exclusivo para escribir un trimestre, compartido para
+    leerlos. Si el directorio no admite el archivo de lock (p. ej. es de solo lectura) la lectura
+    sigue sin lock: nadie puede estar escribiendo.
+    """
+    if fcntl is None:
+        yield
+        return
+    try:
+        archivo = open(os.path.join(directorio_datos, ARCHIVO_BLOQUEO), "a")
+    except OSError:
+        if not compartido:
+            raise
+        yield
+        return
+    with archivo:
+        fcntl.flock(archivo, fcntl.LOCK_SH if compartido else fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(archivo, fcntl.LOCK_UN)
+
+
+def marca_registro(directorio_datos):
+    """Marca (mtime, tamaño) del registro de ingestas, o None si no existe: compararla es un stat."""
+    try:
+        estado = os.stat(os.path.join(directorio_datos, ARCHIVO_REGISTRO))
+    except FileNotFoundError:
+        return None
+    return estado.st_mtime_ns, estado.st_size
+
+
+def leer_registro(directorio_datos):
+    """
+    Retorna:
+    dict con `version` (cantidad de trimestres ingeridos) y `trimestres`, una lista de
+    {"fecha", "filas"} en el orden en que se ingirieron.
+    """
+    try:
+        with open(os.path.join(directorio_datos, ARCHIVO_REGISTRO), encoding="utf-8") as archivo:
+            return json.load(archivo)
+    except FileNotFoundError:
+        return {"version": 0, "trimestres": []}
+
+
+def filas_por_archivo(fecha, filas):
+    """
+    Filas nuevas de cada CSV del ETL, con las mismas reglas que agregar_trimestre: las columnas
+    ausentes dejan a esa tabla sin filas y el Total de los rangos es la suma de los rangos.
+
+    Retorna:
+    dict nombre de tabla (ver ARCHIVOS_CSV) -> DataFrame con Provincia, métricas y Fecha.
+    """
+    fecha = pd.Timestamp(fecha)
+    filas = filas.assign(Provincia=filas["Provincia"].astype(str), Fecha=fecha).reset_index(drop=True)
+    tablas = {}
+    for nombre, (_, valor, _) in SERIES_CRECIMIENTO.items():
+        if valor in filas:
+            tablas[nombre] = filas[["Provincia", valor, "Fecha"]].dropna(subset=[valor])
+    if set(TECNOLOGIAS + ["Total"]) <= set(filas.columns):
+        tablas["tecnologia_provincia"] = filas[["Provincia"] + TECNOLOGIAS + ["Total", "Fecha"]].dropna(subset=["Total"])
+    if set(RANGOS_VELOCIDAD) <= set(filas.columns):
+        rangos = filas[["Provincia"] + RANGOS_VELOCIDAD + ["Fecha"]].dropna(subset=RANGOS_VELOCIDAD, how="all")
+        tablas["acceso_rango_provincia"] = rangos.assign(Total=rangos[RANGOS_VELOCIDAD].sum(axis=1))
+    return {nombre: df for nombre, df in tablas.items() if len(df)}
+
+
+def persistir_trimestre(directorio_datos, fecha, filas):
+    """
+    Escribe el trimestre en los CSV del ETL y lo agrega al registro de ingestas. Se debe llamar con
+    bloqueo_datos exclusivo tomado.
+
+    Antes de escribir nada se valida el resultado con las mismas reglas que la carga de la app (la
+    fecha debe ser posterior a todas las de los CSV): un trimestre inválido lanza ValueError o
+    validacion.ErrorValidacion y no deja la app sin poder arrancar. Las filas nuevas se anteponen
+    al contenido de cada archivo (los CSV van del periodo más reciente al más antiguo), sin volver a
+    escribir las filas existentes.
+
+    Retorna:
+    la versión nueva del registro.
+    """
+    fecha = pd.Timestamp(fecha)
+    nuevas = filas_por_archivo(fecha, filas)
+    if not nuevas:
+        raise ValueError("Las filas no tienen las columnas de ninguna tabla")
+    rutas = {nombre: os.path.join(directorio_datos, archivo) for nombre, archivo in ARCHIVOS_CSV.items()}
+    actuales = {nombre: leer_csv(ruta) for nombre, ruta in rutas.items()}
+    ultima = max(df["Fecha"].max() for df in actuales.values())
+    if fecha <= ultima:
+        raise ValueError(f"El periodo {fecha:%Y-%m-%d} no es posterior al último de los CSV ({ultima:%Y-%m-%d})")
+
+    columnas = {nombre: list(df.columns) for nombre, df in actuales.items()}
+    combinadas = {
+        nombre: pd.concat([nuevas[nombre][columnas[nombre]], df], ignore_index=True) if nombre in nuevas else df
+        for nombre, df in actuales.items()
+    }
+    validacion.validar_datos(combinadas)
+
+    for nombre, df in nuevas.items():
+        with open(rutas[nombre], encoding="utf-8", newline="") as archivo:
+            encabezado = archivo.readline()
+            resto = archivo.read()
+        texto = df[columnas[nombre]].astype({columna: float for columna in columnas[nombre] if columna not in ("Provincia", "Fecha")}).to_csv(
+            index=False, header=False, date_format="%Y-%m-%d", lineterminator="\n"
+        )
+
+        def escribir(temporal, contenido=encabezado + texto + resto):
+            with open(temporal, "w", encoding="utf-8", newline="") as salida:
+                salida.write(contenido)
+
+        escribir_atomico(rutas[nombre], escribir)
+
+    registro = leer_registro(directorio_datos)
+    registro["trimestres"].append({
+        "fecha": f"{fecha:%Y-%m-%d}",
+        "filas": filas.astype(object).where(filas.notna(), None).to_dict(orient="records"),
+    })
+    registro["version"] = len(registro["trimestres"])
+
+    def escribir_registro(temporal):
+        with open(temporal, "w", encoding="utf-8") as archivo:
+            json.dump(registro, archivo, ensure_ascii=False, indent=1)
+
+    escribir_atomico(os.path.join(directorio_datos, ARCHIVO_REGISTRO), escribir_registro)
+    return registro["version"]
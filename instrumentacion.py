@@ -0,0 +1,282 @@
+"""
+Instrumentación de las solicitudes de callbacks del dashboard.
+
+Cada POST a `/_dash-update-component` se mide de punta a punta y se desglosa en etapas:
+"datos" (carga y agregación en pandas), "figura" (construcción de la figura), "serializacion"
+(figura -> JSON en el cache) y "dash" (el resto: validación y respuesta de Dash). Las etapas son
+exclusivas: el tiempo de una etapa anidada se descuenta de la que la contiene. Cada solicitud
+se etiqueta además con el resultado del cache de figuras ("acierto", "fallo" si alguna figura se
+construyó, o "sin_cache" si el callback no lo usa), y se registran los bytes enviados de cada
+respuesta, ya comprimida. Todo se expone en `/metrics` en formato de texto de Prometheus, junto con
+los aciertos y fallos acumulados del cache de figuras.
+
+Con PERFILADOR_MUESTREO=1 un hilo muestrea las pilas de los hilos que atienden solicitudes cada
+PERFILADOR_INTERVALO_MS milisegundos; las solicitudes que tardan más de PERFILADOR_UMBRAL_MS se
+guardan como pilas plegadas (formato de flamegraph.pl / speedscope) en PERFILADOR_DIRECTORIO.
+
+El costo sin el perfilador es un par de perf_counter por etapa y una actualización de
+diccionario bajo lock por solicitud.
+"""
+import bisect
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+# Límites superiores (segundos y bytes) de los buckets de los histogramas
+BUCKETS_SEGUNDOS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BUCKETS_BYTES = (1_000, 10_000, 50_000, 100_000, 500_000, 1_000_000, 5_000_000)
+
+RUTA_CALLBACKS = "/_dash-update-component"
+
+_local = threading.local()
+
+
+class Histograma:
+    """Histograma acumulativo al estilo Prometheus (conteos por bucket, suma y total)."""
+
+    def __init__(self, limites):
+        self.limites = limites
+        self.conteos = [0] * (len(limites) + 1)
+        self.suma = 0.0
+        self.total = 0
+
+    def observar(self, valor):
+        self.conteos[bisect.bisect_left(self.limites, valor)] += 1
+        self.suma += valor
+        self.total += 1
+
+    def lineas(self, nombre, etiquetas):
+        acumulado = 0
+        for limite, conteo in zip(self.limites + ("+Inf",), self.conteos):
+            acumulado += conteo
+            yield f'{nombre}_bucket{{{etiquetas},le="{limite}"}} {acumulado}'
+        yield f"{nombre}_sum{{{etiquetas}}} {self.suma}"
+        yield f"{nombre}_count{{{etiquetas}}} {self.total}"
+
+
+@contextmanager
+def etapa(nombre):
+    """
+    Mide una etapa de la solicitud en curso. Fuera de una solicitud instrumentada no hace nada.
+    El tiempo de las etapas anidadas se descuenta de la etapa que las contiene.
+    """
+    pila = getattr(_local, "pila", None)
+    if pila is None:
+        yield
+        return
+    pila.append(0.0)
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        transcurrido = time.perf_counter() - inicio
+        anidado = pila.pop()
+        _local.etapas[nombre] = _local.etapas.get(nombre, 0.0) + transcurrido - anidado
+        if pila:
+            pila[-1] += transcurrido
+
+
+def resultado_cache(acierto):
+    """
+    Anota un acierto o un fallo del cache de figuras en la solicitud en curso. Fuera de una
+    solicitud instrumentada no hace nada; con varias búsquedas, un fallo marca toda la solicitud.
+    """
+    if getattr(_local, "pila", None) is None:
+        return
+    if not acierto or _local.cache != "fallo":
+        _local.cache = "acierto" if acierto else "fallo"
+
+
+def _escapar(valor):
+    return str(valor).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class PerfiladorMuestreo:
+    """
+    Perfilador por muestreo: un hilo daemon lee sys._current_frames() de los hilos registrados
+    y acumula sus pilas plegadas ("modulo:funcion;modulo:funcion ...") por hilo.
+    """
+
+    def __init__(self, intervalo, umbral, directorio):
+        self.intervalo = intervalo
+        self.umbral = umbral
+        self.directorio = directorio
+        self._muestras = {}
+        self._lock = threading.Lock()
+        self._pid = None
+
+    def _asegurar_hilo(self):
+        # Con gunicorn (preload_app) el hilo del maestro no sobrevive al fork: se inicia por proceso
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            threading.Thread(target=self._muestrear, name="perfilador-muestreo", daemon=True).start()
+
+    def _muestrear(self):
+        while True:
+            time.sleep(self.intervalo)
+            frames = sys._current_frames()
+            with self._lock:
+                for hilo, muestras in self._muestras.items():
+                    frame = frames.get(hilo)
+                    if frame is None:
+                        continue
+                    pila = []
+                    while frame is not None:
+                        codigo = frame.f_code
+                        pila.append(f"{os.path.basename(codigo.co_filename)}:{codigo.co_name}")
+                        frame = frame.f_back
+                    muestras[";".join(reversed(pila))] += 1
+
+    def iniciar(self):
+        self._asegurar_hilo()
+        with self._lock:
+            self._muestras[threading.get_ident()] = Counter()
+
+    def terminar(self, segundos, etiqueta):
+        with self._lock:
+            muestras = self._muestras.pop(threading.get_ident(), None)
+        if not muestras or segundos < self.umbral:
+            return None
+        os.makedirs(self.directorio, exist_ok=True)
+        nombre = "".join(c if c.isalnum() else "_" for c in etiqueta)[:80]
+        ruta = os.path.join(self.directorio, f"{time.strftime('%Y%m%d-%H%M%S')}_{int(segundos * 1000)}ms_{nombre}.folded")
+        with open(ruta, "w", encoding="utf-8") as archivo:
+            for pila, conteo in muestras.most_common():
+                archivo.write(f"{pila} {conteo}\n")
+        return ruta
+
+
+class Instrumentacion:
+    """
+    Métricas por callback (etiquetado con los outputs de Dash, p. ej. "content.children").
+
+    Parámetros:
+    cache_figuras (CacheFiguras): opcional; sus aciertos y fallos se exportan en /metrics.
+    perfilador (PerfiladorMuestreo): opcional; por defecto se crea si PERFILADOR_MUESTREO=1.
+    """
+
+    def __init__(self, cache_figuras=None, perfilador=None):
+        self.cache_figuras = cache_figuras
+        if perfilador is None and os.environ.get("PERFILADOR_MUESTREO", "0") == "1":
+            perfilador = PerfiladorMuestreo(
+                intervalo=float(os.environ.get("PERFILADOR_INTERVALO_MS", "10")) / 1000,
+                umbral=float(os.environ.get("PERFILADOR_UMBRAL_MS", "500")) / 1000,
+                directorio=os.environ.get("PERFILADOR_DIRECTORIO", "perfiles"),
+            )
+        self.perfilador = perfilador
+        self._lock = threading.Lock()
+        self._segundos = {}
+        self._bytes = {}
+        self._errores = Counter()
+
+    def instalar(self, servidor, ruta="/metrics", solo_local=True):
+        """
+        Registra los hooks de Flask y el endpoint de métricas. Con `solo_local` el endpoint
+        responde solo a solicitudes desde loopback.
+        """
+        from flask import Response, abort, request
+
+        @servidor.before_request
+        def _inicio():
+            if request.path != RUTA_CALLBACKS:
+                return
+            _local.pila = []
+            _local.etapas = {}
+            _local.cache = "sin_cache"
+            _local.inicio = time.perf_counter()
+            if self.perfilador is not None:
+                self.perfilador.iniciar()
+
+        def _fin(respuesta):
+            inicio = getattr(_local, "inicio", None)
+            if inicio is None:
+                return respuesta
+            total = time.perf_counter() - inicio
+            cuerpo = request.get_json(silent=True) or {}
+            etiqueta = cuerpo.get("output", "desconocido")
+            etapas = _local.etapas
+            etapas["dash"] = max(total - sum(etapas.values()), 0.0)
+            self.registrar(etiqueta, total, etapas, respuesta.calculate_content_length() or 0, respuesta.status_code, _local.cache)
+            if self.perfilador is not None:
+                self.perfilador.terminar(total, etiqueta)
+            _local.inicio = _local.pila = _local.etapas = _local.cache = None
+            return respuesta
+
+        # Flask ejecuta los after_request en orden inverso al de registro: primero en la lista es el
+        # último en correr, después de la compresión (flask-compress), y mide los bytes enviados
+        servidor.after_request_funcs.setdefault(None, []).insert(0, _fin)
+
+        @servidor.teardown_request
+        def _limpiar(_error=None):
+            # after_request no se ejecuta si la vista lanzó una excepción no manejada
+            if getattr(_local, "inicio", None) is not None:
+                if self.perfilador is not None:
+                    self.perfilador.terminar(0.0, "")
+                _local.inicio = _local.pila = _local.etapas = _local.cache = None
+
+        def metricas():
+            if solo_local and request.remote_addr not in ("127.0.0.1", "::1"):
+                abort(404)
+            return Response(self.exportar(), mimetype="text/plain; version=0.0.4; charset=utf-8")
+
+        servidor.add_url_rule(ruta, "metricas", metricas)
+
+    def registrar(self, callback, total, etapas, bytes_respuesta, estado=200, cache="sin_cache"):
+        with self._lock:
+            for nombre, segundos in (("total", total), *etapas.items()):
+                clave = (callback, nombre, cache)
+                if clave not in self._segundos:
+                    self._segundos[clave] = Histograma(BUCKETS_SEGUNDOS)
+                self._segundos[clave].observar(segundos)
+            if callback not in self._bytes:
+                self._bytes[callback] = Histograma(BUCKETS_BYTES)
+            self._bytes[callback].observar(bytes_respuesta)
+            if estado >= 400:
+                self._errores[callback] += 1
+
+    def exportar(self):
+        """Métricas en formato de texto de Prometheus."""
+        lineas = [
+            "# HELP dash_callback_segundos Duración de las solicitudes de callbacks por etapa y resultado del cache de figuras.",
+            "# TYPE dash_callback_segundos histogram",
+        ]
+        with self._lock:
+            for (callback, nombre, cache), histograma in sorted(self._segundos.items()):
+                lineas.extend(histograma.lineas("dash_callback_segundos", f'callback="{_escapar(callback)}",etapa="{nombre}",cache="{cache}"'))
+            lineas += [
+                "# HELP dash_callback_respuesta_bytes Bytes enviados en las respuestas de callbacks (después de la compresión).",
+                "# TYPE dash_callback_respuesta_bytes histogram",
+            ]
+            for callback, histograma in sorted(self._bytes.items()):
+                lineas.extend(histograma.lineas("dash_callback_respuesta_bytes", f'callback="{_escapar(callback)}"'))
+            lineas += [
+                "# HELP dash_callback_errores_total Respuestas de callbacks con estado >= 400.",
+                "# TYPE dash_callback_errores_total counter",
+            ]
+            lineas += [f'dash_callback_errores_total{{callback="{_escapar(callback)}"}} {n}' for callback, n in sorted(self._errores.items())]
+
+        if self.cache_figuras is not None:
+            estadisticas = self.cache_figuras.estadisticas()
+            lineas += [
+                "# HELP cache_figuras_aciertos_total Aciertos del cache de figuras por callback.",
+                "# TYPE cache_figuras_aciertos_total counter",
+            ]
+            lineas += [f'cache_figuras_aciertos_total{{callback="{nombre}"}} {valores["aciertos"]}' for nombre, valores in estadisticas["por_callback"].items()]
+            lineas += [
+                "# HELP cache_figuras_fallos_total Fallos del cache de figuras por callback.",
+                "# TYPE cache_figuras_fallos_total counter",
+            ]
+            lineas += [f'cache_figuras_fallos_total{{callback="{nombre}"}} {valores["fallos"]}' for nombre, valores in estadisticas["por_callback"].items()]
+            lineas += [
+                "# HELP cache_figuras_entradas Entradas guardadas en el cache de figuras.",
+                "# TYPE cache_figuras_entradas gauge",
+                f'cache_figuras_entradas {estadisticas["entradas"]}',
+            ]
+        return "\n".join(lineas) + "\n"
@@ -0,0 +1,159 @@
+"""
+Almacenamiento compacto de los datos provincia × trimestre.
+
+Todas las métricas de los CSV (velocidad, tecnologías, penetración) se guardan en un único arreglo
+denso float32 (provincia, periodo, métrica) con índices categóricos de provincia y periodo. Las
+tablas en formato largo que usan los gráficos se obtienen como vistas del arreglo: combinar
+fuentes pasa a ser una búsqueda por posición en lugar de un merge por hash de (Provincia, Fecha).
+"""
+import numpy as np
+import pandas as pd
+
+# Prefijo de las columnas con las máscaras de presencia en la tabla serializada del panel
+PREFIJO_PRESENCIA = "presente_"
+
+
+class PanelProvincias:
+    """
+    Parámetros:
+    valores (np.ndarray): arreglo (P, T, M) con NaN donde no hay dato.
+    provincias (pd.CategoricalIndex): provincias, en el orden del eje 0.
+    fechas (pd.DatetimeIndex): periodos ordenados, en el orden del eje 1.
+    metricas (list): nombres de las métricas, en el orden del eje 2.
+    presencia (dict): fuente -> máscara booleana (P, T) de las filas presentes en esa fuente.
+    """
+
+    def __init__(self, valores, provincias, fechas, metricas, presencia):
+        self.valores = valores
+        self.provincias = provincias
+        self.fechas = fechas
+        self.metricas = list(metricas)
+        self.presencia = presencia
+        self._posicion = {metrica: i for i, metrica in enumerate(self.metricas)}
+
+    @classmethod
+    def desde_frames(cls, fuentes, dtype=np.float32):
+        """
+        Construye el panel a partir de dataframes en formato largo con columnas Provincia y Fecha.
+
+        Parámetros:
+        fuentes (dict): nombre de la fuente -> (DataFrame, lista de columnas métricas).
+        dtype: tipo del arreglo (float32 por defecto; los conteos de accesos son enteros < 2**24).
+        """
+        provincias = sorted(set().union(*(df["Provincia"].astype(str).unique() for df, _ in fuentes.values())))
+        provincias = pd.CategoricalIndex(provincias, categories=provincias, name="Provincia")
+        fechas = pd.DatetimeIndex(sorted(set().union(*(df["Fecha"].unique() for df, _ in fuentes.values()))), name="Fecha")
+        metricas = [columna for _, columnas in fuentes.values() for columna in columnas]
+        if len(set(metricas)) != len(metricas):
+            raise ValueError("Cada métrica debe provenir de una sola fuente")
+
+        valores = np.full((len(provincias), len(fechas), len(metricas)), np.nan, dtype=dtype)
+        presencia = {}
+        inicio = 0
+        for nombre, (df, columnas) in fuentes.items():
+            # Posición de cada fila en los ejes del panel: búsqueda en los índices ya ordenados
+            p = pd.Categorical(df["Provincia"].astype(str), categories=provincias.categories).codes
+            t = fechas.get_indexer(df["Fecha"])
+            valores[p, t, inicio:inicio + len(columnas)] = df[columnas].to_numpy(dtype=dtype)
+            mascara = np.zeros((len(provincias), len(fechas)), dtype=bool)
+            mascara[p, t] = True
+            presencia[nombre] = mascara
+            inicio += len(columnas)
+        return cls(valores, provincias, fechas, metricas, presencia)
+
+    @classmethod
+    def desde_tabla(cls, tabla):
+        """Reconstruye el panel desde la tabla densa de `a_tabla` (p. ej. leída del cache Feather)."""
+        categorias = tabla["Provincia"].cat.categories
+        provincias = pd.CategoricalIndex(categorias, categories=categorias, name="Provincia")
+        forma = (len(provincias), len(tabla) // max(len(provincias), 1))
+        fechas = pd.DatetimeIndex(tabla["Fecha"].iloc[:forma[1]], name="Fecha")
+        metricas = [columna for columna in tabla.columns[2:] if not columna.startswith(PREFIJO_PRESENCIA)]
+        valores = tabla[metricas].to_numpy().reshape(forma + (len(metricas),))
+        presencia = {
+            columna[len(PREFIJO_PRESENCIA):]: tabla[columna].to_numpy(dtype=bool).reshape(forma)
+            for columna in tabla.columns if columna.startswith(PREFIJO_PRESENCIA)
+        }
+        return cls(valores, provincias, fechas, metricas, presencia)
+
+    def a_tabla(self):
+        """Tabla densa con una fila por provincia × periodo, las métricas y las máscaras de presencia."""
+        p, t, m = self.valores.shape
+        tabla = pd.DataFrame({
+            "Provincia": pd.Categorical.from_codes(np.repeat(np.arange(p), t), categories=self.provincias.categories),
+            "Fecha": np.tile(self.fechas.to_numpy(), p),
+        })
+        plano = self.valores.reshape(p * t, m)
+        for columna, metrica in enumerate(self.metricas):
+            tabla[metrica] = plano[:, columna]
+        for fuente, mascara in self.presencia.items():
+            tabla[f"{PREFIJO_PRESENCIA}{fuente}"] = mascara.ravel()
+        return tabla
+
+    def agregar_periodo(self, fecha, fuentes):
+        """
+        Panel nuevo con un periodo agregado al final; este panel no se modifica.
+
+        Parámetros:
+        fecha: periodo nuevo, posterior a todos los del panel.
+        fuentes (dict): nombre de la fuente -> (DataFrame con Provincia, lista de columnas métricas).
+            Las fuentes ausentes quedan sin datos en el periodo nuevo.
+        """
+        fecha = pd.Timestamp(fecha)
+        if len(self.fechas) and fecha <= self.fechas[-1]:
+            raise ValueError(f"El periodo {fecha:%Y-%m-%d} no es posterior al último del panel")
+        nombres = sorted(set(self.provincias.categories).union(*(df["Provincia"].astype(str) for df, _ in fuentes.values())))
+        provincias = pd.CategoricalIndex(nombres, categories=nombres, name="Provincia")
+        fechas = self.fechas.append(pd.DatetimeIndex([fecha])).rename("Fecha")
+
+        # Las provincias nuevas se intercalan en orden alfabético: las anteriores cambian de posición
+        anteriores = provincias.categories.get_indexer(self.provincias.categories)
+        valores = np.full((len(provincias), len(fechas), len(self.metricas)), np.nan, dtype=self.valores.dtype)
+        valores[anteriores, :-1] = self.valores
+        presencia = {}
+        for nombre, mascara in self.presencia.items():
+            presencia[nombre] = np.zeros((len(provincias), len(fechas)), dtype=bool)
+            presencia[nombre][anteriores, :-1] = mascara
+        for nombre, (df, columnas) in fuentes.items():
+            p = provincias.categories.get_indexer(df["Provincia"].astype(str))
+            indices = [self._posicion[columna] for columna in columnas]
+            valores[p[:, None], -1, indices] = df[columnas].to_numpy(dtype=self.valores.dtype)
+            presencia[nombre][p, -1] = True
+        return PanelProvincias(valores, provincias, fechas, self.metricas, presencia)
+
+    def serie(self, metrica, fuente=None):
+        """
+        Métrica como DataFrame ancho (Fecha × Provincia), sin copiar el arreglo. Con `fuente` solo se
+        incluyen los periodos en que esa fuente tiene alguna fila (y el resultado es una copia).
+        """
+        serie = pd.DataFrame(self.valores[:, :, self._posicion[metrica]].T, index=self.fechas, columns=self.provincias)
+        return serie if fuente is None else serie[self.presencia[fuente].any(axis=0)]
+
+    def vista(self, metricas, fuentes=None, renombrar=None):
+        """
+        Tabla en formato largo (Provincia, Fecha, métricas...) con una fila por par presente en todas
+        las `fuentes` indicadas, equivalente al merge inner de esas fuentes.
+
+        Parámetros:
+        metricas (list): columnas a incluir.
+        fuentes (list): fuentes que deben estar presentes (por defecto, todas).
+        renombrar (dict): renombres de columnas para la vista.
+        """
+        fuentes = list(self.presencia) if fuentes is None else fuentes
+        presente = np.logical_and.reduce([self.presencia[fuente] for fuente in fuentes])
+        p, t = np.nonzero(presente)
+        vista = pd.DataFrame({
+            "Provincia": pd.Categorical.from_codes(p, categories=self.provincias.categories),
+            "Fecha": self.fechas[t],
+        })
+        indices = [self._posicion[metrica] for metrica in metricas]
+        bloque = self.valores[p, t][:, indices]
+        for columna, metrica in enumerate(metricas):
+            vista[metrica] = bloque[:, columna]
+        if renombrar:
+            vista = vista.rename(columns=renombrar)
+        return vista
+
+    def memoria(self):
+        """Bytes ocupados por el arreglo de valores y las máscaras de presencia."""
+        return self.valores.nbytes + sum(mascara.nbytes for mascara in self.presencia.values())
@@ -0,0 +1,132 @@
+import numpy as np
+import pandas as pd
+
+
+def proyectar_escenarios(base, crecimiento, ruido, n_escenarios=1, rng=None):
+    """
+    Proyecta los valores estimados y simulados de todas las provincias y trimestres en una
+    sola operación de NumPy (broadcasting), sin recorrer filas.
+
+    Parámetros:
+    base (array-like): valor del último trimestre observado por provincia, forma (provincias,).
+    crecimiento (array-like): crecimiento estimado en % respecto a la base para cada trimestre
+        proyectado, forma (trimestres,).
+    ruido (float): amplitud de la variación aleatoria uniforme (0.08 equivale a +/- 8%).
+    n_escenarios (int): cantidad de escenarios Monte Carlo a simular.
+    rng (np.random.Generator): generador a usar; con uno sembrado los resultados son reproducibles.
+
+    Retorna:
+    estimado: array (provincias, trimestres) con la proyección sin ruido.
+    simulado: array (n_escenarios, provincias, trimestres) con la proyección con ruido.
+    """
+    rng = np.random.default_rng() if rng is None else rng
+    base = np.asarray(base, dtype=float)
+    crecimiento = np.asarray(crecimiento, dtype=float)
+
+    estimado = base[:, None] * (1 + crecimiento[None, :] / 100)
+    variacion = rng.uniform(-ruido, ruido, size=(n_escenarios,) + estimado.shape)
+    simulado = estimado[None, :, :] * (1 + variacion)
+    return estimado, simulado
+
+
+def proyeccion_a_dataframe(provincias, fechas, estimado, simulado):
+    """
+    Convierte un escenario proyectado a formato largo (una fila por provincia y trimestre),
+    en el orden provincia -> trimestre.
+
+    Parámetros:
+    provincias (array-like): nombres de las provincias, forma (provincias,).
+    fechas (array-like): fechas de los trimestres proyectados, forma (trimestres,).
+    estimado (np.ndarray): proyección sin ruido, forma (provincias, trimestres).
+    simulado (np.ndarray): un escenario simulado, forma (provincias, trimestres).
+
+    Retorna:
+    pd.DataFrame con columnas Provincia, Fecha, Estimado y Simulado.
+    """
+    n_provincias, n_trimestres = estimado.shape
+    return pd.DataFrame({
+        'Provincia': np.repeat(np.asarray(provincias), n_trimestres),
+        'Fecha': np.tile(pd.to_datetime(fechas).to_numpy(), n_provincias),
+        'Estimado': estimado.ravel(),
+        'Simulado': simulado.ravel(),
+    })
+
+
+def percentiles_kpi_monte_carlo(base, crecimiento, ruido, n_simulaciones, reducir=None, fijos=None,
+                                percentiles=(5, 50, 95), tamano_lote=1000, n_bins=2000, rng=None):
+    """
+    Simula el KPI ((simulado - estimado) / estimado * 100) en lotes de escenarios y calcula sus
+    percentiles por celda. Cada lote se reduce a un histograma acumulado de tamaño fijo, por lo
+    que la memoria depende de `tamano_lote` y `n_bins` y no de `n_simulaciones`.
+
+    Parámetros:
+    base, crecimiento, ruido: igual que en `proyectar_escenarios`.
+    n_simulaciones (int): cantidad total de escenarios.
+    reducir (callable): función opcional que recibe el KPI del lote, forma
+        (lote, provincias, trimestres), y lo reduce por escenario (por ejemplo, la media
+        entre provincias con `lambda kpi: kpi.mean(axis=1)`).
+    fijos (array-like): valores observados, forma (provincias, trimestres), con NaN donde no hay
+        dato real. Donde hay dato, reemplaza al valor simulado en todos los escenarios.
+    percentiles (tuple): percentiles a calcular.
+    tamano_lote (int): escenarios simulados por lote.
+    n_bins (int): resolución del histograma entre el KPI mínimo y máximo posibles.
+    rng (np.random.Generator): generador a usar.
+
+    Retorna:
+    dict con un array por percentil (clave `p5`, `p50`, ...) y la media exacta (`media`), todos con
+    la forma de una celda reducida.
+    """
+    if n_simulaciones <= 0:
+        raise ValueError(f"n_simulaciones debe ser positivo (se recibió {n_simulaciones})")
+    if tamano_lote <= 0:
+        raise ValueError(f"tamano_lote debe ser positivo (se recibió {tamano_lote})")
+    rng = np.random.default_rng() if rng is None else rng
+    estimado = np.asarray(base, dtype=float)[:, None] * (1 + np.asarray(crecimiento, dtype=float)[None, :] / 100)
+    if fijos is not None:
+        fijos = np.asarray(fijos, dtype=float)
+        hay_fijo = ~np.isnan(fijos)
+
+    # El ruido uniforme acota el KPI a [-100 * ruido, 100 * ruido]; los valores fijos pueden salir de ese rango
+    minimo, maximo = -100 * ruido, 100 * ruido
+    if fijos is not None and hay_fijo.any():
+        kpi_fijos = ((fijos - estimado) / estimado * 100)[hay_fijo]
+        minimo, maximo = min(minimo, kpi_fijos.min()), max(maximo, kpi_fijos.max())
+    ancho = (maximo - minimo) / n_bins or 1.0
+
+    conteos = suma = menor = mayor = None
+    restantes = n_simulaciones
+    while restantes > 0:
+        lote = min(tamano_lote, restantes)
+        restantes -= lote
+
+        _, simulado = proyectar_escenarios(base, crecimiento, ruido, n_escenarios=lote, rng=rng)
+        if fijos is not None:
+            simulado = np.where(hay_fijo[None, :, :], fijos[None, :, :], simulado)
+        kpi = (simulado - estimado[None, :, :]) / estimado[None, :, :] * 100
+        if reducir is not None:
+            kpi = reducir(kpi)
+
+        celdas = kpi.reshape(lote, -1)
+        if conteos is None:
+            forma = kpi.shape[1:]
+            n_celdas = celdas.shape[1]
+            conteos = np.zeros(n_celdas * n_bins, dtype=np.int64)
+            suma = np.zeros(n_celdas)
+            menor = np.full(n_celdas, np.inf)
+            mayor = np.full(n_celdas, -np.inf)
+
+        bins = np.clip(((celdas - minimo) / ancho).astype(np.int64), 0, n_bins - 1)
+        conteos += np.bincount((bins + np.arange(n_celdas)[None, :] * n_bins).ravel(), minlength=n_celdas * n_bins)
+        suma += celdas.sum(axis=0)
+        menor = np.minimum(menor, celdas.min(axis=0))
+        mayor = np.maximum(mayor, celdas.max(axis=0))
+
+    acumulado = conteos.reshape(n_celdas, n_bins).cumsum(axis=1)
+    resultado = {"media": (suma / n_simulaciones).reshape(forma)}
+    for percentil in percentiles:
+        objetivo = percentil / 100 * n_simulaciones
+        indice = (acumulado < objetivo).sum(axis=1)
+        valor = minimo + (indice + 0.5) * ancho
+        # Recortar al rango observado hace exacto el resultado en celdas constantes (valores fijos)
+        resultado[f"p{percentil}"] = np.clip(valor, menor, mayor).reshape(forma)
+    return resultado
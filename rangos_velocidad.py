@@ -0,0 +1,130 @@
+"""
+Distribución de los accesos por rango de velocidad (Acceso_rango_provincia).
+
+Los conteos por rango se pasan una vez a un arreglo (provincia, periodo, rango), con el total del
+país como una provincia más, y sobre él se calculan con NumPy:
+
+- la distribución acumulada (proporción de accesos hasta cada límite de velocidad);
+- la velocidad mediana estimada, interpolando linealmente dentro del rango donde la acumulada
+  cruza 0,5;
+- matrices de migración entre trimestres consecutivos. Solo se conocen los totales por rango, no
+  los movimientos de cada acceso, así que se estiman con el acoplamiento monótono de las dos
+  distribuciones: los accesos conservan su posición relativa (el percentil p de un trimestre pasa
+  al percentil p del siguiente), que es el traslado mínimo entre rangos ordenados.
+
+El dashboard solo recorta los arreglos ya calculados.
+"""
+import numpy as np
+import pandas as pd
+
+# Rangos ordenados con sus límites en Mbps; 'OTROS' no tiene velocidad conocida y se excluye
+RANGOS = ['HASTA 512 kbps', '+ 512 Kbps - 1 Mbps', '+ 1 Mbps - 6 Mbps', '+ 6 Mbps - 10 Mbps',
+          '+ 10 Mbps - 20 Mbps', '+ 20 Mbps - 30 Mbps', '+ 30 Mbps']
+LIMITES_MBPS = [0.0, 0.512, 1.0, 6.0, 10.0, 20.0, 30.0]
+# Límite superior supuesto para el último rango abierto ('+ 30 Mbps'); solo afecta a las medianas
+# que caen en ese rango
+LIMITE_SUPERIOR_MBPS = 100.0
+TOTAL_PAIS = "Total país"
+
+
+def cruce_acumulada(acumulada, limites, nivel=0.5):
+    """
+    Velocidad en la que la distribución acumulada alcanza `nivel`, interpolando linealmente dentro
+    del rango.
+
+    Parámetros:
+    acumulada (np.ndarray): (..., R) proporción acumulada al final de cada rango.
+    limites (np.ndarray): R + 1 límites de los rangos.
+
+    Retorna:
+    np.ndarray (...) con NaN donde no hay datos.
+    """
+    rango = np.argmax(acumulada >= nivel, axis=-1)
+    previa = np.where(rango > 0, np.take_along_axis(acumulada, np.maximum(rango - 1, 0)[..., None], axis=-1)[..., 0], 0.0)
+    final = np.take_along_axis(acumulada, rango[..., None], axis=-1)[..., 0]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        fraccion = (nivel - previa) / (final - previa)
+    mediana = limites[rango] + fraccion * (limites[rango + 1] - limites[rango])
+    return np.where(np.isnan(acumulada[..., -1]), np.nan, mediana)
+
+
+def migraciones_monotonas(acumulada):
+    """
+    Matrices de migración estimadas entre periodos consecutivos con el acoplamiento monótono.
+
+    Parámetros:
+    acumulada (np.ndarray): (P, T, R) distribución acumulada de cada periodo.
+
+    Retorna:
+    np.ndarray (P, T - 1, R, R): en [p, t, i, j], proporción de los accesos del rango i en el
+    periodo t que están en el rango j en el periodo t + 1 (cada fila suma 1).
+    """
+    inicio = np.concatenate([np.zeros_like(acumulada[..., :1]), acumulada[..., :-1]], axis=-1)
+    origen_inicio, origen_fin = inicio[:, :-1, :, None], acumulada[:, :-1, :, None]
+    destino_inicio, destino_fin = inicio[:, 1:, None, :], acumulada[:, 1:, None, :]
+    # Masa compartida por el intervalo de percentiles del rango i (antes) y del rango j (después)
+    masa = np.clip(np.minimum(origen_fin, destino_fin) - np.maximum(origen_inicio, destino_inicio), 0.0, None)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return masa / masa.sum(axis=-1, keepdims=True)
+
+
+class DistribucionRangos:
+    """
+    Distribuciones por rango de velocidad precalculadas para todas las provincias (y el país) y
+    todos los periodos.
+
+    Parámetros:
+    conteos (np.ndarray): (P, T, R) accesos por provincia, periodo y rango.
+    provincias (list): nombres del eje 0.
+    fechas (pd.DatetimeIndex): periodos del eje 1, ordenados.
+    limite_superior (float): límite supuesto del último rango, en Mbps.
+    """
+
+    def __init__(self, conteos, provincias, fechas, limite_superior=LIMITE_SUPERIOR_MBPS):
+        if limite_superior <= LIMITES_MBPS[-1]:
+            raise ValueError(f"El límite superior debe ser mayor que {LIMITES_MBPS[-1]} Mbps")
+        self.provincias = pd.Index(provincias, name="Provincia")
+        self.fechas = pd.DatetimeIndex(fechas, name="Fecha")
+        self.rangos = list(RANGOS)
+        self.limites = np.array(LIMITES_MBPS + [limite_superior])
+        self.conteos = conteos
+
+        total = conteos.sum(axis=-1, keepdims=True)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            self.proporciones = np.where(total > 0, conteos / total, np.nan)
+        self.acumulada = np.cumsum(self.proporciones, axis=-1)
+        self.medianas = cruce_acumulada(self.acumulada, self.limites)
+        self.migraciones = migraciones_monotonas(self.acumulada)
+        self._posicion = {provincia: i for i, provincia in enumerate(self.provincias)}
+
+    @classmethod
+    def desde_datos(cls, acceso_rango, limite_superior=LIMITE_SUPERIOR_MBPS):
+        """Construye las distribuciones desde el dataframe de Acceso_rango_provincia.csv."""
+        conteos = acceso_rango.assign(Provincia=acceso_rango["Provincia"].astype(str))
+        conteos = conteos.set_index(["Provincia", "Fecha"])[RANGOS].sort_index()
+        provincias = conteos.index.get_level_values("Provincia").unique()
+        fechas = conteos.index.get_level_values("Fecha").unique().sort_values()
+        completo = pd.MultiIndex.from_product([provincias, fechas], names=["Provincia", "Fecha"])
+        # Los periodos faltantes quedan en cero y sus distribuciones en NaN
+        arreglo = conteos.reindex(completo).fillna(0).to_numpy(dtype=float).reshape(len(provincias), len(fechas), len(RANGOS))
+        arreglo = np.concatenate([arreglo, arreglo.sum(axis=0, keepdims=True)], axis=0)
+        return cls(arreglo, list(provincias) + [TOTAL_PAIS], fechas, limite_superior)
+
+    def acumulada_provincia(self, provincia, fecha):
+        """Proporción acumulada de accesos hasta el límite superior de cada rango."""
+        p = self._posicion[provincia]
+        t = self.fechas.get_loc(pd.Timestamp(fecha))
+        return pd.Series(self.acumulada[p, t], index=self.rangos, name="Acumulada")
+
+    def medianas_por_periodo(self, provincias=None):
+        """Velocidad mediana estimada (Mbps) por periodo (filas) y provincia (columnas)."""
+        medianas = pd.DataFrame(self.medianas.T, index=self.fechas, columns=self.provincias)
+        return medianas if provincias is None else medianas[provincias]
+
+    def migracion(self, provincia, fecha):
+        """Matriz de migración estimada del periodo anterior a `fecha` hacia `fecha` (filas: origen)."""
+        p = self._posicion[provincia]
+        t = self.fechas.get_loc(pd.Timestamp(fecha))
+        if t == 0:
+            raise ValueError("El primer periodo no tiene periodo anterior")
+        return pd.DataFrame(self.migraciones[p, t - 1], index=self.rangos, columns=self.rangos)
@@ -0,0 +1,61 @@
+import base64
+
+import numpy as np
+
+from cache_figuras import DECIMALES, MIN_ELEMENTOS_BINARIO, compactar_figura
+
+
+def decodificar(arreglo):
+    valores = np.frombuffer(base64.b64decode(arreglo["bdata"]), dtype="<" + arreglo["dtype"])
+    if "shape" in arreglo:
+        valores = valores.reshape([int(lado) for lado in arreglo["shape"].split(",")])
+    return valores
+
+
+def test_arreglos_tipados_ida_y_vuelta():
+    reales = [float(valor) for valor in np.linspace(0.1, 250.3, 20)]
+    enteros = list(range(-5, 15)) + [70_000]
+    con_nulos = [1.5] * (MIN_ELEMENTOS_BINARIO - 1) + [None]
+    z = [[float(i * 4 + j) / 3 for j in range(4)] for i in range(4)]
+    figura = compactar_figura({
+        "data": [
+            {"type": "scatter", "x": reales, "y": enteros, "customdata": reales},
+            {"type": "scatter", "x": con_nulos, "y": reales[:MIN_ELEMENTOS_BINARIO - 1]},
+            {"type": "heatmap", "z": z},
+        ],
+        "layout": {"xaxis": {"range": reales[:2]}},
+    })
+    linea, corta, mapa = figura["data"]
+
+    assert linea["x"]["dtype"] == "f4"
+    np.testing.assert_allclose(decodificar(linea["x"]), reales, rtol=1e-7)
+    # Enteros en el tipo entero más chico que los contiene
+    assert linea["y"]["dtype"] == "i4"
+    np.testing.assert_array_equal(decodificar(linea["y"]), enteros)
+    # Las claves excluidas y el layout no se tocan
+    assert linea["customdata"] == reales and figura["layout"] == {"xaxis": {"range": reales[:2]}}
+
+    # None pasa a NaN; por debajo del mínimo de elementos queda en JSON redondeado
+    np.testing.assert_array_equal(decodificar(corta["x"]), [1.5] * (MIN_ELEMENTOS_BINARIO - 1) + [np.nan])
+    assert corta["y"] == [round(valor, DECIMALES) for valor in reales[:MIN_ELEMENTOS_BINARIO - 1]]
+
+    assert mapa["z"]["shape"] == "4, 4"
+    np.testing.assert_allclose(decodificar(mapa["z"]), z, rtol=1e-7)
+
+
+def test_cajas_con_categoria_unica():
+    valores = [float(valor) for valor in range(30)]
+    figura = compactar_figura({"data": [
+        {"type": "box", "x": ["Fibra óptica"] * 30, "y": valores},
+        {"type": "box", "x": ["ADSL", "Wireless"] * 15, "y": valores},
+        {"type": "violin", "y": ["Norte"] * 30, "x": valores},
+    ], "layout": {}})
+    unica, dos, horizontal = figura["data"]
+
+    assert unica["x0"] == "Fibra óptica" and "x" not in unica
+    assert unica["y"]["dtype"] == "i1"
+    np.testing.assert_array_equal(decodificar(unica["y"]), valores)
+    # Con más de una categoría los puntos conservan la suya
+    assert dos["x"] == ["ADSL", "Wireless"] * 15 and "x0" not in dos
+    assert horizontal["y0"] == "Norte" and "y" not in horizontal
+    np.testing.assert_array_equal(decodificar(horizontal["x"]), valores)
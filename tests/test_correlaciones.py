@@ -0,0 +1,43 @@
+import os
+import warnings
+
+import numpy as np
+
+from cache_datos import ARCHIVOS_CSV, FUENTES_PANEL, TECNOLOGIAS, DatosPanel, leer_csv
+from correlaciones import MatrizCorrelaciones, tabla_metricas
+from panel import PanelProvincias
+
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DIRECTORIO_DATOS = os.path.join(RAIZ, 'Datasets')
+
+
+def fuentes_repositorio():
+    tablas = {nombre: leer_csv(os.path.join(DIRECTORIO_DATOS, archivo)) for nombre, archivo in ARCHIVOS_CSV.items()}
+    datos = DatosPanel(panel=PanelProvincias.desde_frames({
+        fuente: (tablas[tabla], columnas) for fuente, (tabla, columnas) in FUENTES_PANEL.items()
+    }))
+    return datos["data"], datos["merged_data"], tablas["acceso_rango_provincia"]
+
+
+def test_extender_equivale_a_reconstruir():
+    data, merged_data, acceso_rango = fuentes_repositorio()
+    fechas = np.sort(data["Fecha"].unique())
+    anteriores = [df[df["Fecha"] < fechas[-2]] for df in (data, merged_data, acceso_rango)]
+    with warnings.catch_warnings():
+        # Provincias sin ninguna observación de una métrica en el periodo (media de un arreglo vacío)
+        warnings.simplefilter("ignore", RuntimeWarning)
+        completa = MatrizCorrelaciones.desde_datos(data, merged_data, acceso_rango, TECNOLOGIAS)
+        parcial = MatrizCorrelaciones.desde_datos(*anteriores, TECNOLOGIAS)
+
+    metricas = tabla_metricas(data, merged_data, acceso_rango, TECNOLOGIAS)
+    extendida = parcial
+    for fecha in fechas[-2:]:
+        extendida = extendida.extender(metricas[metricas.index.get_level_values("Fecha") == fecha])
+
+    assert extendida.fechas.equals(completa.fechas)
+    assert parcial.valores.shape[1] == completa.valores.shape[1] - 2
+    # Las ventanas anteriores no se recalculan y las nuevas coinciden con el cálculo completo
+    np.testing.assert_array_equal(extendida.valores[:, :-2], parcial.valores)
+    np.testing.assert_allclose(extendida.valores[:, -2:], completa.valores[:, -2:], atol=1e-7)
+    assert parcial.extender(metricas.iloc[:0]) is parcial
@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+import pytest
+from scipy import stats
+
+from estadisticas import EstadisticasIncrementales
+
+
+COLUMNAS = ["x", "y", "z"]
+
+
+def datos_con_nulos(filas=300, semilla=4):
+    rng = np.random.default_rng(semilla)
+    x = rng.normal(50, 10, filas)
+    df = pd.DataFrame({"x": x, "y": 3.5 * x + rng.normal(0, 8, filas), "z": rng.uniform(0, 1, filas)})
+    for columna in COLUMNAS:
+        df.loc[rng.choice(filas, 15, replace=False), columna] = np.nan
+    return df
+
+
+def test_lotes_igual_a_scipy():
+    df = datos_con_nulos()
+    estadisticas = EstadisticasIncrementales(COLUMNAS)
+    for inicio in range(0, len(df), 70):
+        estadisticas = estadisticas.con_lote(df.iloc[inicio:inicio + 70])
+
+    # Las filas con algún nulo se descartan, como en el cálculo sobre el conjunto completo sin nulos
+    completo = df.dropna()
+    assert estadisticas.n == len(completo)
+    for x, y in [("x", "y"), ("x", "z"), ("z", "y")]:
+        r, p_valor = stats.pearsonr(completo[x], completo[y])
+        assert estadisticas.pearson(x, y) == pytest.approx((r, p_valor), rel=1e-9, abs=1e-12)
+        ajuste = stats.linregress(completo[x], completo[y])
+        regresion = estadisticas.regresion(x, y)
+        assert regresion["pendiente"] == pytest.approx(ajuste.slope, rel=1e-9)
+        assert regresion["intercepto"] == pytest.approx(ajuste.intercept, rel=1e-9)
+        assert regresion["r2"] == pytest.approx(ajuste.rvalue ** 2, rel=1e-9)
+
+
+def test_con_lote_no_modifica_el_acumulador():
+    df = datos_con_nulos()
+    estadisticas = EstadisticasIncrementales.desde_dataframe(df.iloc[:150], COLUMNAS)
+    n, media, m2 = estadisticas.n, estadisticas.media.copy(), estadisticas.m2.copy()
+    nuevas = estadisticas.con_lote(df.iloc[150:])
+    assert (estadisticas.n, nuevas.n) == (n, len(df.dropna()))
+    np.testing.assert_array_equal(estadisticas.media, media)
+    np.testing.assert_array_equal(estadisticas.m2, m2)
+
+
+def test_combinar_particiones():
+    df = datos_con_nulos()
+    partes = [EstadisticasIncrementales.desde_dataframe(parte, COLUMNAS) for parte in (df.iloc[:40], df.iloc[40:40], df.iloc[40:])]
+    combinado = partes[0].combinar(partes[1]).combinar(partes[2])
+    completo = EstadisticasIncrementales.desde_dataframe(df, COLUMNAS)
+    assert combinado.n == completo.n
+    np.testing.assert_allclose(combinado.media, completo.media)
+    np.testing.assert_allclose(combinado.m2, completo.m2)
+
+    with pytest.raises(ValueError):
+        combinado.combinar(EstadisticasIncrementales(["x", "y"]))
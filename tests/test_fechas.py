@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from etl.fechas import corregir_años_fuera_de_secuencia, fechas_trimestre
+
+
+def test_fechas_trimestre_igual_al_texto():
+    años = np.array([2014, 2023, 2023, 2024, 2014])
+    trimestres = np.array([1, 4, 2, 3, 1])
+    esperado = pd.to_datetime([f"{año}-{(trimestre - 1) * 3 + 1:02d}-01" for año, trimestre in zip(años, trimestres)])
+    np.testing.assert_array_equal(fechas_trimestre(años, trimestres), esperado.to_numpy())
+    with pytest.raises(ValueError):
+        fechas_trimestre([2023], [5])
+
+
+def test_corrige_un_bloque_con_el_año_mal_cargado():
+    # 2023 T4 cargado como 2024 T4 entre 2024 T1 y 2023 T3 (orden decreciente de la hoja)
+    fechas = pd.to_datetime(['2024-01-01'] * 2 + ['2024-10-01'] * 2 + ['2023-07-01'] * 2 + ['2023-04-01'])
+    corregidas, filas = corregir_años_fuera_de_secuencia(fechas)
+    assert filas == 2
+    esperado = fechas.where(fechas != pd.Timestamp('2024-10-01'), pd.Timestamp('2023-10-01'))
+    np.testing.assert_array_equal(corregidas, esperado.to_numpy())
+
+    # En una hoja en orden creciente el desfase va para el otro lado
+    crecientes = pd.to_datetime(['2023-04-01', '2023-07-01', '2022-10-01', '2024-01-01'])
+    corregidas, filas = corregir_años_fuera_de_secuencia(crecientes)
+    assert filas == 1
+    assert pd.Timestamp(corregidas[2]) == pd.Timestamp('2023-10-01')
+
+
+@pytest.mark.parametrize("fechas", [
+    # Ordenada
+    ['2024-01-01', '2023-10-01', '2023-07-01', '2023-04-01'],
+    # 2024 T4 encajaría como 2023 T4, pero ese trimestre ya figura en otro lugar de la hoja
+    ['2024-01-01', '2024-10-01', '2023-07-01', '2023-10-01'],
+    # Fuera de orden, pero con un año de diferencia tampoco encaja entre sus vecinos
+    ['2024-01-01', '2022-04-01', '2023-07-01', '2023-04-01'],
+    # Hueco de un trimestre sin bloque fuera de orden
+    ['2024-01-01', '2023-07-01', '2023-04-01'],
+])
+def test_no_corrige_lo_que_no_encaja(fechas):
+    fechas = pd.to_datetime(fechas)
+    corregidas, filas = corregir_años_fuera_de_secuencia(fechas)
+    assert filas == 0
+    np.testing.assert_array_equal(corregidas, fechas.to_numpy())
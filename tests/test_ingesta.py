@@ -0,0 +1,80 @@
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from cache_datos import ARCHIVOS_CSV, cargar_datos, leer_csv
+from etl import validacion
+from ingesta import EstadoIncremental, agregar_trimestre, leer_registro, persistir_trimestre
+
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DIRECTORIO_DATOS = os.path.join(RAIZ, 'Datasets')
+
+
+@pytest.fixture
+def directorio(tmp_path):
+    for archivo in ARCHIVOS_CSV.values():
+        shutil.copy(os.path.join(DIRECTORIO_DATOS, archivo), tmp_path / archivo)
+    return str(tmp_path)
+
+
+def leer_tablas(directorio):
+    return {nombre: leer_csv(os.path.join(directorio, archivo)) for nombre, archivo in ARCHIVOS_CSV.items()}
+
+
+def test_persistir_antepone_el_trimestre_y_registra(directorio):
+    anteriores = leer_tablas(directorio)
+    filas = pd.DataFrame({"Provincia": ["Buenos Aires", "Córdoba"], "Mbps (Media de bajada)": [170.5, 120.25]})
+
+    assert persistir_trimestre(directorio, "2024-04-01", filas) == 1
+
+    tablas = leer_tablas(directorio)
+    velocidad = tablas["vel_media_provincia"]
+    assert velocidad.iloc[:2][["Provincia", "Mbps (Media de bajada)"]].astype({"Provincia": str}).values.tolist() == [["Buenos Aires", 170.5], ["Córdoba", 120.25]]
+    assert (velocidad["Fecha"].iloc[:2] == pd.Timestamp("2024-04-01")).all()
+    # Las filas existentes y las tablas sin columnas en la ingesta no cambian
+    pd.testing.assert_frame_equal(velocidad.iloc[2:].reset_index(drop=True), anteriores["vel_media_provincia"], check_categorical=False)
+    pd.testing.assert_frame_equal(tablas["tecnologia_provincia"], anteriores["tecnologia_provincia"])
+    assert all(hallazgo['severidad'] == 'advertencia' for hallazgo in validacion.validar_datos(tablas))
+
+    registro = leer_registro(directorio)
+    assert registro["version"] == 1
+    assert registro["trimestres"][0]["fecha"] == "2024-04-01"
+
+
+def test_trimestre_invalido_no_escribe(directorio):
+    contenido = {archivo: open(os.path.join(directorio, archivo), 'rb').read() for archivo in ARCHIVOS_CSV.values()}
+    negativo = pd.DataFrame({"Provincia": ["Buenos Aires"], "Mbps (Media de bajada)": [-1.0]})
+    with pytest.raises(validacion.ErrorValidacion):
+        persistir_trimestre(directorio, "2024-04-01", negativo)
+    with pytest.raises(ValueError):
+        persistir_trimestre(directorio, "2024-01-01", negativo.assign(**{"Mbps (Media de bajada)": 1.0}))
+
+    assert contenido == {archivo: open(os.path.join(directorio, archivo), 'rb').read() for archivo in ARCHIVOS_CSV.values()}
+    assert leer_registro(directorio)["version"] == 0
+
+
+def test_agregar_trimestre_no_modifica_el_estado(directorio, tmp_path):
+    datos = cargar_datos(directorio, directorio_cache=str(tmp_path / "cache"))
+    estado = EstadoIncremental(datos)
+    conteos = {tasa: dict(conteo) for tasa, conteo in estado.conteos.items()}
+    ultimos = {nombre: dict(ultimo) for nombre, ultimo in estado.ultimos.items()}
+    filas = pd.DataFrame({"Provincia": ["Buenos Aires", "Córdoba"], "Mbps (Media de bajada)": [170.5, 120.25]})
+
+    resultado = agregar_trimestre(datos, estado, "2024-04-01", filas)
+    assert estado.conteos == conteos and estado.ultimos == ultimos
+    assert pd.Timestamp("2024-04-01") not in estado.fechas
+    # Reintentar con el estado anterior da el mismo resultado
+    reintento = agregar_trimestre(datos, estado, "2024-04-01", filas)
+    pd.testing.assert_frame_equal(reintento["datos"]["resumen_crecimiento"], resultado["datos"]["resumen_crecimiento"])
+
+    # La media móvil coincide con la media de todas las tasas del panel nuevo
+    tasa = "Tasa_de_crecimiento_vel_media"
+    nuevos = resultado["datos"]
+    medias = nuevos["vel_media_provincia"].groupby("Provincia", observed=True)[tasa].mean()
+    resumen = nuevos["resumen_crecimiento"].set_index(nuevos["resumen_crecimiento"]["Provincia"].astype(str))[tasa]
+    np.testing.assert_allclose(resumen[["Buenos Aires", "Córdoba"]], medias[["Buenos Aires", "Córdoba"]], rtol=1e-5)
+    assert resultado["estado"].conteos[tasa]["Buenos Aires"] == conteos[tasa]["Buenos Aires"] + 1
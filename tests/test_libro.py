@@ -0,0 +1,46 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from etl import lectura
+from etl.libro import LibroExcel
+from etl.pipeline import HOJAS
+
+
+RUTA_EXCEL = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'Datasets', 'Internet.xlsx')
+
+
+def test_hojas_leidas_en_paralelo(monkeypatch):
+    # Cada lectura abre su propio lector: varias hojas tienen que poder estar abiertas a la vez
+    abiertas = 0
+    maximo = 0
+    cerrojo = threading.Lock()
+    barrera = threading.Barrier(len(HOJAS), timeout=30)
+    leer_lotes = lectura.leer_lotes
+
+    def leer_lotes_contando(*args, **kwargs):
+        nonlocal abiertas, maximo
+        lotes = leer_lotes(*args, **kwargs)
+        primero = next(lotes)
+        with cerrojo:
+            abiertas += 1
+            maximo = max(maximo, abiertas)
+        barrera.wait()
+        yield primero
+        yield from lotes
+        with cerrojo:
+            abiertas -= 1
+
+    monkeypatch.setattr('etl.libro.leer_lotes', leer_lotes_contando)
+    with LibroExcel(RUTA_EXCEL) as libro, ThreadPoolExecutor(max_workers=len(HOJAS)) as ejecutor:
+        futuros = {hoja: ejecutor.submit(libro.leer, hoja, filas_pie) for hoja, (_, _, _, filas_pie) in HOJAS.items()}
+        resultados = {hoja: futuro.result() for hoja, futuro in futuros.items()}
+
+    assert maximo == len(HOJAS)
+    for hoja, (_, _, _, filas_pie) in HOJAS.items():
+        esperado = pd.read_excel(RUTA_EXCEL, sheet_name=hoja)
+        esperado = esperado.iloc[:len(esperado) - filas_pie]
+        # Sin las notas al pie, las columnas enteras quedan enteras (pd.read_excel las lee como float)
+        pd.testing.assert_frame_equal(resultados[hoja], esperado, check_dtype=False)
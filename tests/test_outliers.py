@@ -0,0 +1,44 @@
+import os
+
+import pandas as pd
+
+from etl.lectura import leer_lotes
+from etl.outliers import MIN_FILAS_PARALELO, corregir_outliers, corregir_outliers_paralelo
+from etl.transformaciones import transformar_acceso_rango
+
+
+RUTA_EXCEL = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'Datasets', 'Internet.xlsx')
+
+
+def hoja_acceso_rango():
+    df = pd.concat([transformar_acceso_rango(lote) for lote in leer_lotes(RUTA_EXCEL, 'Accesos por velocidad')],
+                   ignore_index=True)
+    df['OTROS'] = df['OTROS'].fillna(round(df['OTROS'].mean(), 2))
+    return df
+
+
+def test_paralelo_igual_al_secuencial():
+    df = hoja_acceso_rango()
+    esperado, auditoria_esperada = corregir_outliers(df)
+    # min_filas=0 fuerza el camino con procesos aunque la hoja sea chica
+    resultado, auditoria = corregir_outliers_paralelo(df, min_filas=0, procesos=2)
+    assert len(auditoria) > 0
+    pd.testing.assert_frame_equal(resultado, esperado)
+    pd.testing.assert_frame_equal(auditoria, auditoria_esperada)
+
+
+def test_paralelo_informa_cada_particion():
+    df = hoja_acceso_rango()
+    avances = []
+    _, auditoria = corregir_outliers_paralelo(df, min_filas=0, procesos=2, progreso=lambda *avance: avances.append(avance))
+    # Con procesos hay una tarea por grupo de provincias: cada una informa al terminar
+    assert len(avances) > 1
+    assert sorted(terminadas for terminadas, _, _, _ in avances) == list(range(1, len(avances) + 1))
+    assert {total for _, total, _, _ in avances} == {len(avances)}
+    assert sorted(provincia for _, _, grupos, _ in avances for provincia in grupos) == sorted(df['Provincia'].unique())
+    assert sum(celdas for _, _, _, celdas in avances) == len(auditoria)
+
+    # Con la hoja real y el umbral por defecto se corrige en el proceso actual, en una sola tarea
+    avances.clear()
+    corregir_outliers_paralelo(df, procesos=2, progreso=lambda *avance: avances.append(avance))
+    assert len(df) < MIN_FILAS_PARALELO and [avance[:2] for avance in avances] == [(1, 1)]
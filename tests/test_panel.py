@@ -0,0 +1,55 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from cache_datos import ARCHIVOS_CSV, FUENTES_PANEL, DatosPanel, leer_csv
+from panel import PanelProvincias
+
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DIRECTORIO_DATOS = os.path.join(RAIZ, 'Datasets')
+
+
+def panel_repositorio():
+    tablas = {nombre: leer_csv(os.path.join(DIRECTORIO_DATOS, ARCHIVOS_CSV[nombre])) for nombre, _ in FUENTES_PANEL.values()}
+    return tablas, PanelProvincias.desde_frames({
+        fuente: (tablas[tabla], columnas) for fuente, (tabla, columnas) in FUENTES_PANEL.items()
+    })
+
+
+def test_vistas_reproducen_los_csv():
+    tablas, panel = panel_repositorio()
+    datos = DatosPanel(panel=panel)
+    for fuente, (tabla, columnas) in FUENTES_PANEL.items():
+        esperado = tablas[tabla].sort_values(['Provincia', 'Fecha']).reset_index(drop=True)
+        vista = datos[tabla]
+        assert len(vista) == len(esperado)
+        np.testing.assert_allclose(vista[columnas].to_numpy(dtype=float), esperado[columnas].to_numpy(dtype=float), rtol=1e-6)
+
+
+def test_tabla_del_cache_reconstruye_el_panel():
+    _, panel = panel_repositorio()
+    reconstruido = PanelProvincias.desde_tabla(panel.a_tabla())
+    np.testing.assert_array_equal(reconstruido.valores, panel.valores)
+    assert reconstruido.fechas.equals(panel.fechas)
+    assert list(reconstruido.provincias) == list(panel.provincias)
+    assert all(np.array_equal(reconstruido.presencia[fuente], panel.presencia[fuente]) for fuente in panel.presencia)
+
+
+def test_agregar_periodo_no_modifica_el_panel():
+    _, panel = panel_repositorio()
+    forma = panel.valores.shape
+    fecha = panel.fechas[-1] + pd.DateOffset(months=3)
+    filas = pd.DataFrame({"Provincia": ["Buenos Aires", "Provincia Nueva"], "Mbps (Media de bajada)": [200.0, 10.0]})
+    nuevo = panel.agregar_periodo(fecha, {"velocidad": (filas, ["Mbps (Media de bajada)"])})
+
+    assert panel.valores.shape == forma and len(panel.fechas) == forma[1]
+    assert nuevo.valores.shape == (forma[0] + 1, forma[1] + 1, forma[2])
+    velocidad = nuevo.serie("Mbps (Media de bajada)")
+    assert velocidad.loc[fecha, "Buenos Aires"] == 200.0
+    assert velocidad.loc[fecha, "Provincia Nueva"] == 10.0
+    assert np.isnan(velocidad.loc[fecha, "Córdoba"])
+    # Los periodos anteriores conservan sus valores aunque las provincias cambien de posición
+    pd.testing.assert_frame_equal(velocidad.iloc[:-1][list(panel.provincias)], panel.serie("Mbps (Media de bajada)"), check_names=False, check_categorical=False, check_column_type=False)
+    assert not nuevo.presencia["tecnologia"][:, -1].any()
@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+
+from proyecciones import percentiles_kpi_monte_carlo, proyectar_escenarios
+
+
+BASE = np.array([100.0, 250.0, 40.0])
+CRECIMIENTO = np.array([1.0, 2.5, 4.0, 6.0])
+RUIDO = 0.08
+
+
+def test_proyectar_escenarios_por_broadcasting():
+    estimado, simulado = proyectar_escenarios(BASE, CRECIMIENTO, RUIDO, n_escenarios=5, rng=np.random.default_rng(1))
+    esperado = np.array([[base * (1 + crecimiento / 100) for crecimiento in CRECIMIENTO] for base in BASE])
+    np.testing.assert_allclose(estimado, esperado)
+    assert simulado.shape == (5, len(BASE), len(CRECIMIENTO))
+    assert np.all(np.abs(simulado / estimado - 1) <= RUIDO)
+
+    # Con la misma semilla se repiten los escenarios
+    _, repetido = proyectar_escenarios(BASE, CRECIMIENTO, RUIDO, n_escenarios=5, rng=np.random.default_rng(1))
+    np.testing.assert_array_equal(repetido, simulado)
+
+
+def test_percentiles_igual_a_np_percentile():
+    n_simulaciones, tamano_lote, n_bins = 1000, 250, 2000
+    resultado = percentiles_kpi_monte_carlo(BASE, CRECIMIENTO, RUIDO, n_simulaciones, tamano_lote=tamano_lote,
+                                            n_bins=n_bins, rng=np.random.default_rng(7))
+
+    # Los mismos escenarios, lote por lote, con el KPI completo en memoria
+    rng = np.random.default_rng(7)
+    lotes = [proyectar_escenarios(BASE, CRECIMIENTO, RUIDO, n_escenarios=tamano_lote, rng=rng) for _ in range(n_simulaciones // tamano_lote)]
+    kpi = np.concatenate([(simulado - estimado) / estimado * 100 for estimado, simulado in lotes])
+
+    # El histograma toma el primer valor cuya acumulada alcanza el percentil (sin interpolar entre
+    # escenarios) y devuelve el centro de su bin: la diferencia queda dentro de un ancho de bin
+    ancho = 200 * RUIDO / n_bins
+    for percentil in (5, 50, 95):
+        esperado = np.percentile(kpi, percentil, axis=0, method="inverted_cdf")
+        np.testing.assert_allclose(resultado[f"p{percentil}"], esperado, rtol=0, atol=ancho)
+    np.testing.assert_allclose(resultado["media"], kpi.mean(axis=0))
+
+
+def test_percentiles_con_reduccion_y_fijos():
+    fijos = np.full((len(BASE), len(CRECIMIENTO)), np.nan)
+    fijos[:, 0] = BASE * 1.2
+    resultado = percentiles_kpi_monte_carlo(BASE, CRECIMIENTO, RUIDO, 300, reducir=lambda kpi: kpi.mean(axis=1),
+                                            fijos=fijos, tamano_lote=64, rng=np.random.default_rng(3))
+    assert resultado["p50"].shape == (len(CRECIMIENTO),)
+    # El trimestre observado es igual en todos los escenarios: sus percentiles son el valor fijo
+    fijo = np.mean((fijos[:, 0] / (BASE * (1 + CRECIMIENTO[0] / 100)) - 1) * 100)
+    for clave in ("p5", "p50", "p95", "media"):
+        assert resultado[clave][0] == pytest.approx(fijo)
+
+
+@pytest.mark.parametrize("argumentos", [{"n_simulaciones": 0}, {"n_simulaciones": -10}, {"n_simulaciones": 10, "tamano_lote": 0}])
+def test_cantidades_no_positivas(argumentos):
+    with pytest.raises(ValueError):
+        percentiles_kpi_monte_carlo(BASE, CRECIMIENTO, RUIDO, **argumentos)
@@ -0,0 +1,52 @@
+import numpy as np
+import pandas as pd
+
+from rangos_velocidad import RANGOS, TOTAL_PAIS, DistribucionRangos
+
+
+# Accesos de una provincia en tres periodos; el último no tiene datos
+CONTEOS = np.array([[
+    [10, 10, 20, 40, 20, 0, 0],
+    [0, 0, 10, 20, 30, 20, 20],
+    [0, 0, 0, 0, 0, 0, 0],
+]], dtype=float)
+FECHAS = pd.to_datetime(["2023-01-01", "2023-04-01", "2023-07-01"])
+
+
+def test_mediana_interpolada_en_su_rango():
+    distribucion = DistribucionRangos(CONTEOS, ["Córdoba"], FECHAS)
+    # Periodo 1: acumulada 0,4 al final de '+ 1 Mbps - 6 Mbps' y 0,8 al final de '+ 6 Mbps - 10 Mbps':
+    # la mediana está a un cuarto de ese rango, 6 + 0,25 * 4 = 7 Mbps
+    # Periodo 2: acumulada 0,3 -> 0,6 en '+ 10 Mbps - 20 Mbps': 10 + (0,2 / 0,3) * 10 Mbps
+    medianas = distribucion.medianas_por_periodo()["Córdoba"]
+    np.testing.assert_allclose(medianas.iloc[:2], [7.0, 10 + 20 / 3])
+    assert np.isnan(medianas.iloc[2])
+    np.testing.assert_allclose(distribucion.acumulada_provincia("Córdoba", "2023-01-01"), [0.1, 0.2, 0.4, 0.8, 1.0, 1.0, 1.0])
+
+
+def test_migraciones_monotonas():
+    distribucion = DistribucionRangos(CONTEOS, ["Córdoba"], FECHAS)
+    migracion = distribucion.migracion("Córdoba", "2023-04-01")
+    assert list(migracion.index) == RANGOS
+
+    # Las filas de los rangos con accesos suman 1; las de los rangos vacíos no tienen destino
+    con_accesos = CONTEOS[0, 0] > 0
+    np.testing.assert_allclose(migracion.to_numpy()[con_accesos].sum(axis=1), 1.0)
+    assert migracion.iloc[~con_accesos].isna().all().all()
+    # Los percentiles 0-10 (primer rango) pasan a '+ 1 Mbps - 6 Mbps'; los 40-80 ('+ 6 Mbps - 10 Mbps')
+    # se reparten en partes iguales entre los percentiles 30-60 y 60-80 del periodo siguiente
+    np.testing.assert_allclose(migracion.iloc[0], [0, 0, 1, 0, 0, 0, 0])
+    np.testing.assert_allclose(migracion.iloc[3], [0, 0, 0, 0, 0.5, 0.5, 0])
+
+
+def test_desde_datos_agrega_el_total_del_pais():
+    filas = [
+        {"Provincia": provincia, "Fecha": fecha, **dict(zip(RANGOS, conteos))}
+        for provincia, factor in (("Córdoba", 1), ("Salta", 2))
+        for fecha, conteos in zip(FECHAS[:2], CONTEOS[0, :2] * factor)
+    ]
+    distribucion = DistribucionRangos.desde_datos(pd.DataFrame(filas))
+    assert list(distribucion.provincias) == ["Córdoba", "Salta", TOTAL_PAIS]
+    np.testing.assert_array_equal(distribucion.conteos[-1], CONTEOS[0, :2] * 3)
+    # Salta tiene el doble de accesos en cada rango: la misma distribución y la misma mediana
+    np.testing.assert_allclose(distribucion.medianas[1], distribucion.medianas[0])
@@ -0,0 +1,35 @@
+import os
+
+import pandas as pd
+import pytest
+
+from cache_datos import ARCHIVOS_CSV, leer_csv
+from etl import validacion
+
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DIRECTORIO_DATOS = os.path.join(RAIZ, 'Datasets')
+
+
+def tablas_repositorio():
+    return {nombre: leer_csv(os.path.join(DIRECTORIO_DATOS, archivo)) for nombre, archivo in ARCHIVOS_CSV.items()}
+
+
+def test_csv_del_repositorio_sin_errores():
+    # Con detener_en_error=True es la misma validación que corre la app al arrancar
+    hallazgos = validacion.validar_datos(tablas_repositorio())
+    assert all(hallazgo['severidad'] == 'advertencia' for hallazgo in hallazgos)
+
+
+def test_csv_previo_a_la_correccion_no_carga():
+    # Un Acceso_rango_provincia.csv generado antes de corregir la hoja (año mal cargado y accesos
+    # negativos en 'OTROS') detiene la carga: hay que regenerarlo con el ETL
+    tablas = tablas_repositorio()
+    rangos = tablas['acceso_rango_provincia'].copy()
+    fechas = rangos['Fecha'].where(rangos['Fecha'] != pd.Timestamp('2023-10-01'), pd.Timestamp('2024-10-01'))
+    rangos['Fecha'] = fechas
+    rangos.loc[rangos.index[:2], 'OTROS'] = -1.0
+    with pytest.raises(validacion.ErrorValidacion) as error:
+        validacion.validar_datos({**tablas, 'acceso_rango_provincia': rangos})
+    chequeos = {hallazgo['chequeo'] for hallazgo in error.value.hallazgos if hallazgo['severidad'] == 'error'}
+    assert chequeos == {'fechas no monótonas dentro de la provincia', 'valores negativos'}
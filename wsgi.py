@@ -0,0 +1,37 @@
+"""
+Punto de entrada WSGI para producción.
+
+    gunicorn -c gunicorn.conf.py wsgi:server
+
+Con `preload_app` el proceso maestro importa este módulo una sola vez: la lectura de los datasets,
+los merges y los agregados de `app.py` (que en desarrollo se cargan de forma diferida) se precargan
+antes del fork y los workers comparten esas páginas de memoria copy-on-write en lugar de repetir
+la carga cada uno.
+"""
+import time
+
+inicio_carga = time.perf_counter()
+
+
+def crear_app(precalentar=True):
+    """
+    Importa la app de Dash y opcionalmente ejecuta todos los cargadores diferidos y construye el
+    mapa inicial, para que los workers hereden los datos ya calculados.
+
+    Parámetros:
+    precalentar (bool): cargar los datos de todas las pestañas en este proceso.
+
+    Retorna:
+    la aplicación Dash ya configurada.
+    """
+    import app as modulo_app
+
+    if precalentar:
+        modulo_app.carga.calentar()
+        modulo_app.crear_mapa_interactivo()
+    return modulo_app.app
+
+
+app = crear_app()
+server = app.server
+segundos_carga = time.perf_counter() - inicio_carga